@@ -1,6 +1,15 @@
 """News Deframer Python package."""
 
-from . import cli, config, logger, miner, poller
+from . import backfill, cli, config, export, logger, miner, poller
 from . import postgres
 
-__all__ = ["cli", "config", "logger", "miner", "poller", "postgres"]
+__all__ = [
+    "backfill",
+    "cli",
+    "config",
+    "export",
+    "logger",
+    "miner",
+    "poller",
+    "postgres",
+]
@@ -0,0 +1,196 @@
+"""Columnar hand-off of mining batches between processes via shared memory.
+
+Task batches (ids, language, title, description and the sanitized content)
+and trend results are encoded as Arrow RecordBatches in the IPC stream format
+and placed in ``multiprocessing.shared_memory`` segments. Only the small
+``SharedBatch`` handle is pickled; the receiver maps the segment and converts
+the columns to Python objects in one pass instead of unpickling a copy of the
+batch from the executor's pipe.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Any, Callable, Sequence, TypeVar
+from uuid import UUID
+
+import pyarrow as pa  # type: ignore[import-untyped]
+
+from news_deframer.models import Trend, as_utc
+
+if TYPE_CHECKING:
+    from news_deframer.miner import MiningTask
+
+T = TypeVar("T")
+
+TASK_BATCH_SCHEMA = pa.schema(
+    [
+        pa.field("feed_id", pa.string(), nullable=False),
+        pa.field("item_id", pa.string(), nullable=False),
+        pa.field("language", pa.string(), nullable=False),
+        pa.field("categories", pa.list_(pa.string())),
+        pa.field("title", pa.string()),
+        pa.field("description", pa.string()),
+        pa.field("pub_date", pa.timestamp("us", tz="UTC"), nullable=False),
+        pa.field("root_domain", pa.string(), nullable=False),
+        pa.field("feed_url", pa.string()),
+        pa.field("content", pa.string(), nullable=False),
+    ]
+)
+
+TREND_BATCH_SCHEMA = pa.schema(
+    [
+        pa.field("item_id", pa.string(), nullable=False),
+        pa.field("feed_id", pa.string(), nullable=False),
+        pa.field("language", pa.string(), nullable=False),
+        pa.field("pub_date", pa.timestamp("us", tz="UTC"), nullable=False),
+        pa.field("root_domain", pa.string(), nullable=False),
+        pa.field("category_stems", pa.list_(pa.string())),
+        pa.field("noun_stems", pa.list_(pa.string())),
+        pa.field("verb_stems", pa.list_(pa.string())),
+        pa.field("adjective_stems", pa.list_(pa.string())),
+    ]
+)
+
+_TASK_FIELDS = [name for name in TASK_BATCH_SCHEMA.names if name != "content"]
+
+
+@dataclass(frozen=True, slots=True)
+class SharedBatch:
+    """Picklable handle of a RecordBatch in a shared memory segment."""
+
+    name: str
+    size: int
+
+
+def tasks_to_batch(
+    tasks: Sequence[MiningTask], contents: Sequence[str]
+) -> pa.RecordBatch:
+    return pa.RecordBatch.from_pydict(
+        {
+            "feed_id": [str(task.feed_id) for task in tasks],
+            "item_id": [str(task.item_id) for task in tasks],
+            "language": [task.language for task in tasks],
+            "categories": [task.categories for task in tasks],
+            "title": [task.title for task in tasks],
+            "description": [task.description for task in tasks],
+            "pub_date": [as_utc(task.pub_date) for task in tasks],
+            "root_domain": [task.root_domain for task in tasks],
+            "feed_url": [task.feed_url for task in tasks],
+            "content": list(contents),
+        },
+        schema=TASK_BATCH_SCHEMA,
+    )
+
+
+def task_rows(batch: pa.RecordBatch) -> tuple[list[dict[str, Any]], list[str]]:
+    """Return the ``MiningTask`` keyword arguments and contents of a batch."""
+    columns = batch.to_pydict()
+    rows = [
+        {name: columns[name][index] for name in _TASK_FIELDS}
+        for index in range(batch.num_rows)
+    ]
+    for row in rows:
+        row["feed_id"] = UUID(row["feed_id"])
+        row["item_id"] = UUID(row["item_id"])
+        row["categories"] = row["categories"] or []
+    return rows, columns["content"]
+
+
+def trends_to_batch(trends: Sequence[Trend]) -> pa.RecordBatch:
+    return pa.RecordBatch.from_pydict(
+        {
+            "item_id": [str(t.item_id) for t in trends],
+            "feed_id": [str(t.feed_id) for t in trends],
+            "language": [t.language for t in trends],
+            "pub_date": [as_utc(t.pub_date) for t in trends],
+            "root_domain": [t.root_domain for t in trends],
+            "category_stems": [t.category_stems for t in trends],
+            "noun_stems": [t.noun_stems for t in trends],
+            "verb_stems": [t.verb_stems for t in trends],
+            "adjective_stems": [t.adjective_stems for t in trends],
+        },
+        schema=TREND_BATCH_SCHEMA,
+    )
+
+
+def trends_from_batch(batch: pa.RecordBatch) -> list[Trend]:
+    columns = batch.to_pydict()
+    return [
+        Trend(
+            item_id=UUID(columns["item_id"][index]),
+            feed_id=UUID(columns["feed_id"][index]),
+            language=columns["language"][index],
+            pub_date=columns["pub_date"][index],
+            root_domain=columns["root_domain"][index],
+            category_stems=columns["category_stems"][index] or [],
+            noun_stems=columns["noun_stems"][index] or [],
+            verb_stems=columns["verb_stems"][index] or [],
+            adjective_stems=columns["adjective_stems"][index] or [],
+        )
+        for index in range(batch.num_rows)
+    ]
+
+
+def share_batch(batch: pa.RecordBatch) -> SharedBatch:
+    """Copy ``batch`` into a new shared memory segment and return its handle.
+
+    The segment outlives this call; whoever consumes it calls ``release``.
+    """
+    sizer = pa.MockOutputStream()
+    with pa.ipc.new_stream(sizer, batch.schema) as writer:
+        writer.write_batch(batch)
+    size = sizer.size()
+
+    segment = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        _write_stream(segment, batch)
+    except BaseException:
+        segment.close()
+        segment.unlink()
+        raise
+    segment.close()
+    return SharedBatch(segment.name, size)
+
+
+def read_shared(handle: SharedBatch, convert: Callable[[pa.RecordBatch], T]) -> T:
+    """Apply ``convert`` to the batch mapped from the segment of ``handle``.
+
+    The batch only lives during ``convert``, which must return objects that
+    do not reference Arrow memory, e.g. the Python lists of ``to_pydict``.
+    """
+    segment = shared_memory.SharedMemory(name=handle.name)
+    try:
+        return _convert_stream(segment, handle.size, convert)
+    finally:
+        segment.close()
+
+
+def release(handle: SharedBatch) -> None:
+    """Free the shared memory segment behind ``handle``."""
+    try:
+        segment = shared_memory.SharedMemory(name=handle.name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    segment.unlink()
+
+
+# The two helpers below keep every Arrow view of the segment local, so that
+# all exports of its memoryview are gone once they return and it can close.
+def _write_stream(segment: shared_memory.SharedMemory, batch: pa.RecordBatch) -> None:
+    sink = pa.FixedSizeBufferWriter(pa.py_buffer(segment.buf))
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    sink.close()
+
+
+def _convert_stream(
+    segment: shared_memory.SharedMemory,
+    size: int,
+    convert: Callable[[pa.RecordBatch], T],
+) -> T:
+    buffer = pa.py_buffer(segment.buf)
+    reader = pa.ipc.open_stream(buffer.slice(0, size))
+    return convert(reader.read_next_batch())
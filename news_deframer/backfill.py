@@ -0,0 +1,160 @@
+"""Re-mining of historical items outside of the feed schedule."""
+
+from __future__ import annotations
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+import logging
+import multiprocessing
+from typing import Optional
+from uuid import UUID
+
+from news_deframer.config import BACKFILL_CHUNK_SIZE, Config
+from news_deframer.miner import Miner, MiningTask, build_task
+from news_deframer.postgres import Postgres
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class BackfillOptions:
+    since: datetime
+    until: datetime
+    feed_ids: list[UUID] = field(default_factory=list)
+    languages: list[str] = field(default_factory=list)
+    chunk_size: int = BACKFILL_CHUNK_SIZE
+    workers: int = 1
+    name: Optional[str] = None
+    restart: bool = False
+
+    @property
+    def checkpoint_name(self) -> str:
+        """Name under which the progress of this backfill is recorded."""
+        if self.name:
+            return self.name
+        feeds = ",".join(sorted(str(feed_id) for feed_id in self.feed_ids)) or "*"
+        languages = ",".join(sorted(self.languages)) or "*"
+        return (
+            f"{self.since.isoformat()}..{self.until.isoformat()}"
+            f"|feeds={feeds}|languages={languages}"
+        )
+
+
+def backfill(
+    config: Config, options: BackfillOptions, repository: Optional[Postgres] = None
+) -> int:
+    """Re-mine all items published in ``[since, until)`` and return their count.
+
+    Items are read in pub_date order, mined in chunks and checkpointed after
+    every chunk, so an interrupted run continues after the last committed item.
+    A failing chunk is retried item by item like in ``poller.poll_feed``;
+    items that still fail are skipped and handed to
+    ``repository.quarantine_item``. When every item of a chunk fails again,
+    the cause is not the items (e.g. the database is down) and the error is
+    raised before the checkpoint advances.
+    """
+
+    repo = repository or Postgres(config)
+    miner = Miner(config, repository=repo)
+    name = options.checkpoint_name
+
+    if options.restart:
+        repo.clear_backfill_checkpoint(name)
+
+    after = repo.load_backfill_checkpoint(name)
+    if after is not None:
+        logger.info("Resuming backfill %s after %s", name, after[0])
+    else:
+        logger.info("Starting backfill %s", name)
+
+    executor: Optional[Executor] = None
+    if options.workers > 1:
+        # Spawned workers do not inherit the parent's database connection.
+        executor = ProcessPoolExecutor(
+            max_workers=options.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    mined = 0
+    failed = 0
+    try:
+        while True:
+            pairs = repo.fetch_backfill_items(
+                options.since,
+                options.until,
+                options.chunk_size,
+                after=after,
+                feed_ids=options.feed_ids,
+                languages=options.languages,
+            )
+            if not pairs:
+                break
+
+            tasks: list[MiningTask] = []
+            for feed, item in pairs:
+                try:
+                    tasks.append(build_task(feed, item))
+                except Exception as exc:
+                    failed += 1
+                    _skip_item(repo, item.id, item.feed_id, exc)
+
+            chunk_mined = _mine_chunk(miner, repo, tasks, executor)
+            mined += chunk_mined
+            failed += len(tasks) - chunk_mined
+
+            last = pairs[-1][1]
+            after = (last.pub_date, last.id)
+            repo.save_backfill_checkpoint(name, last.pub_date, last.id)
+            logger.info(
+                "Backfill %s mined %s items (through %s)", name, mined, last.pub_date
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    logger.info("Backfill %s complete; mined %s items, skipped %s", name, mined, failed)
+    return mined
+
+
+def _mine_chunk(
+    miner: Miner,
+    repo: Postgres,
+    tasks: list[MiningTask],
+    executor: Optional[Executor],
+) -> int:
+    try:
+        miner.mine_items(tasks, executor=executor)
+        return len(tasks)
+    except Exception as exc:
+        if len(tasks) <= 1:
+            if tasks:
+                _skip_item(repo, tasks[0].item_id, tasks[0].feed_id, exc)
+            return 0
+        logger.warning(
+            "Failed to backfill item chunk; retrying items one by one", exc_info=exc
+        )
+        chunk_error = exc
+
+    mined = 0
+    failures: list[tuple[MiningTask, Exception]] = []
+    for task in tasks:
+        try:
+            miner.mine_items([task])
+            mined += 1
+        except Exception as item_exc:
+            failures.append((task, item_exc))
+    if not mined:
+        raise chunk_error
+    for task, error in failures:
+        _skip_item(repo, task.item_id, task.feed_id, error)
+    return mined
+
+
+def _skip_item(repo: Postgres, item_id: UUID, feed_id: UUID, exc: Exception) -> None:
+    logger.error(
+        "Skipping item that failed to backfill",
+        extra={"item_id": str(item_id)},
+        exc_info=exc,
+    )
+    repo.quarantine_item(item_id, feed_id, repr(exc))
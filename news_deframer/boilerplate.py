@@ -0,0 +1,170 @@
+"""Detection and removal of per-feed boilerplate such as trailers and credits."""
+
+from __future__ import annotations
+
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+import re
+from uuid import UUID
+
+from news_deframer.config import (
+    BOILERPLATE_FEED_CACHE_SIZE,
+    BOILERPLATE_MIN_ITEMS,
+    BOILERPLATE_MIN_SHARE,
+    BOILERPLATE_WINDOW,
+)
+
+# Separators between segments: line breaks and sentence ends. The capture
+# group keeps them in ``re.split`` results so the text can be reassembled.
+_SEGMENT_BREAK = re.compile(r"(\n+|(?<=[.!?])\s+)")
+
+# Trailers that are boilerplate wherever they appear, matched against the
+# normalized (lowercased, whitespace-collapsed) segment.
+BUILTIN_PATTERNS = tuple(
+    re.compile(pattern)
+    for pattern in (
+        r"the post .+ appeared first on .+",
+        r"(copyright )?(copyright|©|\(c\)) ?\d{4}.*",
+        r".*all rights reserved\W*",
+    )
+)
+
+# Link trailers, only boilerplate where they end a paragraph or the content:
+# "read more" inside running text is left alone.
+TRAILER_PATTERNS = tuple(
+    re.compile(pattern)
+    for pattern in (
+        r"(read more|continue reading|weiterlesen|mehr lesen|lire la suite"
+        r"|leggi tutto|leer más)(\s+(here|at|on|auf|sur|su|en)\b.{0,40})?\W*",
+    )
+)
+
+
+@dataclass
+class _FeedSegments:
+    # item id -> normalized segments of that item, oldest first
+    window: OrderedDict[UUID, frozenset[str]] = field(default_factory=OrderedDict)
+    counts: Counter[str] = field(default_factory=Counter)
+
+
+def normalize_segment(segment: str) -> str:
+    return " ".join(segment.lower().split())
+
+
+def split_segments(content: str) -> list[str]:
+    """Return the non-blank lines and sentences of ``content``."""
+    return [
+        part.strip()
+        for part in _SEGMENT_BREAK.split(content)[::2]
+        if part and part.strip()
+    ]
+
+
+class BoilerplateLearner:
+    """Learns which text segments a feed repeats across its recent items.
+
+    For every feed the normalized segments of the last ``window`` observed
+    items are kept. A segment found in at least ``min_share`` of them, once
+    ``min_items`` items were seen, is treated as boilerplate of that feed;
+    ``BUILTIN_PATTERNS`` are boilerplate for every feed, and so are
+    ``TRAILER_PATTERNS`` at the end of a paragraph. State is kept for at
+    most ``max_feeds`` feeds, least recently used first out.
+    """
+
+    def __init__(
+        self,
+        window: int = BOILERPLATE_WINDOW,
+        min_items: int = BOILERPLATE_MIN_ITEMS,
+        min_share: float = BOILERPLATE_MIN_SHARE,
+        max_feeds: int = BOILERPLATE_FEED_CACHE_SIZE,
+    ) -> None:
+        self.window = max(int(window), 1)
+        self.min_items = max(int(min_items), 1)
+        self.min_share = min_share
+        self.max_feeds = max(int(max_feeds), 1)
+        self._feeds: OrderedDict[UUID, _FeedSegments] = OrderedDict()
+
+    def observe(self, feed_id: UUID, item_id: UUID, content: str) -> None:
+        """Add the segments of an item to the feed's window.
+
+        Items already in the window are ignored, so re-mining an item does not
+        count its segments twice.
+        """
+        state = self._feeds.get(feed_id)
+        if state is None:
+            state = self._feeds[feed_id] = _FeedSegments()
+            while len(self._feeds) > self.max_feeds:
+                self._feeds.popitem(last=False)
+        self._feeds.move_to_end(feed_id)
+
+        if item_id in state.window:
+            return
+        segments = frozenset(
+            normalize_segment(segment) for segment in split_segments(content)
+        )
+        state.window[item_id] = segments
+        state.counts.update(segments)
+        while len(state.window) > self.window:
+            _, expired = state.window.popitem(last=False)
+            state.counts.subtract(expired)
+            for segment in expired:
+                if state.counts[segment] <= 0:
+                    del state.counts[segment]
+
+    def boilerplate(self, feed_id: UUID) -> set[str]:
+        """Return the normalized segments currently learned for a feed."""
+        state = self._feeds.get(feed_id)
+        if state is None or len(state.window) < self.min_items:
+            return set()
+        threshold = max(self.min_share * len(state.window), 2)
+        return {
+            segment for segment, count in state.counts.items() if count >= threshold
+        }
+
+    def strip(self, feed_id: UUID, content: str) -> str:
+        """Remove boilerplate segments from ``content``.
+
+        Content that consists of boilerplate only is returned unchanged.
+        """
+        learned = self.boilerplate(feed_id)
+        parts = _SEGMENT_BREAK.split(content)
+        kept: list[str] = []
+        removed = False
+        for index in range(0, len(parts), 2):
+            segment = parts[index]
+            separator = parts[index + 1] if index + 1 < len(parts) else ""
+            if segment.strip() and _is_boilerplate(
+                normalize_segment(segment), learned, _ends_paragraph(parts, index)
+            ):
+                removed = True
+                # Keep the stronger separator, so that removing a paragraph's
+                # last sentence does not merge it with the next paragraph.
+                if kept and separator.count("\n") > kept[-1].count("\n"):
+                    kept[-1] = separator
+                continue
+            kept.append(segment)
+            if separator:
+                kept.append(separator)
+
+        if not removed:
+            return content
+        stripped = "".join(kept).strip()
+        return stripped or content
+
+
+def _is_boilerplate(segment: str, learned: set[str], ends_paragraph: bool) -> bool:
+    if segment in learned:
+        return True
+    if ends_paragraph and any(p.fullmatch(segment) for p in TRAILER_PATTERNS):
+        return True
+    return any(pattern.fullmatch(segment) for pattern in BUILTIN_PATTERNS)
+
+
+def _ends_paragraph(parts: list[str], index: int) -> bool:
+    # ``parts`` alternates segments and separators (see _SEGMENT_BREAK).
+    for position in range(index + 1, len(parts), 2):
+        if "\n" in parts[position]:
+            return True
+        if position + 1 < len(parts) and parts[position + 1].strip():
+            return False
+    return True
@@ -3,27 +3,328 @@
 from __future__ import annotations
 
 import argparse
+from datetime import datetime, timezone
 import logging
+import os
+from pathlib import Path
+import sys
 from typing import Optional, Sequence
+from uuid import UUID
 
+from news_deframer import backfill as backfill_module
+from news_deframer import export as export_module
+from news_deframer import mine_file as mine_file_module
+from news_deframer import nlp as nlp_module
 from news_deframer import poller as poller_module
-from news_deframer.config import Config
-from news_deframer.logger import configure_logging
+from news_deframer import rederive as rederive_module
+from news_deframer.postgres import Postgres
+from news_deframer.config import (
+    BACKFILL_CHUNK_SIZE,
+    EXPORT_BATCH_SIZE,
+    LOG_RATE_INTERVAL,
+    NLP_BATCH_SIZE,
+    POLLING_INTERVAL,
+    RECYCLE_EXIT_CODE,
+    RECYCLE_MODE_EXEC,
+    TREND_RETENTION_DETACH,
+    TREND_RETENTION_DROP,
+    Config,
+)
+from news_deframer.logger import configure_logging, shutdown_logging
+from news_deframer.spacy_models import SPACY_LANGUAGE_MODELS
 
 logger = logging.getLogger(__name__)
 
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser(prog="miner", description="News Deframer Miner")
-    parser.parse_args(argv)
+    subparsers = parser.add_subparsers(dest="command")
+
+    backfill_parser = subparsers.add_parser(
+        "backfill", help="Re-mine items published within a date range"
+    )
+    backfill_parser.add_argument(
+        "--since", required=True, type=_parse_timestamp, help="Inclusive start"
+    )
+    backfill_parser.add_argument(
+        "--until", required=True, type=_parse_timestamp, help="Exclusive end"
+    )
+    backfill_parser.add_argument(
+        "--feeds", nargs="+", type=UUID, default=[], help="Restrict to feed ids"
+    )
+    backfill_parser.add_argument(
+        "--languages", nargs="+", default=[], help="Restrict to language codes"
+    )
+    backfill_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=BACKFILL_CHUNK_SIZE,
+        help="Items read and checkpointed per round trip",
+    )
+    backfill_parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of NLP worker processes",
+    )
+    backfill_parser.add_argument(
+        "--name", help="Checkpoint name (derived from the arguments by default)"
+    )
+    backfill_parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore a stored checkpoint and start from --since",
+    )
+
+    export_parser = subparsers.add_parser(
+        "export", help="Export trends into partitioned Parquet files"
+    )
+    export_parser.add_argument(
+        "--output", required=True, type=Path, help="Target directory"
+    )
+    export_parser.add_argument(
+        "--until", type=_parse_timestamp, help="Exclusive pub_date upper bound"
+    )
+    export_parser.add_argument(
+        "--languages", nargs="+", default=[], help="Restrict to language codes"
+    )
+    export_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=EXPORT_BATCH_SIZE,
+        help="Rows fetched and buffered per partition",
+    )
+    export_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the stored watermark and export every trend",
+    )
+
+    mine_file_parser = subparsers.add_parser(
+        "mine-file", help="Mine items from a JSONL or Parquet file without a database"
+    )
+    mine_file_parser.add_argument(
+        "--input", required=True, type=Path, help="Items as .jsonl or .parquet"
+    )
+    mine_file_parser.add_argument(
+        "--output", required=True, type=Path, help="Trends as .jsonl or .parquet"
+    )
+    mine_file_parser.add_argument(
+        "--language", default="en", help="Language of items that carry none"
+    )
+    mine_file_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=NLP_BATCH_SIZE,
+        help="Items mined together per worker task",
+    )
+    mine_file_parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of NLP worker processes",
+    )
+
+    rederive_parser = subparsers.add_parser(
+        "rederive", help="Recompute trend stems from cached spaCy annotations"
+    )
+    rederive_parser.add_argument(
+        "--since", type=_parse_timestamp, help="Inclusive pub_date lower bound"
+    )
+    rederive_parser.add_argument(
+        "--until", type=_parse_timestamp, help="Exclusive pub_date upper bound"
+    )
+    rederive_parser.add_argument(
+        "--languages", nargs="+", default=[], help="Restrict to language codes"
+    )
+    rederive_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=EXPORT_BATCH_SIZE,
+        help="Trends read and upserted per round trip",
+    )
+
+    snapshot_parser = subparsers.add_parser(
+        "snapshot", help="Serialize spaCy pipelines for faster worker starts"
+    )
+    snapshot_parser.add_argument(
+        "--output",
+        type=Path,
+        default=os.environ.get("SPACY_SNAPSHOT_DIR"),
+        help="Snapshot directory (defaults to SPACY_SNAPSHOT_DIR)",
+    )
+    snapshot_parser.add_argument(
+        "--languages",
+        nargs="+",
+        default=os.environ.get("SPACY_MODELS", "en").split(),
+        choices=sorted(SPACY_LANGUAGE_MODELS),
+        help="Languages to snapshot (defaults to SPACY_MODELS)",
+    )
+
+    partitions_parser = subparsers.add_parser(
+        "partitions", help="Create upcoming monthly trends partitions"
+    )
+    partitions_parser.add_argument(
+        "--months-ahead",
+        type=int,
+        help="Months beyond the current one (defaults to TREND_PARTITIONS_AHEAD)",
+    )
+    partitions_parser.add_argument(
+        "--since",
+        type=_parse_timestamp,
+        help="Also create the months from this timestamp on",
+    )
+
+    retention_parser = subparsers.add_parser(
+        "retention", help="Detach or drop expired trends partitions"
+    )
+    retention_parser.add_argument(
+        "--days", type=int, help="Retention horizon (defaults to TREND_RETENTION_DAYS)"
+    )
+    retention_parser.add_argument(
+        "--mode",
+        choices=(TREND_RETENTION_DETACH, TREND_RETENTION_DROP),
+        help="What to do with expired partitions (defaults to TREND_RETENTION_MODE)",
+    )
+
+    rebalance_parser = subparsers.add_parser(
+        "rebalance-schedules",
+        help="Spread the due times of scheduled feeds over their slots",
+    )
+    rebalance_parser.add_argument(
+        "--interval",
+        type=int,
+        default=POLLING_INTERVAL,
+        help="Polling interval the slots divide (adaptive intervals take precedence)",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "snapshot" and args.output is None:
+        parser.error("snapshot requires --output or SPACY_SNAPSHOT_DIR")
 
     config = Config.load()
-    configure_logging(config.log_level)
-    logger.debug("Starting mining poller")
+    configure_logging(
+        config.log_level,
+        log_format=config.log_format,
+        async_logging=config.log_async,
+        rate_limit=config.log_rate_limit,
+        rate_limit_interval=LOG_RATE_INTERVAL,
+    )
 
-    poller_module.poll(config)
+    if args.command == "backfill":
+        logger.debug("Starting backfill")
+        backfill_module.backfill(
+            config,
+            backfill_module.BackfillOptions(
+                since=args.since,
+                until=args.until,
+                feed_ids=args.feeds,
+                languages=args.languages,
+                chunk_size=args.chunk_size,
+                workers=args.workers,
+                name=args.name,
+                restart=args.restart,
+            ),
+        )
+        return 0
+
+    if args.command == "export":
+        logger.debug("Starting trend export")
+        export_module.export_trends(
+            config,
+            export_module.ExportOptions(
+                output=args.output,
+                until=args.until,
+                languages=args.languages,
+                batch_size=args.batch_size,
+                full=args.full,
+            ),
+        )
+        return 0
+
+    if args.command == "mine-file":
+        mine_file_module.mine_file(
+            config,
+            mine_file_module.MineFileOptions(
+                input=args.input,
+                output=args.output,
+                language=args.language,
+                batch_size=args.batch_size,
+                workers=args.workers,
+            ),
+        )
+        return 0
+
+    if args.command == "rederive":
+        if not config.doc_cache_path:
+            logger.error("rederive requires DOC_CACHE_PATH")
+            return 1
+        rederive_module.rederive(
+            config,
+            rederive_module.RederiveOptions(
+                since=args.since,
+                until=args.until,
+                languages=args.languages,
+                batch_size=args.batch_size,
+            ),
+        )
+        return 0
+
+    if args.command == "snapshot":
+        for language in args.languages:
+            path = nlp_module.save_snapshot(language, args.output)
+            logger.info("Saved %s pipeline snapshot to %s", language, path)
+        return 0
+
+    if args.command in ("partitions", "retention"):
+        if not config.trends_partitioned:
+            logger.error("%s requires TRENDS_PARTITIONED=true", args.command)
+            return 1
+        repository = Postgres(config)
+        if args.command == "partitions":
+            months_ahead = args.months_ahead
+            if months_ahead is None:
+                months_ahead = config.trend_partitions_ahead
+            names = repository.ensure_trend_partitions(months_ahead, since=args.since)
+            logger.info("Trend partitions present: %s", ", ".join(names))
+            return 0
+        days = args.days if args.days is not None else config.trend_retention_days
+        mode = args.mode or config.trend_retention_mode
+        expired = repository.expire_trend_partitions(days, mode)
+        logger.info(
+            "Expired %s trend partitions (%s): %s",
+            len(expired),
+            mode,
+            ", ".join(expired) or "none",
+        )
+        return 0
+
+    if args.command == "rebalance-schedules":
+        moved = Postgres(config).rebalance_schedules(args.interval)
+        logger.info("Rebalanced the schedules of %s feeds", moved)
+        return 0
+
+    logger.debug("Starting mining poller")
+    if poller_module.poll(config):
+        if config.recycle_mode == RECYCLE_MODE_EXEC:
+            logger.info("Re-executing worker")
+            shutdown_logging()
+            logging.shutdown()
+            # orig_argv keeps interpreter options such as ``-m``.
+            os.execv(sys.executable, sys.orig_argv)
+        return RECYCLE_EXIT_CODE
     return 0
 
 
+def _parse_timestamp(value: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"invalid ISO timestamp: {value!r}") from exc
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
 if __name__ == "__main__":  # pragma: no cover
     raise SystemExit(main())
@@ -1,17 +1,139 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from dotenv import load_dotenv
 
+from news_deframer.logger import LOG_FORMAT_JSON, LOG_FORMAT_TEXT
+
 # PollingInterval defines how often a single feed is data mined
 # If a feed was synced at T, it will be eligible again at T + PollingInterval.
 POLLING_INTERVAL = 600  # 10 minutes
 
+# Bounds of the per-feed polling interval when adaptive polling is enabled.
+POLLING_INTERVAL_MIN = 60  # 1 minute
+POLLING_INTERVAL_MAX = 6 * 60 * 60  # 6 hours
+
+# PollingTargetYield is the number of pending items an adaptive schedule aims
+# to find per claim of a busy feed.
+POLLING_TARGET_YIELD = 20
+
+# SchedulingMode selects how due feeds are ordered: "fifo" by due time,
+# "priority" by backlog size and age of the oldest unmined item.
+SCHEDULING_MODE_FIFO = "fifo"
+SCHEDULING_MODE_PRIORITY = "priority"
+
+# Priority score = ln(1 + backlog) * PriorityBacklogWeight
+#                + age of the oldest unmined item / PriorityAgeScale
+PRIORITY_BACKLOG_WEIGHT = 1.0
+PRIORITY_AGE_SCALE = 60 * 60  # one point per hour
+
+# PriorityStarvationTime defines how long a due feed may be passed over by
+# higher priority feeds before it is served ahead of them.
+PRIORITY_STARVATION_TIME = 15 * 60  # 15 minutes
+
 # IdleSleepTime defines how long the worker sleeps when no feeds are due for mining.
 IDLE_SLEEP_TIME = 10  # 10 seconds
 
-# Default lock duration for a miner poll
-DEFAULT_LOCK_DURATION = 5 * 60  # 5 minutes
+# Default lock duration for a miner poll. The lock is renewed by a heartbeat
+# every LockHeartbeatInterval while mining makes progress, so a crashed
+# worker's feed becomes claimable again within seconds.
+DEFAULT_LOCK_DURATION = 30  # 30 seconds
+LOCK_HEARTBEAT_INTERVAL = DEFAULT_LOCK_DURATION / 3
+
+# LockIdleTimeout is how long the heartbeat keeps renewing a lock without
+# mining progress. It must exceed the worst-case time of one chunk (long
+# articles, a cold model, the per-item retry of a failed chunk).
+LOCK_IDLE_TIMEOUT = 10 * 60  # 10 minutes
+
+# ShutdownTimeout bounds how long a worker may take after SIGTERM to finish
+# its current chunk and release its feed before it is interrupted.
+SHUTDOWN_TIMEOUT = 20  # 20 seconds
+
+# RecycleMode selects how a worker whose memory watchdog fired is replaced:
+# "exec" re-executes the process in place, "exit" exits with RecycleExitCode
+# and leaves the restart to the supervisor.
+RECYCLE_MODE_EXEC = "exec"
+RECYCLE_MODE_EXIT = "exit"
+RECYCLE_EXIT_CODE = 75  # EX_TEMPFAIL
+
+# MiningChunkSize defines how many items of a feed are mined and committed
+# together; a crash only loses the chunk in progress.
+MINING_CHUNK_SIZE = 50
+
+# MiningBudgetItems and MiningBudgetSeconds bound the work done per feed claim
+# (0 disables a bound). A feed whose claim ran out of budget is rescheduled
+# after BacklogRescheduleDelay instead of PollingInterval, so large backlogs
+# are worked off in turns with the other due feeds.
+MINING_BUDGET_ITEMS = 500
+MINING_BUDGET_SECONDS = 2 * 60  # 2 minutes
+BACKLOG_RESCHEDULE_DELAY = 5  # 5 seconds
+
+# QuarantineRetryDelay is the delay before a failed item is mined again; it
+# doubles with every further failure up to QuarantineMaxRetryDelay.
+QUARANTINE_RETRY_DELAY = 10 * 60  # 10 minutes
+QUARANTINE_MAX_RETRY_DELAY = 24 * 60 * 60  # 1 day
+
+# NlpBatchSize defines how many texts are handed to spaCy's nlp.pipe at once.
+NLP_BATCH_SIZE = 64
+
+# MaxContentChars bounds the text handed to spaCy as one document. Longer
+# item content is split at paragraph or sentence boundaries and its pieces
+# are mined as a batch.
+MAX_CONTENT_CHARS = 5_000
+
+# Boilerplate learning: a segment (line or sentence) found in at least
+# BoilerplateMinShare of a feed's last BoilerplateWindow items is stripped
+# before NLP, once BoilerplateMinItems items of the feed were seen. State is
+# kept for BoilerplateFeedCacheSize feeds.
+BOILERPLATE_WINDOW = 50
+BOILERPLATE_MIN_ITEMS = 5
+BOILERPLATE_MIN_SHARE = 0.5
+BOILERPLATE_FEED_CACHE_SIZE = 10_000
+
+# BackfillChunkSize defines how many items a backfill reads, mines and
+# checkpoints per round trip.
+BACKFILL_CHUNK_SIZE = 512
+
+# ExportBatchSize defines how many trend rows an export fetches from the
+# server-side cursor and buffers per Parquet partition before writing.
+EXPORT_BATCH_SIZE = 10_000
+
+
+# StemStorage selects how trend stems are stored: "text" keeps the text[]
+# columns, "dictionary" stores ids into the stems table in *_stem_ids columns.
+STEM_STORAGE_TEXT = "text"
+STEM_STORAGE_DICTIONARY = "dictionary"
+
+# StemCacheSize bounds the number of stems interned in-process.
+STEM_CACHE_SIZE = 1_000_000
+
+# ContentCacheSize bounds the in-process LRU of content hashes to stems.
+CONTENT_CACHE_SIZE = 50_000
+
+# DocCacheMaxMb bounds the spaCy annotations kept in DOC_CACHE_PATH; the
+# least recently used documents are evicted beyond it.
+DOC_CACHE_MAX_MB = 1024
+
+# LogRateInterval is the window in which LOG_RATE_LIMIT identical messages
+# below WARNING are let through.
+LOG_RATE_INTERVAL = 60  # 1 minute
+
+# RollupBucketSeconds defines the pub_date granularity of trend_rollups.
+ROLLUP_BUCKET_SECONDS = 60 * 60  # 1 hour
+
+# ScheduleSlots defines into how many phases SCHEDULE_SLOTTING divides each
+# polling interval; every feed is pinned to one of them by its id.
+SCHEDULE_SLOTS = 60
+
+# TrendPartitionsAhead defines how many monthly trends partitions beyond the
+# current month `miner-cli partitions` creates when TRENDS_PARTITIONED=true.
+TREND_PARTITIONS_AHEAD = 3
+
+# TrendRetentionMode selects what `miner-cli retention` does with partitions
+# older than TREND_RETENTION_DAYS: "detach" keeps them as standalone tables,
+# "drop" deletes them.
+TREND_RETENTION_DETACH = "detach"
+TREND_RETENTION_DROP = "drop"
 
 
 @dataclass
@@ -19,6 +141,44 @@ class Config:
     dsn: str
     log_level: str
     log_database: bool
+    log_format: str = LOG_FORMAT_TEXT
+    log_async: bool = False
+    log_rate_limit: int = 0
+    trend_rollups: bool = False
+    rollup_bucket_seconds: int = ROLLUP_BUCKET_SECONDS
+    trends_partitioned: bool = False
+    trend_partitions_ahead: int = TREND_PARTITIONS_AHEAD
+    trend_retention_days: int = 0
+    trend_retention_mode: str = TREND_RETENTION_DETACH
+    stem_storage: str = STEM_STORAGE_TEXT
+    content_dedup: bool = False
+    content_cache_size: int = CONTENT_CACHE_SIZE
+    max_content_chars: int = MAX_CONTENT_CHARS
+    arrow_ipc: bool = False
+    doc_cache_path: str = ""
+    doc_cache_max_mb: int = DOC_CACHE_MAX_MB
+    boilerplate_stripping: bool = False
+    adaptive_polling: bool = False
+    polling_interval_min: int = POLLING_INTERVAL_MIN
+    polling_interval_max: int = POLLING_INTERVAL_MAX
+    polling_target_yield: int = POLLING_TARGET_YIELD
+    scheduling_mode: str = SCHEDULING_MODE_FIFO
+    schedule_slotting: bool = False
+    schedule_slots: int = SCHEDULE_SLOTS
+    priority_starvation_seconds: int = PRIORITY_STARVATION_TIME
+    mining_budget_items: int = MINING_BUDGET_ITEMS
+    mining_budget_seconds: int = MINING_BUDGET_SECONDS
+    shutdown_timeout: int = SHUTDOWN_TIMEOUT
+    lock_idle_timeout: int = LOCK_IDLE_TIMEOUT
+    worker_languages: list[str] = field(default_factory=list)
+    max_rss_mb: int = 0
+    max_items_per_process: int = 0
+    tracemalloc_top: int = 0
+    recycle_mode: str = RECYCLE_MODE_EXEC
+    language_spillover: bool = True
+    item_quarantine: bool = False
+    quarantine_retry_seconds: int = QUARANTINE_RETRY_DELAY
+    quarantine_max_retry_seconds: int = QUARANTINE_MAX_RETRY_DELAY
 
     @classmethod
     def load(cls) -> "Config":
@@ -35,5 +195,104 @@ class Config:
             # The DSN string from your env.example is compatible with psycopg2 directly.
             dsn=os.getenv("DSN", ""),
             log_level=os.getenv("LOG_LEVEL", "INFO"),
-            log_database=os.getenv("LOG_DATABASE", "false").lower() == "true",
+            log_database=_env_bool("LOG_DATABASE", False),
+            log_format=_env_choice(
+                "LOG_FORMAT", LOG_FORMAT_TEXT, (LOG_FORMAT_TEXT, LOG_FORMAT_JSON)
+            ),
+            log_async=_env_bool("LOG_ASYNC", False),
+            log_rate_limit=_env_int("LOG_RATE_LIMIT", 0),
+            trend_rollups=_env_bool("TREND_ROLLUPS", False),
+            rollup_bucket_seconds=_env_int(
+                "ROLLUP_BUCKET_SECONDS", ROLLUP_BUCKET_SECONDS
+            ),
+            trends_partitioned=_env_bool("TRENDS_PARTITIONED", False),
+            trend_partitions_ahead=_env_int(
+                "TREND_PARTITIONS_AHEAD", TREND_PARTITIONS_AHEAD
+            ),
+            trend_retention_days=_env_int("TREND_RETENTION_DAYS", 0),
+            trend_retention_mode=_env_choice(
+                "TREND_RETENTION_MODE",
+                TREND_RETENTION_DETACH,
+                (TREND_RETENTION_DETACH, TREND_RETENTION_DROP),
+            ),
+            stem_storage=_env_choice(
+                "STEM_STORAGE",
+                STEM_STORAGE_TEXT,
+                (STEM_STORAGE_TEXT, STEM_STORAGE_DICTIONARY),
+            ),
+            content_dedup=_env_bool("CONTENT_DEDUP", False),
+            content_cache_size=_env_int("CONTENT_CACHE_SIZE", CONTENT_CACHE_SIZE),
+            max_content_chars=_env_int("MAX_CONTENT_CHARS", MAX_CONTENT_CHARS),
+            arrow_ipc=_env_bool("ARROW_IPC", False),
+            doc_cache_path=os.getenv("DOC_CACHE_PATH", ""),
+            doc_cache_max_mb=_env_int("DOC_CACHE_MAX_MB", DOC_CACHE_MAX_MB),
+            boilerplate_stripping=_env_bool("BOILERPLATE_STRIPPING", False),
+            adaptive_polling=_env_bool("ADAPTIVE_POLLING", False),
+            polling_interval_min=_env_int("POLLING_INTERVAL_MIN", POLLING_INTERVAL_MIN),
+            polling_interval_max=_env_int("POLLING_INTERVAL_MAX", POLLING_INTERVAL_MAX),
+            polling_target_yield=_env_int("POLLING_TARGET_YIELD", POLLING_TARGET_YIELD),
+            scheduling_mode=_env_choice(
+                "SCHEDULING_MODE",
+                SCHEDULING_MODE_FIFO,
+                (SCHEDULING_MODE_FIFO, SCHEDULING_MODE_PRIORITY),
+            ),
+            schedule_slotting=_env_bool("SCHEDULE_SLOTTING", False),
+            schedule_slots=_env_int("SCHEDULE_SLOTS", SCHEDULE_SLOTS),
+            priority_starvation_seconds=_env_int(
+                "PRIORITY_STARVATION_TIME", PRIORITY_STARVATION_TIME
+            ),
+            mining_budget_items=_env_int("MINING_BUDGET_ITEMS", MINING_BUDGET_ITEMS),
+            mining_budget_seconds=_env_int(
+                "MINING_BUDGET_SECONDS", MINING_BUDGET_SECONDS
+            ),
+            shutdown_timeout=_env_int("SHUTDOWN_TIMEOUT", SHUTDOWN_TIMEOUT),
+            lock_idle_timeout=_env_int("LOCK_IDLE_TIMEOUT", LOCK_IDLE_TIMEOUT),
+            worker_languages=_env_list("WORKER_LANGUAGES"),
+            language_spillover=_env_bool("LANGUAGE_SPILLOVER", True),
+            max_rss_mb=_env_int("MAX_RSS_MB", 0),
+            max_items_per_process=_env_int("MAX_ITEMS_PER_PROCESS", 0),
+            tracemalloc_top=_env_int("TRACEMALLOC_TOP", 0),
+            recycle_mode=_env_choice(
+                "RECYCLE_MODE",
+                RECYCLE_MODE_EXEC,
+                (RECYCLE_MODE_EXEC, RECYCLE_MODE_EXIT),
+            ),
+            item_quarantine=_env_bool("ITEM_QUARANTINE", False),
+            quarantine_retry_seconds=_env_int(
+                "QUARANTINE_RETRY_DELAY", QUARANTINE_RETRY_DELAY
+            ),
+            quarantine_max_retry_seconds=_env_int(
+                "QUARANTINE_MAX_RETRY_DELAY", QUARANTINE_MAX_RETRY_DELAY
+            ),
         )
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() == "true"
+
+
+def _env_choice(name: str, default: str, choices: tuple[str, ...]) -> str:
+    value = (os.getenv(name) or "").strip().lower()
+    if not value:
+        return default
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(choices)}, got {value!r}")
+    return value
+
+
+def _env_list(name: str) -> list[str]:
+    # Example ENV: WORKER_LANGUAGES="en de"
+    return [value.lower() for value in (os.getenv(name) or "").split()]
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from exc
@@ -0,0 +1,228 @@
+"""Size-bounded store of spaCy annotations for re-deriving stems."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Iterable, Optional, Sequence
+from uuid import UUID
+
+from news_deframer.config import Config
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_key TEXT PRIMARY KEY,
+    language TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS docs_last_used_idx ON docs (last_used);
+
+CREATE TABLE IF NOT EXISTS item_docs (
+    item_id TEXT PRIMARY KEY,
+    doc_key TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS item_docs_doc_key_idx ON item_docs (doc_key);
+
+-- Running total of docs.size, so stores do not scan the table to evict.
+CREATE TABLE IF NOT EXISTS doc_cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total INTEGER NOT NULL
+);
+
+INSERT INTO doc_cache_size (id, total)
+SELECT 1, (SELECT COALESCE(SUM(size), 0) FROM docs)
+WHERE NOT EXISTS (SELECT 1 FROM doc_cache_size);
+
+CREATE TRIGGER IF NOT EXISTS docs_size_insert AFTER INSERT ON docs
+BEGIN
+    UPDATE doc_cache_size SET total = total + NEW.size;
+END;
+
+CREATE TRIGGER IF NOT EXISTS docs_size_update AFTER UPDATE OF size ON docs
+BEGIN
+    UPDATE doc_cache_size SET total = total + NEW.size - OLD.size;
+END;
+
+CREATE TRIGGER IF NOT EXISTS docs_size_delete AFTER DELETE ON docs
+BEGIN
+    UPDATE doc_cache_size SET total = total - OLD.size;
+END;
+"""
+
+# Least recently used documents read per eviction query.
+_EVICTION_CHUNK = 256
+
+
+def document_key(content: str, language: str) -> str:
+    """Return the key of the annotations of ``content``.
+
+    Case and whitespace are normalized, so syndicated copies share one entry.
+    Unlike ``nlp.content_hash``, which is derived from it, the key does not
+    depend on the model and stem rule versions.
+    """
+    normalized = " ".join(content.lower().split())
+    return hashlib.sha256(f"{language}\x1f{normalized}".encode("utf-8")).hexdigest()
+
+
+def open_doc_cache(config: Config) -> Optional[DocCache]:
+    """Return the document cache configured by ``doc_cache_path``, if any."""
+    if not config.doc_cache_path:
+        return None
+    return DocCache(config.doc_cache_path, config.doc_cache_max_mb * 1024 * 1024)
+
+
+class DocCache:
+    """Serialized ``DocBin`` annotations in a SQLite file.
+
+    Annotations are stored once per ``document_key`` together with the model
+    version that produced them; items point at the key of their content.
+    Only the token attributes of ``nlp.DOC_ATTRS`` are kept, no entities.
+    When the stored annotations exceed ``max_bytes``, the least recently used
+    are evicted along with the item links to them. The cache can be pickled
+    into worker processes, which reopen the file.
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max(int(max_bytes), 0)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"path": self.path, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(state["path"], state["max_bytes"])  # type: ignore[misc]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def store(self, entries: Sequence[tuple[str, str, str, bytes]]) -> None:
+        """Store ``(doc_key, language, model_version, data)`` entries."""
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                # An upsert rather than INSERT OR REPLACE, whose implicit
+                # delete would bypass the size triggers.
+                conn.executemany(
+                    """
+                    INSERT INTO docs (
+                        doc_key, language, model_version, data, size, last_used
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (doc_key) DO UPDATE SET
+                        language = excluded.language,
+                        model_version = excluded.model_version,
+                        data = excluded.data,
+                        size = excluded.size,
+                        last_used = excluded.last_used
+                    """,
+                    [
+                        (key, language, version, data, len(data), now)
+                        for key, language, version, data in entries
+                    ],
+                )
+                self._evict(conn)
+
+    def link(self, items: Iterable[tuple[UUID, str]]) -> None:
+        """Record the document key of each ``(item_id, doc_key)``.
+
+        Keys without stored annotations, e.g. of texts that were not parsed or
+        were evicted already, are not linked, and earlier links of their items
+        are dropped.
+        """
+        rows = [(str(item_id), key) for item_id, key in items]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "DELETE FROM item_docs WHERE item_id = ?",
+                    [(item_id,) for item_id, _ in rows],
+                )
+                conn.executemany(
+                    """
+                    INSERT INTO item_docs (item_id, doc_key)
+                    SELECT ?, doc_key FROM docs WHERE doc_key = ?
+                    """,
+                    rows,
+                )
+
+    def lookup(
+        self, item_ids: Sequence[UUID]
+    ) -> dict[UUID, tuple[str, str, str, bytes]]:
+        """Return ``(doc_key, language, model_version, data)`` of the given items."""
+        if not item_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in item_ids)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                rows = conn.execute(
+                    f"""
+                    SELECT i.item_id, d.doc_key, d.language, d.model_version, d.data
+                    FROM item_docs AS i
+                    JOIN docs AS d ON d.doc_key = i.doc_key
+                    WHERE i.item_id IN ({placeholders})
+                    """,
+                    [str(item_id) for item_id in item_ids],
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE docs SET last_used = ? WHERE doc_key = ?",
+                    [(time.time(), row[1]) for row in rows],
+                )
+        return {UUID(row[0]): (row[1], row[2], row[3], row[4]) for row in rows}
+
+    def size(self) -> int:
+        """Return the number of bytes of stored annotations."""
+        with self._lock:
+            row = self._connect().execute("SELECT total FROM doc_cache_size").fetchone()
+        return int(row[0])
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # Several worker processes may write to the same file.
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        if not self.max_bytes:
+            return
+        (total,) = conn.execute("SELECT total FROM doc_cache_size").fetchone()
+        evicted: list[str] = []
+        while total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT doc_key, size FROM docs ORDER BY last_used, doc_key LIMIT ?",
+                (_EVICTION_CHUNK,),
+            ).fetchall()
+            if not rows:
+                break
+            keys = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                keys.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM docs WHERE doc_key = ?", keys)
+            conn.executemany("DELETE FROM item_docs WHERE doc_key = ?", keys)
+            evicted.extend(key for (key,) in keys)
+        if evicted:
+            logger.debug("Evicted %s cached documents", len(evicted))
@@ -0,0 +1,229 @@
+"""Streaming export of mined trends into partitioned Parquet files."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional, Sequence
+from uuid import UUID, uuid4
+
+import pyarrow as pa  # type: ignore[import-untyped]
+import pyarrow.parquet as pq  # type: ignore[import-untyped]
+
+from news_deframer.config import EXPORT_BATCH_SIZE, Config
+from news_deframer.models import Trend, as_utc
+from news_deframer.postgres import Postgres
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_FILE = "_watermark.json"
+
+# Partition columns (language, day) are encoded in the directory layout.
+TREND_PARQUET_SCHEMA = pa.schema(
+    [
+        pa.field("item_id", pa.string(), nullable=False),
+        pa.field("feed_id", pa.string(), nullable=False),
+        pa.field("pub_date", pa.timestamp("us", tz="UTC"), nullable=False),
+        pa.field("root_domain", pa.string()),
+        pa.field("category_stems", pa.list_(pa.string())),
+        pa.field("noun_stems", pa.list_(pa.string())),
+        pa.field("verb_stems", pa.list_(pa.string())),
+        pa.field("adjective_stems", pa.list_(pa.string())),
+    ]
+)
+
+
+@dataclass(slots=True)
+class ExportOptions:
+    output: Path
+    until: Optional[datetime] = None
+    languages: list[str] = field(default_factory=list)
+    batch_size: int = EXPORT_BATCH_SIZE
+    full: bool = False
+
+
+def trends_to_table(trends: Sequence[Trend]) -> pa.Table:
+    """Convert trends into an Arrow table following ``TREND_PARQUET_SCHEMA``."""
+    return pa.table(
+        {
+            "item_id": [str(t.item_id) for t in trends],
+            "feed_id": [str(t.feed_id) for t in trends],
+            "pub_date": [as_utc(t.pub_date) for t in trends],
+            "root_domain": [t.root_domain for t in trends],
+            "category_stems": [t.category_stems for t in trends],
+            "noun_stems": [t.noun_stems for t in trends],
+            "verb_stems": [t.verb_stems for t in trends],
+            "adjective_stems": [t.adjective_stems for t in trends],
+        },
+        schema=TREND_PARQUET_SCHEMA,
+    )
+
+
+class PartitionedParquetWriter:
+    """Writes trends into ``language=<xx>/date=<YYYY-MM-DD>`` partitions.
+
+    Input is expected in pub_date order: once a newer day shows up, the
+    writers of all older days are closed. Only the writers of the current day
+    stay open, which keeps memory bounded by ``batch_size`` rows per language.
+    Files are written under a temporary name and only renamed by ``close``, so
+    readers never observe a partially written run.
+    """
+
+    def __init__(self, root: Path, batch_size: int = EXPORT_BATCH_SIZE) -> None:
+        self.root = root
+        self.batch_size = max(int(batch_size), 1)
+        self.run_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid4().hex[:8]}"
+        self.rows_written = 0
+        self._writers: dict[tuple[str, date], tuple[pq.ParquetWriter, Path]] = {}
+        self._buffers: dict[tuple[str, date], list[Trend]] = {}
+        self._closed: list[Path] = []
+        self._current_day: Optional[date] = None
+
+    def write(self, trends: Sequence[Trend]) -> None:
+        for trend in trends:
+            day = as_utc(trend.pub_date).date()
+            if self._current_day is not None and day > self._current_day:
+                self._close_before(day)
+            if self._current_day is None or day > self._current_day:
+                self._current_day = day
+
+            key = (trend.language or "unknown", day)
+            buffer = self._buffers.setdefault(key, [])
+            buffer.append(trend)
+            if len(buffer) >= self.batch_size:
+                self._flush(key)
+
+    def close(self) -> None:
+        for key in list(self._buffers):
+            self._flush(key)
+        for key in list(self._writers):
+            self._finalize(key)
+        for path in self._closed:
+            os.replace(path.with_name(f".{path.name}.tmp"), path)
+        self._closed.clear()
+        self._current_day = None
+
+    def abort(self) -> None:
+        """Discard all files of this run that have not been finalized yet."""
+        self._buffers.clear()
+        for key in list(self._writers):
+            writer, path = self._writers.pop(key)
+            writer.close()
+            self._closed.append(path)
+        for path in self._closed:
+            path.with_name(f".{path.name}.tmp").unlink(missing_ok=True)
+        self._closed.clear()
+        self._current_day = None
+
+    def _close_before(self, day: date) -> None:
+        for key in [key for key in self._buffers if key[1] < day]:
+            self._flush(key)
+        for key in [key for key in self._writers if key[1] < day]:
+            self._finalize(key)
+
+    def _flush(self, key: tuple[str, date]) -> None:
+        buffer = self._buffers.pop(key, [])
+        if not buffer:
+            return
+        writer_entry = self._writers.get(key)
+        if writer_entry is None:
+            language, day = key
+            directory = self.root / f"language={language}" / f"date={day.isoformat()}"
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"part-{self.run_id}.parquet"
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            writer_entry = (pq.ParquetWriter(tmp_path, TREND_PARQUET_SCHEMA), path)
+            self._writers[key] = writer_entry
+        writer_entry[0].write_table(trends_to_table(buffer))
+        self.rows_written += len(buffer)
+
+    def _finalize(self, key: tuple[str, date]) -> None:
+        writer, path = self._writers.pop(key)
+        writer.close()
+        self._closed.append(path)
+
+
+def watermark_path(root: Path, languages: Sequence[str] = ()) -> Path:
+    """Return the watermark file of exports restricted to ``languages``.
+
+    A run filtered by language skips the rows of other languages, so its
+    progress must not be mistaken for that of an unfiltered run; every
+    language set keeps its own watermark. ``until`` needs none: it cuts the
+    same ``(pub_date, item_id)`` order, so every row up to the watermark has
+    been exported either way.
+    """
+    codes = sorted({language.lower() for language in languages})
+    if not codes:
+        return root / WATERMARK_FILE
+    stem, suffix = os.path.splitext(WATERMARK_FILE)
+    return root / f"{stem}-{','.join(codes)}{suffix}"
+
+
+def read_watermark(
+    root: Path, languages: Sequence[str] = ()
+) -> Optional[tuple[datetime, UUID]]:
+    """Return the ``(pub_date, item_id)`` key of the last exported trend."""
+    path = watermark_path(root, languages)
+    if not path.exists():
+        return None
+    data = json.loads(path.read_text())
+    return datetime.fromisoformat(data["pub_date"]), UUID(data["item_id"])
+
+
+def write_watermark(
+    root: Path, pub_date: datetime, item_id: UUID, languages: Sequence[str] = ()
+) -> None:
+    path = watermark_path(root, languages)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(
+        json.dumps({"pub_date": as_utc(pub_date).isoformat(), "item_id": str(item_id)})
+    )
+    os.replace(tmp_path, path)
+
+
+def export_trends(
+    config: Config, options: ExportOptions, repository: Optional[Postgres] = None
+) -> int:
+    """Export trends newer than the stored watermark and return the row count.
+
+    The watermark is the ``(pub_date, item_id)`` key of the last exported row
+    and is only advanced after every file of the run has been published; a
+    failed run leaves neither files nor watermark behind. Trends mined later
+    for items older than the watermark are not picked up by incremental runs;
+    use ``full`` to re-export everything. Runs restricted to ``languages``
+    keep a watermark per language set (see ``watermark_path``).
+    """
+
+    repo = repository or Postgres(config)
+    options.output.mkdir(parents=True, exist_ok=True)
+    after = None
+    if not options.full:
+        after = read_watermark(options.output, options.languages)
+    if after is not None:
+        logger.info("Exporting trends after %s", after[0])
+
+    writer = PartitionedParquetWriter(options.output, options.batch_size)
+    last: Optional[Trend] = None
+    try:
+        for batch in repo.iter_trends(
+            options.batch_size,
+            after=after,
+            until=options.until,
+            languages=options.languages,
+        ):
+            writer.write(batch)
+            last = batch[-1]
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+
+    if last is not None:
+        write_watermark(options.output, last.pub_date, last.item_id, options.languages)
+
+    logger.info("Exported %s trends to %s", writer.rows_written, options.output)
+    return writer.rows_written
@@ -0,0 +1,109 @@
+"""Background renewal of feed mining locks."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Optional
+from uuid import UUID
+
+from news_deframer.config import LOCK_IDLE_TIMEOUT
+from news_deframer.repository import MiningRepository
+
+logger = logging.getLogger(__name__)
+
+
+class LockHeartbeat:
+    """Extends the mining lock of a feed while mining makes progress.
+
+    The lock is renewed every ``interval`` seconds, but only if ``touch`` was
+    called within the last ``max_idle`` seconds: a worker that hangs stops
+    renewing and its feed is released by expiry. ``max_idle`` is independent
+    of the short ``lock_duration`` and must exceed the time a slow chunk
+    takes. Once a renewal finds the lock already expired, ``lost`` is set so
+    the worker can stop early instead of duplicating the work of whoever
+    claimed the feed next. With the ``lock_token`` of the claim, a lock
+    another worker has taken over counts as lost as well instead of being
+    renewed on its behalf.
+    """
+
+    def __init__(
+        self,
+        repository: MiningRepository,
+        feed_id: UUID,
+        lock_duration: int,
+        interval: Optional[float] = None,
+        max_idle: float = LOCK_IDLE_TIMEOUT,
+        lock_token: Optional[UUID] = None,
+    ) -> None:
+        self.repository = repository
+        self.feed_id = feed_id
+        self.lock_token = lock_token
+        self.lock_duration = max(int(lock_duration), 1)
+        self.interval = interval if interval is not None else self.lock_duration / 3
+        self.max_idle = max(float(max_idle), float(self.lock_duration))
+        self.lost = False
+        self._last_progress = time.monotonic()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "LockHeartbeat":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._last_progress = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._run, name=f"lock-heartbeat-{self.feed_id}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def touch(self) -> None:
+        """Record that mining made progress."""
+        self._last_progress = time.monotonic()
+
+    def beat(self) -> None:
+        """Renew the lock once if mining made progress recently."""
+        idle = time.monotonic() - self._last_progress
+        if idle > self.max_idle:
+            logger.warning(
+                "No mining progress for %.0fs; letting the lock expire",
+                idle,
+                extra={"feed_id": str(self.feed_id)},
+            )
+            return
+
+        try:
+            extended = self.repository.extend_mine_lock(
+                self.feed_id, self.lock_duration, lock_token=self.lock_token
+            )
+        except Exception as exc:  # pragma: no cover - db failure path
+            logger.error(
+                "Failed to extend feed lock",
+                extra={"feed_id": str(self.feed_id)},
+                exc_info=exc,
+            )
+            return
+
+        if not extended:
+            logger.warning(
+                "Feed lock expired or was taken over before it could be extended",
+                extra={"feed_id": str(self.feed_id)},
+            )
+            self.lost = True
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.beat()
+            if self.lost:
+                return
@@ -1,6 +1,19 @@
+import atexit
+import copy
+from datetime import datetime, timezone
 import json
 import logging
+import logging.handlers
+import queue
 import sys
+import time
+from typing import Any, Optional
+
+LOG_FORMAT_TEXT = "text"
+LOG_FORMAT_JSON = "json"
+
+# Bound of the message keys tracked by RateLimitFilter before it starts over.
+_RATE_LIMIT_MAX_KEYS = 10_000
 
 
 _BASE_FIELDS = {
@@ -61,15 +74,19 @@ class SilentLogger:
         return False
 
 
+def _extra_fields(record: logging.LogRecord) -> dict[str, Any]:
+    return {
+        key: value
+        for key, value in record.__dict__.items()
+        if key not in _BASE_FIELDS and value is not None
+    }
+
+
 class ExtraFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:  # type: ignore[override]
         base = super().format(record)
-        extra_keys = [k for k in record.__dict__ if k not in _BASE_FIELDS]
-        if extra_keys:
-            extra_payload = {key: record.__dict__[key] for key in extra_keys}
-            cleaned_payload = {
-                key: value for key, value in extra_payload.items() if value is not None
-            }
+        cleaned_payload = _extra_fields(record)
+        if cleaned_payload:
             try:
                 serialized = json.dumps(
                     cleaned_payload, default=str, ensure_ascii=False
@@ -80,13 +97,148 @@ class ExtraFormatter(logging.Formatter):
         return base
 
 
-def configure_logging(log_level: str = "INFO") -> None:
-    """Configures the root logger and ensures extra data is visible."""
+class JsonFormatter(logging.Formatter):
+    """Formats every record as one JSON object per line.
+
+    Extra fields are merged into the top level; exceptions are rendered into
+    an ``exc_info`` string.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:  # type: ignore[override]
+        payload: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        for key, value in _extra_fields(record).items():
+            payload.setdefault(key, value)
+        try:
+            return json.dumps(payload, default=str, ensure_ascii=False)
+        except TypeError:
+            return json.dumps({k: str(v) for k, v in payload.items()})
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most ``burst`` records of one message per ``interval``.
+
+    Records are keyed by logger, level and unformatted message, so repetitive
+    hot-path messages are sampled while distinct messages are unaffected.
+    Records at ``max_level`` or above always pass. The first record let
+    through after a suppression carries the number of dropped records in
+    ``suppressed``.
+    """
+
+    def __init__(
+        self,
+        burst: int,
+        interval: float = 60.0,
+        max_level: int = logging.WARNING,
+    ) -> None:
+        super().__init__()
+        self.burst = max(int(burst), 1)
+        self.interval = interval
+        self.max_level = max_level
+        # key -> (window start, records passed, records suppressed)
+        self._windows: dict[tuple[str, int, str], tuple[float, int, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.max_level:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        started, passed, suppressed = self._windows.get(key, (now, 0, 0))
+        if now - started >= self.interval:
+            started, passed = now, 0
+        if passed >= self.burst:
+            self._windows[key] = (started, passed, suppressed + 1)
+            return False
+
+        if suppressed:
+            record.suppressed = suppressed
+        if len(self._windows) >= _RATE_LIMIT_MAX_KEYS and key not in self._windows:
+            self._windows.clear()
+        self._windows[key] = (started, passed + 1, 0)
+        return True
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records with only their arguments merged.
+
+    The stock ``prepare`` runs the full formatter on the calling thread; here
+    timestamps, extras and serialization are left to the listener thread.
+    Tracebacks are rendered eagerly since they reference live frames.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_TRACEBACK_FORMATTER = logging.Formatter()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(
+    log_level: str = "INFO",
+    log_format: str = LOG_FORMAT_TEXT,
+    async_logging: bool = False,
+    rate_limit: int = 0,
+    rate_limit_interval: float = 60.0,
+) -> None:
+    """Configures the root logger and ensures extra data is visible.
+
+    ``log_format`` selects human readable text or JSON lines. With
+    ``async_logging`` the worker thread only enqueues records; formatting and
+    writing to stdout happen on a ``QueueListener`` thread. ``rate_limit``
+    caps identical sub-WARNING messages per ``rate_limit_interval`` seconds.
+    """
+    global _listener
+    shutdown_logging()
     level = getattr(logging, log_level.upper(), logging.INFO)
 
     handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(
-        ExtraFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    )
-
-    logging.basicConfig(level=level, handlers=[handler], force=True)
+    if log_format == LOG_FORMAT_JSON:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            ExtraFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        )
+
+    root_handler: logging.Handler = handler
+    if async_logging:
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        root_handler = _DeferredQueueHandler(log_queue)
+        # Keep basicConfig from installing its default formatter.
+        root_handler.setFormatter(_TRACEBACK_FORMATTER)
+        _listener = logging.handlers.QueueListener(
+            log_queue, handler, respect_handler_level=True
+        )
+        _listener.start()
+
+    if rate_limit > 0:
+        root_handler.addFilter(RateLimitFilter(rate_limit, rate_limit_interval))
+
+    logging.basicConfig(level=level, handlers=[root_handler], force=True)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background listener, if any."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,294 @@
+"""Offline mining of items read from JSONL or Parquet files."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+import json
+import logging
+import multiprocessing
+import os
+from pathlib import Path
+from typing import IO, Any, Iterator, Optional, Sequence
+from uuid import UUID, uuid4
+
+import pyarrow as pa  # type: ignore[import-untyped]
+import pyarrow.parquet as pq  # type: ignore[import-untyped]
+
+from news_deframer.config import EXPORT_BATCH_SIZE, NLP_BATCH_SIZE, Config
+from news_deframer.export import TREND_PARQUET_SCHEMA, trends_to_table
+from news_deframer.miner import (
+    MiningTask,
+    discard_extract,
+    extract,
+    extract_result,
+    extract_title_and_description,
+    submit_extract,
+    task_content,
+)
+from news_deframer.netutil import get_root_domain
+from news_deframer.models import Trend, as_utc
+
+logger = logging.getLogger(__name__)
+
+# Without partition directories the language is stored as a column.
+MINED_FILE_SCHEMA = TREND_PARQUET_SCHEMA.append(pa.field("language", pa.string()))
+
+_PARQUET_SUFFIXES = (".parquet", ".pq")
+
+# An all-zero id marks records that do not name their feed.
+_UNKNOWN_FEED = UUID(int=0)
+
+
+@dataclass(slots=True)
+class MineFileOptions:
+    input: Path
+    output: Path
+    language: str = "en"
+    batch_size: int = NLP_BATCH_SIZE
+    workers: int = 1
+
+
+def mine_file(config: Config, options: MineFileOptions) -> int:
+    """Mine the items of ``options.input`` and write their trends to a file.
+
+    Input is JSONL or Parquet (by suffix), one item per line or row, with the
+    fields of ``items``: ``content`` holding the deframer markup, or plain
+    ``title``/``description``, plus optional ``id``, ``feed_id``, ``feed_url``,
+    ``root_domain``, ``language``, ``categories`` and ``pub_date``. Items are
+    mined in batches of ``batch_size``; with several ``workers`` at most two
+    batches per worker are in flight, so memory stays constant regardless of
+    the input size. Trends are written in input order as Parquet or JSONL (by
+    suffix of ``options.output``), which only appears once complete. Returns
+    the number of mined items. Unlike ``Miner.mine_items``, no boilerplate is
+    stripped, whatever ``boilerplate_stripping`` says.
+    """
+    batch_size = max(int(options.batch_size), 1)
+    executor: Optional[ProcessPoolExecutor] = None
+    if options.workers > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=options.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    writer = _open_writer(options.output)
+    # Futures with the number of items of their batch.
+    pending: deque[tuple[Future, int]] = deque()
+    max_pending = max(options.workers, 1) * 2
+    mined = 0
+    try:
+        for tasks in _read_batches(options.input, options.language, batch_size):
+            contents = [task_content(task) for task in tasks]
+            if executor is None:
+                writer.write(extract(tasks, contents, None, config.max_content_chars))
+                mined += len(tasks)
+                continue
+            future = submit_extract(
+                executor,
+                tasks,
+                contents,
+                config.max_content_chars,
+                config.arrow_ipc,
+            )
+            pending.append((future, len(tasks)))
+            while len(pending) >= max_pending:
+                mined += _write_result(writer, *pending.popleft())
+        while pending:
+            mined += _write_result(writer, *pending.popleft())
+    except BaseException:
+        for future, _ in pending:
+            discard_extract(future)
+        writer.abort()
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    writer.close()
+
+    logger.info("Mined %s items from %s into %s", mined, options.input, options.output)
+    return mined
+
+
+def _write_result(writer: _TrendFileWriter, future: Future, count: int) -> int:
+    writer.write(extract_result(future))
+    return count
+
+
+def _read_batches(
+    path: Path, language: str, batch_size: int
+) -> Iterator[list[MiningTask]]:
+    batch: list[MiningTask] = []
+    skipped = 0
+    for number, record in enumerate(_read_records(path, batch_size), start=1):
+        try:
+            batch.append(record_task(record, language))
+        except (TypeError, ValueError) as exc:
+            skipped += 1
+            logger.warning("Skipping record %s of %s: %s", number, path, exc)
+            continue
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+    if skipped:
+        logger.warning("Skipped %s invalid records of %s", skipped, path)
+
+
+def _read_records(path: Path, batch_size: int) -> Iterator[Any]:
+    if path.suffix.lower() in _PARQUET_SUFFIXES:
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield from record_batch.to_pylist()
+        return
+    with path.open(encoding="utf-8") as lines:
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                logger.warning("Skipping line %s of %s: %s", number, path, exc)
+
+
+def record_task(record: Any, default_language: str = "en") -> MiningTask:
+    """Build the mining task of one input record."""
+    if not isinstance(record, dict):
+        raise ValueError(f"not an object: {record!r:.80}")
+
+    content = record.get("content")
+    if content:
+        title, description = extract_title_and_description(str(content))
+    else:
+        title, description = record.get("title"), record.get("description")
+    if not (title or description):
+        raise ValueError("neither content nor title/description")
+
+    pub_date = record.get("pub_date")
+    if isinstance(pub_date, str):
+        pub_date = datetime.fromisoformat(pub_date)
+    if not isinstance(pub_date, datetime):
+        raise ValueError("missing pub_date")
+
+    feed_url = record.get("feed_url")
+    root_domain = record.get("root_domain")
+    if not root_domain:
+        root_domain = get_root_domain(feed_url) if feed_url else ""
+    categories = record.get("categories") or []
+    if not isinstance(categories, list):
+        raise ValueError(f"categories is not a list: {categories!r:.80}")
+
+    language = str(record.get("language") or default_language).lower()[:2]
+    return MiningTask(
+        feed_id=_uuid(record.get("feed_id")) or _UNKNOWN_FEED,
+        item_id=_uuid(record.get("id") or record.get("item_id")) or uuid4(),
+        language=language,
+        categories=sorted(set(categories)),
+        title=title,
+        description=description,
+        pub_date=pub_date,
+        root_domain=root_domain or "",
+        feed_url=feed_url,
+    )
+
+
+def _uuid(value: Any) -> Optional[UUID]:
+    if value is None or value == "":
+        return None
+    return value if isinstance(value, UUID) else UUID(str(value))
+
+
+class _TrendFileWriter(ABC):
+    """Streams trends into a temporary file renamed into place by ``close``.
+
+    ``abort`` drops the temporary file without writing buffered trends; it
+    runs while another error propagates and so never raises itself.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.tmp_path = path.with_name(f".{path.name}.tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    @abstractmethod
+    def write(self, trends: Sequence[Trend]) -> None: ...
+
+    def _flush(self) -> None:
+        pass
+
+    @abstractmethod
+    def _close_file(self) -> None: ...
+
+    def close(self) -> None:
+        self._flush()
+        self._close_file()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        try:
+            self._close_file()
+        except Exception:
+            logger.warning("Could not close %s", self.tmp_path, exc_info=True)
+        self.tmp_path.unlink(missing_ok=True)
+
+
+class _ParquetTrendWriter(_TrendFileWriter):
+    # Rows are buffered into row groups of EXPORT_BATCH_SIZE.
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        self._writer = pq.ParquetWriter(self.tmp_path, MINED_FILE_SCHEMA)
+        self._buffer: list[Trend] = []
+
+    def write(self, trends: Sequence[Trend]) -> None:
+        self._buffer.extend(trends)
+        if len(self._buffer) >= EXPORT_BATCH_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        table = trends_to_table(self._buffer).append_column(
+            "language", pa.array([t.language for t in self._buffer], pa.string())
+        )
+        self._writer.write_table(table)
+        self._buffer = []
+
+    def _close_file(self) -> None:
+        self._writer.close()
+
+
+class _JsonlTrendWriter(_TrendFileWriter):
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        self._file: IO[str] = self.tmp_path.open("w", encoding="utf-8")
+
+    def write(self, trends: Sequence[Trend]) -> None:
+        for trend in trends:
+            self._file.write(
+                json.dumps(
+                    {
+                        "item_id": str(trend.item_id),
+                        "feed_id": str(trend.feed_id),
+                        "language": trend.language,
+                        "pub_date": as_utc(trend.pub_date).isoformat(),
+                        "root_domain": trend.root_domain,
+                        "category_stems": trend.category_stems,
+                        "noun_stems": trend.noun_stems,
+                        "verb_stems": trend.verb_stems,
+                        "adjective_stems": trend.adjective_stems,
+                    },
+                    ensure_ascii=False,
+                )
+                + "\n"
+            )
+
+    def _close_file(self) -> None:
+        self._file.close()
+
+
+def _open_writer(path: Path) -> _TrendFileWriter:
+    if path.suffix.lower() in _PARQUET_SUFFIXES:
+        return _ParquetTrendWriter(path)
+    return _JsonlTrendWriter(path)
@@ -2,15 +2,39 @@
 
 from __future__ import annotations
 
+from collections import Counter, OrderedDict, defaultdict, deque
+from concurrent.futures import Executor, Future
 from dataclasses import dataclass
 from datetime import datetime
+from functools import partial
+from html.parser import HTMLParser
 import logging
-from typing import Optional
+from typing import Optional, Sequence
 from uuid import UUID
 
-from news_deframer.config import Config
-from news_deframer.postgres import Postgres, Trend
-from news_deframer.nlp import extract_stems, sanitize_text, stem_category
+from news_deframer.arrow_ipc import (
+    SharedBatch,
+    read_shared,
+    release,
+    share_batch,
+    task_rows,
+    tasks_to_batch,
+    trends_from_batch,
+    trends_to_batch,
+)
+from news_deframer.boilerplate import BoilerplateLearner
+from news_deframer.config import MAX_CONTENT_CHARS, NLP_BATCH_SIZE, Config
+from news_deframer.doc_cache import DocCache, document_key, open_doc_cache
+from news_deframer.netutil import get_root_domain
+from news_deframer.models import ContentStems, Feed, Item, Trend
+from news_deframer.nlp import (
+    content_hash,
+    extract_stems_batch,
+    model_version,
+    sanitize_text,
+    stem_category,
+)
+from news_deframer.repository import TrendRepository
 
 
 logger = logging.getLogger(__name__)
@@ -29,46 +53,467 @@ class MiningTask:
     feed_url: Optional[str] = None
 
 
+def task_content(task: MiningTask) -> str:
+    """Return the sanitized title and description of ``task`` as one text."""
+    title_text = sanitize_text(task.title) or ""
+    description_text = sanitize_text(task.description) or ""
+    return f"{title_text}{' ' if title_text else ''}{description_text}"
+
+
+def build_task(feed: Feed, item: Item) -> MiningTask:
+    """Return the mining task of ``item`` with the defaults of its ``feed``."""
+    language = item.language or feed.language or "en"
+    if language == "en" and not (item.language or feed.language):
+        logger.warning(
+            "Missing language metadata; falling back to 'en'",
+            extra={"feed_url": feed.url, "item_id": str(item.id)},
+        )
+
+    categories = sorted({*feed.categories, *item.categories})
+    domain = feed.root_domain or get_root_domain(feed.url)
+    title, description = extract_title_and_description(item.content, item_id=item.id)
+    return MiningTask(
+        feed_id=feed.id,
+        feed_url=feed.url,
+        root_domain=domain,
+        item_id=item.id,
+        language=language,
+        categories=categories,
+        title=title,
+        description=description,
+        pub_date=item.pub_date,
+    )
+
+
+class _DeframerParser(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__()
+        self.data: dict[str, Optional[str]] = {
+            "deframer:title_original": None,
+            "deframer:description_original": None,
+        }
+        self._current: Optional[str] = None
+        self._buffer: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        if tag in self.data:
+            self._current = tag
+            self._buffer = []
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == self._current:
+            self.data[tag] = "".join(self._buffer).strip() or None
+            self._current = None
+
+    def handle_data(self, data: str) -> None:
+        if self._current:
+            self._buffer.append(data)
+
+
+def extract_title_and_description(
+    content: str, item_id: Optional[UUID] = None
+) -> tuple[Optional[str], Optional[str]]:
+    """Return the original title and description of deframer item markup."""
+    parser = _DeframerParser()
+    try:
+        parser.feed(content)
+        parser.close()
+    except Exception as exc:
+        if item_id:
+            logger.error(
+                "Failed to parse content", extra={"item_id": str(item_id)}, exc_info=exc
+            )
+        return None, None
+    return parser.data["deframer:title_original"], parser.data[
+        "deframer:description_original"
+    ]
+
+
+def extract_trends(
+    tasks: Sequence[MiningTask],
+    contents: Optional[Sequence[str]] = None,
+    max_chars: int = MAX_CONTENT_CHARS,
+    doc_cache: Optional[DocCache] = None,
+) -> list[Trend]:
+    """Run the NLP pipeline for ``tasks`` and return one trend per task.
+
+    Tasks are grouped by language so every spaCy model sees its texts in a
+    single ``nlp.pipe`` pass. ``contents`` may carry the already sanitized
+    text of each task; texts longer than ``max_chars`` are mined in pieces.
+    With ``doc_cache`` the annotations of every text are stored in it. The
+    function does not touch the repository and can therefore run inside
+    worker processes.
+    """
+
+    if contents is None:
+        contents = [task_content(task) for task in tasks]
+
+    by_language: dict[str, list[int]] = defaultdict(list)
+    for index, task in enumerate(tasks):
+        by_language[task.language].append(index)
+
+    trends: list[Optional[Trend]] = [None] * len(tasks)
+    for language, indexes in by_language.items():
+        doc_bytes: Optional[list[Optional[bytes]]] = None
+        if doc_cache is not None:
+            doc_bytes = [None] * len(indexes)
+        stems = extract_stems_batch(
+            [contents[index] for index in indexes],
+            language,
+            batch_size=NLP_BATCH_SIZE,
+            max_chars=max_chars,
+            doc_bytes=doc_bytes,
+        )
+        for index, (noun_stems, verb_stems, adj_stems) in zip(indexes, stems):
+            trends[index] = _build_trend(
+                tasks[index], list(noun_stems), list(verb_stems), list(adj_stems)
+            )
+        if doc_cache is not None and doc_bytes is not None:
+            version = model_version(language)
+            doc_cache.store(
+                [
+                    (document_key(contents[index], language), language, version, data)
+                    for index, data in zip(indexes, doc_bytes)
+                    if data is not None
+                ]
+            )
+
+    return [trend for trend in trends if trend is not None]
+
+
+def _build_trend(
+    task: MiningTask,
+    noun_stems: list[str],
+    verb_stems: list[str],
+    adj_stems: list[str],
+) -> Trend:
+    return Trend(
+        item_id=task.item_id,
+        feed_id=task.feed_id,
+        language=task.language,
+        pub_date=task.pub_date,
+        category_stems=_stem_categories(task.categories, task.language),
+        noun_stems=noun_stems,
+        verb_stems=verb_stems,
+        adjective_stems=adj_stems,
+        root_domain=task.root_domain,
+    )
+
+
+def _stem_categories(categories: Sequence[str], language: str) -> list[str]:
+    category_stems = []
+    for c in categories:
+        if stemmed := stem_category(sanitize_text(c), language):
+            category_stems.append(stemmed)
+    return category_stems
+
+
 class Miner:
     """Encapsulates business logic for handling mined items."""
 
-    def __init__(self, config: Config, repository: Postgres):
+    def __init__(self, config: Config, repository: TrendRepository):
         self.config = config
         self._logger = logger.getChild("Miner")
         self._repository = repository
+        self._content_cache: OrderedDict[str, ContentStems] = OrderedDict()
+        self.items_mined = 0
+        # Items whose content exceeded max_content_chars, per feed.
+        self.oversized_items: Counter[str] = Counter()
+        self._boilerplate = BoilerplateLearner()
+        self._doc_cache = open_doc_cache(config)
 
     def mine_item(self, task: MiningTask) -> None:
-        """Persist or otherwise process a single mined item.
+        """Extract the stems of a single item and persist its trend."""
 
-        Currently this is a placeholder that simply logs the provided task.
+        self.mine_items([task])
+
+    def mine_items(
+        self, tasks: Sequence[MiningTask], executor: Optional[Executor] = None
+    ) -> list[Trend]:
+        """Extract the stems of ``tasks`` and persist them in one upsert.
+
+        When ``executor`` is given, the tasks are split into batches of
+        ``NLP_BATCH_SIZE`` and the NLP work is spread across its workers.
+        With ``content_dedup`` enabled, items whose normalized content was
+        mined before reuse the stored stems instead of running spaCy again.
+        With ``boilerplate_stripping`` enabled, segments a feed repeats across
+        its recent items are removed from the content first.
+        With ``doc_cache_path`` set, the spaCy annotations of the contents are
+        kept there for ``rederive``.
         """
 
-        task.title = sanitize_text(task.title)
-        task.description = sanitize_text(task.description)
+        if not tasks:
+            return []
+
+        contents = [task_content(task) for task in tasks]
+        if self.config.boilerplate_stripping:
+            contents = self._strip_boilerplate(tasks, contents)
+        self._count_oversized(tasks, contents)
+        if self.config.content_dedup:
+            trends = self._extract_deduplicated(tasks, contents, executor)
+        else:
+            trends = extract(
+                tasks,
+                contents,
+                executor,
+                self.config.max_content_chars,
+                self.config.arrow_ipc,
+                self._doc_cache,
+            )
 
-        title_text = task.title or ""
-        description_text = task.description or ""
-        content = f"{title_text}{' ' if title_text else ''}{description_text}"
+        self._repository.upsert_trends(trends)
+        if self._doc_cache is not None:
+            # Deduplicated items point at the annotations of their first copy.
+            self._doc_cache.link(
+                (task.item_id, document_key(content, task.language))
+                for task, content in zip(tasks, contents)
+            )
+        self.items_mined += len(tasks)
+        return trends
 
-        category_stems = []
-        for c in task.categories:
-            if stemmed := stem_category(sanitize_text(c), task.language):
-                category_stems.append(stemmed)
+    def _extract_deduplicated(
+        self,
+        tasks: Sequence[MiningTask],
+        contents: Sequence[str],
+        executor: Optional[Executor],
+    ) -> list[Trend]:
+        hashes = [
+            content_hash(content, task.language)
+            for task, content in zip(tasks, contents)
+        ]
+        known = self._lookup_content_stems(set(hashes))
 
-        noun_stems, verb_stems, adj_stems = extract_stems(
-            content,
-            task.language,
+        # Copies within the same batch are mined once as well.
+        first_seen: dict[str, int] = {}
+        for index, digest in enumerate(hashes):
+            if digest not in known and digest not in first_seen:
+                first_seen[digest] = index
+        misses = list(first_seen.values())
+
+        mined = extract(
+            [tasks[index] for index in misses],
+            [contents[index] for index in misses],
+            executor,
+            self.config.max_content_chars,
+            self.config.arrow_ipc,
+            self._doc_cache,
         )
+        stored = []
+        for index, trend in zip(misses, mined):
+            entry = ContentStems(
+                content_hash=hashes[index],
+                language=trend.language,
+                noun_stems=trend.noun_stems,
+                verb_stems=trend.verb_stems,
+                adjective_stems=trend.adjective_stems,
+            )
+            known[entry.content_hash] = entry
+            stored.append(entry)
+        if stored:
+            self._repository.store_content_stems(stored)
+            for entry in stored:
+                self._remember_content_stems(entry)
+
+        trends_by_index = dict(zip(misses, mined))
+        trends: list[Trend] = []
+        for index, task in enumerate(tasks):
+            if index in trends_by_index:
+                trends.append(trends_by_index[index])
+                continue
+            entry = known[hashes[index]]
+            trends.append(
+                _build_trend(
+                    task,
+                    list(entry.noun_stems),
+                    list(entry.verb_stems),
+                    list(entry.adjective_stems),
+                )
+            )
+
+        if len(misses) < len(tasks):
+            self._logger.debug(
+                "Reused stems for %s of %s items", len(tasks) - len(misses), len(tasks)
+            )
+        return trends
+
+    def _strip_boilerplate(
+        self, tasks: Sequence[MiningTask], contents: Sequence[str]
+    ) -> list[str]:
+        # Learn from the whole batch first, so a feed's first chunk already
+        # benefits from its own repetitions.
+        for task, content in zip(tasks, contents):
+            self._boilerplate.observe(task.feed_id, task.item_id, content)
+        stripped = [
+            self._boilerplate.strip(task.feed_id, content)
+            for task, content in zip(tasks, contents)
+        ]
+        removed = sum(len(a) - len(b) for a, b in zip(contents, stripped))
+        if removed:
+            self._logger.debug("Stripped %s boilerplate characters", removed)
+        return stripped
+
+    def _count_oversized(
+        self, tasks: Sequence[MiningTask], contents: Sequence[str]
+    ) -> None:
+        limit = self.config.max_content_chars
+        if limit <= 0:
+            return
+        for task, content in zip(tasks, contents):
+            if len(content) <= limit:
+                continue
+            feed_label = task.feed_url or str(task.feed_id)
+            self.oversized_items[feed_label] += 1
+            self._logger.warning(
+                "Item content exceeds %s chars; mining it in pieces",
+                limit,
+                extra={
+                    "feed_url": feed_label,
+                    "item_id": str(task.item_id),
+                    "content_chars": len(content),
+                    "feed_oversized_items": self.oversized_items[feed_label],
+                },
+            )
+
+    def _lookup_content_stems(self, hashes: set[str]) -> dict[str, ContentStems]:
+        known: dict[str, ContentStems] = {}
+        for digest in hashes:
+            entry = self._content_cache.get(digest)
+            if entry is not None:
+                self._content_cache.move_to_end(digest)
+                known[digest] = entry
+
+        unknown = sorted(hashes - known.keys())
+        if unknown:
+            for entry in self._repository.fetch_content_stems(unknown).values():
+                known[entry.content_hash] = entry
+                self._remember_content_stems(entry)
+        return known
 
-        trend = Trend(
-            item_id=task.item_id,
-            feed_id=task.feed_id,
-            language=task.language,
-            pub_date=task.pub_date,
-            category_stems=category_stems,
-            noun_stems=list(noun_stems),
-            verb_stems=list(verb_stems),
-            adjective_stems=list(adj_stems),
-            root_domain=task.root_domain,
+    def _remember_content_stems(self, entry: ContentStems) -> None:
+        self._content_cache[entry.content_hash] = entry
+        self._content_cache.move_to_end(entry.content_hash)
+        while len(self._content_cache) > max(self.config.content_cache_size, 0):
+            self._content_cache.popitem(last=False)
+
+
+def extract(
+    tasks: Sequence[MiningTask],
+    contents: Sequence[str],
+    executor: Optional[Executor],
+    max_chars: int,
+    arrow_ipc: bool = False,
+    doc_cache: Optional[DocCache] = None,
+) -> list[Trend]:
+    """Extract the trends of ``tasks`` from their prepared ``contents``.
+
+    Without an ``executor`` the batch is processed in this process; otherwise
+    it is split into ``NLP_BATCH_SIZE`` batches handed to the executor.
+    """
+    if not tasks:
+        return []
+    if executor is None:
+        return _extract_function(max_chars, doc_cache)(tasks, contents)
+    return _extract_parallel(tasks, contents, executor, max_chars, arrow_ipc, doc_cache)
+
+
+def _extract_parallel(
+    tasks: Sequence[MiningTask],
+    contents: Sequence[str],
+    executor: Executor,
+    max_chars: int,
+    arrow_ipc: bool = False,
+    doc_cache: Optional[DocCache] = None,
+) -> list[Trend]:
+    starts = range(0, len(tasks), NLP_BATCH_SIZE)
+    futures = [
+        submit_extract(
+            executor,
+            tasks[start : start + NLP_BATCH_SIZE],
+            contents[start : start + NLP_BATCH_SIZE],
+            max_chars,
+            arrow_ipc,
+            doc_cache,
         )
-        self._repository.upsert_trends([trend])
+        for start in starts
+    ]
+    pending = deque(futures)
+    trends: list[Trend] = []
+    try:
+        while pending:
+            trends.extend(extract_result(pending.popleft()))
+    except BaseException:
+        for future in pending:
+            discard_extract(future)
+        raise
+    return trends
+
+
+def submit_extract(
+    executor: Executor,
+    tasks: Sequence[MiningTask],
+    contents: Sequence[str],
+    max_chars: int,
+    arrow_ipc: bool,
+    doc_cache: Optional[DocCache] = None,
+) -> Future:
+    """Hand a batch to ``executor``; pass the future to ``extract_result``.
+
+    With ``arrow_ipc`` the batch travels as an Arrow batch in shared memory
+    instead of pickled dataclasses, and so do the resulting trends. A
+    ``doc_cache`` is pickled by path and reopened by the worker.
+    """
+    if not arrow_ipc:
+        return executor.submit(
+            _extract_function(max_chars, doc_cache), list(tasks), list(contents)
+        )
+    handle = share_batch(tasks_to_batch(tasks, contents))
+    future = executor.submit(_extract_shared, handle, max_chars, doc_cache)
+    future.add_done_callback(lambda _: release(handle))
+    return future
+
+
+def extract_result(future: Future) -> list[Trend]:
+    """Return the trends of a batch handed over by ``submit_extract``."""
+    result = future.result()
+    if not isinstance(result, SharedBatch):
+        return result
+    try:
+        return read_shared(result, trends_from_batch)
+    finally:
+        release(result)
+
+
+def discard_extract(future: Future) -> None:
+    """Cancel a batch of ``submit_extract`` whose trends are not needed.
+
+    A batch that is already running still finishes; its result segment is
+    released once it does.
+    """
+    if not future.cancel():
+        future.add_done_callback(_release_result)
+
+
+def _release_result(future: Future) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    result = future.result()
+    if isinstance(result, SharedBatch):
+        release(result)
+
+
+def _extract_function(
+    max_chars: int, doc_cache: Optional[DocCache]
+) -> partial[list[Trend]]:
+    if doc_cache is None:
+        return partial(extract_trends, max_chars=max_chars)
+    return partial(extract_trends, max_chars=max_chars, doc_cache=doc_cache)
+
+
+def _extract_shared(
+    handle: SharedBatch, max_chars: int, doc_cache: Optional[DocCache] = None
+) -> SharedBatch:
+    # Runs in the worker process; the parent releases both segments.
+    rows, contents = read_shared(handle, task_rows)
+    tasks = [MiningTask(**row) for row in rows]
+    trends = _extract_function(max_chars, doc_cache)(tasks, contents)
+    return share_batch(trends_to_batch(trends))
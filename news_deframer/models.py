@@ -0,0 +1,89 @@
+"""Records shared by the repositories, the miner and the exporters."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+
+
+@dataclass
+class Feed:
+    id: UUID
+    url: str
+    categories: list[str] = field(default_factory=list)
+    language: Optional[str] = None
+    root_domain: Optional[str] = None
+    # Owner of the mining lock taken by begin_mine_update.
+    lock_token: Optional[UUID] = None
+
+
+@dataclass
+class Item:
+    id: UUID
+    feed_id: UUID
+    content: str
+    pub_date: datetime
+    categories: list[str] = field(default_factory=list)
+    language: Optional[str] = None
+
+
+@dataclass
+class Trend:
+    item_id: UUID
+    feed_id: UUID
+    language: str
+    pub_date: datetime
+    root_domain: str
+    category_stems: list[str] = field(default_factory=list)
+    noun_stems: list[str] = field(default_factory=list)
+    verb_stems: list[str] = field(default_factory=list)
+    adjective_stems: list[str] = field(default_factory=list)
+
+
+@dataclass
+class ContentStems:
+    content_hash: str
+    language: str
+    noun_stems: list[str] = field(default_factory=list)
+    verb_stems: list[str] = field(default_factory=list)
+    adjective_stems: list[str] = field(default_factory=list)
+
+
+@dataclass
+class UpsertStats:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+
+def as_utc(value: datetime) -> datetime:
+    """Return ``value`` in UTC; naive values are taken to be UTC already."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def normalize_language_value(value: Optional[str]) -> Optional[str]:
+    """Return the two-letter code of a feed or item language, if any."""
+    if not isinstance(value, str):
+        return None
+    stripped = value.strip().lower()
+    filtered = "".join(ch for ch in stripped if ch.isalpha())
+    if len(filtered) >= 2:
+        return filtered[:2]
+    if len(stripped) >= 2:
+        return stripped[:2]
+    return None
+
+
+def dedupe_trends(trends: list[Trend]) -> list[Trend]:
+    """Keep the last trend of each item.
+
+    A single ``INSERT ... ON CONFLICT`` cannot touch the same row twice.
+    """
+    unique = {trend.item_id: trend for trend in trends}
+    if len(unique) == len(trends):
+        return trends
+    return list(unique.values())
@@ -2,16 +2,46 @@
 
 from __future__ import annotations
 
+import hashlib
+import importlib.metadata
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import shutil
 from typing import TYPE_CHECKING, Any, Iterable, Optional, Sequence
 from bs4 import BeautifulSoup
 
+from news_deframer.doc_cache import document_key
 from news_deframer.spacy_models import SPACY_LANGUAGE_MODELS
 
 try:  # pragma: no cover - optional dependency
     import spacy
+    from spacy.tokens import DocBin
 except Exception:  # pragma: no cover - optional dependency
     spacy = None  # type: ignore[assignment]
 
+# Bump whenever the POS or stopword filtering changes the stems produced for
+# the same text, so content-hash caches do not serve outdated stems.
+STEM_RULES_VERSION = 1
+
+# Components the stem extraction never uses. They are disabled when loading
+# an installed model and left out of snapshots entirely.
+UNUSED_COMPONENTS = ("ner",)
+
+# Token attributes kept by docs_to_bytes: everything _stems_from_doc reads
+# besides the lexeme flags, which come from the model's vocabulary. Entities
+# are not kept; "ner" never runs (UNUSED_COMPONENTS), so re-derived stems
+# cannot depend on them either.
+DOC_ATTRS = ("ORTH", "LEMMA", "POS")
+
+# Bump whenever the snapshot layout changes.
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_META_FILE = "snapshot.json"
+
+logger = logging.getLogger(__name__)
+
 if TYPE_CHECKING:  # pragma: no cover - typing only
     from spacy.language import Language as SpacyLanguage
 else:  # pragma: no cover - runtime fallback
@@ -40,24 +70,230 @@ def extract_stems(
     except Exception as exc:
         raise RuntimeError("Failed to process text with spaCy model") from exc
 
-    # Thesis: Nouns (Triggers) include common nouns and Proper Nouns (Entities)
-    noun_stems = _collect_sorted_unique_stems(doc, {"NOUN", "PROPN"}, language)
+    return _stems_from_doc(doc, language)
 
-    # Thesis: Verbs are 'Diversificators' indicating action
-    verb_stems = _collect_sorted_unique_stems(doc, {"VERB"}, language)
 
-    # Thesis: Adjectives are 'Diversificators' indicating sentiment/direction
-    adj_stems = _collect_sorted_unique_stems(doc, {"ADJ"}, language)
+def extract_stems_batch(
+    contents: Sequence[str],
+    language: str,
+    batch_size: int = 64,
+    max_chars: int = 0,
+    doc_bytes: Optional[list[Optional[bytes]]] = None,
+) -> list[tuple[Sequence[str], Sequence[str], Sequence[str]]]:
+    """
+    Return noun, verb, and adjective lemmas for each entry of ``contents``.
 
-    return noun_stems, verb_stems, adj_stems
+    All texts share one language, so they are streamed through ``nlp.pipe``
+    instead of invoking the model once per text. The result preserves the
+    order of ``contents``; blank entries yield empty stem lists.
+
+    With ``max_chars`` set, longer texts are split by ``split_content`` and
+    their pieces run through the same ``nlp.pipe`` pass; the stems of all
+    pieces are merged.
+
+    With ``doc_bytes`` given (one slot per entry of ``contents``), the docs of
+    every entry are also serialized into it by ``docs_to_bytes``.
+    """
+    results: list[tuple[Sequence[str], Sequence[str], Sequence[str]]] = [
+        ([], [], []) for _ in contents
+    ]
+    owners: list[int] = []
+    pieces: list[str] = []
+    for index, content in enumerate(contents):
+        for piece in split_content(content, max_chars):
+            owners.append(index)
+            pieces.append(piece)
+    if not pieces:
+        return results
+
+    nlp = _get_spacy_model(language)
+
+    stems: dict[int, list[tuple[Sequence[str], Sequence[str], Sequence[str]]]] = {}
+    docs_by_index: dict[int, list[Any]] = {}
+    try:
+        docs = nlp.pipe(pieces, batch_size=batch_size)
+        for index, doc in zip(owners, docs):
+            stems.setdefault(index, []).append(_stems_from_doc(doc, language))
+            if doc_bytes is not None:
+                docs_by_index.setdefault(index, []).append(doc)
+    except Exception as exc:
+        raise RuntimeError("Failed to process text with spaCy model") from exc
+
+    for index, piece_stems in stems.items():
+        results[index] = _merge_stems(piece_stems)
+    if doc_bytes is not None:
+        for index, piece_docs in docs_by_index.items():
+            doc_bytes[index] = docs_to_bytes(piece_docs)
+    return results
+
+
+def _merge_stems(
+    piece_stems: Iterable[tuple[Sequence[str], Sequence[str], Sequence[str]]],
+) -> tuple[Sequence[str], Sequence[str], Sequence[str]]:
+    nouns: set[str] = set()
+    verbs: set[str] = set()
+    adjs: set[str] = set()
+    for noun_stems, verb_stems, adj_stems in piece_stems:
+        nouns.update(noun_stems)
+        verbs.update(verb_stems)
+        adjs.update(adj_stems)
+    return sorted(nouns), sorted(verbs), sorted(adjs)
+
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+# Elements after which sanitize_text keeps a paragraph break.
+_BLOCK_TAGS = (
+    "p",
+    "div",
+    "li",
+    "blockquote",
+    "pre",
+    "section",
+    "article",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+)
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_content(content: str, max_chars: int) -> list[str]:
+    """Split ``content`` into pieces of at most ``max_chars`` characters.
+
+    Paragraphs are kept whole where they fit, then sentences; only a sentence
+    longer than ``max_chars`` is cut at whitespace. Consecutive small units are
+    packed back together. ``max_chars <= 0`` disables splitting.
+    """
+    text = content.strip()
+    if not text:
+        return []
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [text]
+
+    units: list[str] = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= max_chars:
+            units.append(paragraph)
+            continue
+        for sentence in _SENTENCE_BREAK.split(paragraph):
+            if len(sentence) <= max_chars:
+                units.append(sentence)
+            else:
+                units.extend(_pack(sentence.split(), max_chars, " "))
+    return _pack([unit for unit in units if unit], max_chars, "\n")
+
+
+def _pack(units: Iterable[str], max_chars: int, separator: str) -> list[str]:
+    pieces: list[str] = []
+    current = ""
+    for unit in units:
+        # A single word longer than the budget is cut hard.
+        while len(unit) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(unit[:max_chars])
+            unit = unit[max_chars:]
+        if current and len(current) + len(separator) + len(unit) <= max_chars:
+            current = f"{current}{separator}{unit}"
+            continue
+        if current:
+            pieces.append(current)
+        current = unit
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def content_hash(content: str, language: str) -> str:
+    """Return a digest identifying the stems ``content`` yields in ``language``.
+
+    The text is lowercased and its whitespace collapsed, so syndicated copies
+    that only differ in formatting share a hash. The spaCy model version and
+    ``STEM_RULES_VERSION`` are part of the digest, so upgrading the model or
+    changing the stem rules invalidates previously stored stems.
+    """
+    return document_content_hash(document_key(content, language), language)
+
+
+def document_content_hash(doc_key: str, language: str) -> str:
+    """Return the ``content_hash`` of the text with the given ``document_key``."""
+    key = f"{pipeline_version(language)}\x1f{doc_key}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def pipeline_version(language: str) -> str:
+    """Return an identifier of the model and rules that produce stems."""
+    return f"{model_version(language)}/rules-{STEM_RULES_VERSION}"
+
+
+def model_version(language: str) -> str:
+    """Return an identifier of the spaCy model annotating ``language`` texts."""
+    lang_code = (language or "").split("-")[0].lower()
+    cached = _VERSION_CACHE.get(lang_code)
+    if cached is not None:
+        return cached
+
+    # The installed package names the model without loading it, so callers
+    # that only need a cache key (content_hash) do not pay for the pipeline.
+    model_name = SPACY_LANGUAGE_MODELS.get(lang_code)
+    installed = _installed_model_version(model_name) if model_name else None
+    if installed:
+        version = f"{model_name}-{installed}"
+        _VERSION_CACHE[lang_code] = version
+        return version
+
+    nlp = _get_spacy_model(lang_code)
+    meta = getattr(nlp, "meta", None) or {}
+    version = (
+        f"{meta.get('lang', lang_code)}_{meta.get('name', '')}"
+        f"-{meta.get('version', '')}"
+    )
+    _VERSION_CACHE[lang_code] = version
+    return version
+
+
+def docs_to_bytes(docs: Iterable[Any]) -> bytes:
+    """Serialize the annotations stem extraction reads into a ``DocBin``."""
+    doc_bin = DocBin(attrs=list(DOC_ATTRS), store_user_data=False)
+    for doc in docs:
+        doc_bin.add(doc)
+    return doc_bin.to_bytes()
+
+
+def stems_from_bytes(
+    data: bytes, language: str
+) -> tuple[Sequence[str], Sequence[str], Sequence[str]]:
+    """Return the stems of documents serialized by ``docs_to_bytes``.
+
+    Only the vocabulary of the model is used; no pipeline component runs, so
+    changed POS or stopword rules can be applied to stored annotations.
+    """
+    vocab = _get_spacy_model(language).vocab
+    docs = DocBin().from_bytes(data).get_docs(vocab)
+    return _merge_stems([_stems_from_doc(doc, language) for doc in docs])
 
 
 def sanitize_text(value: Optional[str]) -> Optional[str]:
-    """Strip HTML tags from text using BeautifulSoup."""
+    """Strip HTML tags from text using BeautifulSoup.
+
+    Block elements end in a blank line and ``<br>`` in a line break, so that
+    ``split_content`` and boilerplate detection still see the paragraphs.
+    """
 
     if value is None:
         return None
-    return BeautifulSoup(value, "html.parser").get_text()
+    soup = BeautifulSoup(value, "html.parser")
+    for line_break in soup.find_all("br"):
+        line_break.replace_with("\n")
+    for block in soup.find_all(_BLOCK_TAGS):
+        block.insert_after("\n\n")
+    return soup.get_text().strip()
 
 
 def stem_category(text: Optional[str], language: str) -> Optional[str]:
@@ -86,6 +322,7 @@ def stem_category(text: Optional[str], language: str) -> Optional[str]:
 
 _NLP_CACHE: dict[str, SpacyLanguage] = {}
 _STOPWORD_CACHE: dict[str, frozenset[str]] = {}
+_VERSION_CACHE: dict[str, str] = {}
 
 
 def _get_spacy_model(language: str) -> SpacyLanguage:
@@ -101,15 +338,103 @@ def _get_spacy_model(language: str) -> SpacyLanguage:
     if model_name in _NLP_CACHE:
         return _NLP_CACHE[model_name]
 
-    try:
-        model = spacy.load(model_name, disable=("ner",))
-    except Exception as exc:  # pragma: no cover - propagate failure gracefully
-        raise RuntimeError(f"Failed to load spaCy model '{model_name}'") from exc
+    # Example ENV: SPACY_SNAPSHOT_DIR=/var/cache/spacy-snapshots
+    snapshot_dir = os.environ.get("SPACY_SNAPSHOT_DIR")
+    model = None
+    if snapshot_dir:
+        model = _load_snapshot(Path(snapshot_dir), model_name, lang_code)
+    if model is None:
+        try:
+            model = spacy.load(model_name, disable=UNUSED_COMPONENTS)
+        except Exception as exc:  # pragma: no cover - propagate failure gracefully
+            raise RuntimeError(f"Failed to load spaCy model '{model_name}'") from exc
 
     _NLP_CACHE[model_name] = model
     return model
 
 
+def save_snapshot(language: str, directory: Path) -> Path:
+    """Serialize the lean pipeline and stopwords of ``language`` for warm starts.
+
+    The snapshot is written to ``directory/<model name>`` and records the
+    spaCy, model and stem rule versions it was built with; ``_get_spacy_model``
+    only loads it while they still match.
+    """
+    if spacy is None:
+        raise RuntimeError("spaCy is required but not installed")
+
+    lang_code = (language or "").split("-")[0].lower()
+    model_name = SPACY_LANGUAGE_MODELS.get(lang_code)
+    if not model_name:
+        raise RuntimeError(f"No spaCy model available for language '{language}'")
+
+    try:
+        nlp = spacy.load(model_name, exclude=UNUSED_COMPONENTS)
+    except Exception as exc:
+        raise RuntimeError(f"Failed to load spaCy model '{model_name}'") from exc
+
+    target = directory / model_name
+    tmp_target = directory / f".{model_name}.tmp"
+    shutil.rmtree(tmp_target, ignore_errors=True)
+    tmp_target.mkdir(parents=True)
+    nlp.to_disk(tmp_target / "pipeline")
+    (tmp_target / "stopwords.json").write_text(
+        json.dumps(sorted(_get_stopwords(lang_code)), ensure_ascii=False)
+    )
+    (tmp_target / SNAPSHOT_META_FILE).write_text(
+        json.dumps(_snapshot_versions(model_name, nlp.meta.get("version")))
+    )
+    shutil.rmtree(target, ignore_errors=True)
+    tmp_target.rename(target)
+    return target
+
+
+def _snapshot_versions(
+    model_name: str, model_version: Optional[str]
+) -> dict[str, object]:
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "spacy_version": getattr(spacy, "__version__", None),
+        "model": model_name,
+        "model_version": model_version,
+        "rules_version": STEM_RULES_VERSION,
+    }
+
+
+def _installed_model_version(model_name: str) -> Optional[str]:
+    try:
+        return importlib.metadata.version(model_name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def _load_snapshot(
+    directory: Path, model_name: str, lang_code: str
+) -> Optional[SpacyLanguage]:
+    path = directory / model_name
+    try:
+        meta = json.loads((path / SNAPSHOT_META_FILE).read_text())
+    except (OSError, ValueError):
+        return None
+
+    installed = _installed_model_version(model_name)
+    expected = _snapshot_versions(model_name, installed or meta.get("model_version"))
+    if meta != expected:
+        logger.info("Ignoring outdated spaCy snapshot %s", path)
+        return None
+
+    try:
+        nlp = spacy.load(path / "pipeline")
+        stopwords = json.loads((path / "stopwords.json").read_text())
+    except Exception as exc:
+        logger.warning("Failed to load spaCy snapshot %s", path, exc_info=exc)
+        return None
+
+    _STOPWORD_CACHE.setdefault(lang_code, frozenset(stopwords))
+    logger.debug("Loaded spaCy snapshot %s", path)
+    return nlp
+
+
 def _get_stopwords(language: str) -> frozenset[str]:
     if spacy is None:
         raise RuntimeError("spaCy is required but not installed")
@@ -142,6 +467,21 @@ def _is_stop_word(value: str, language: str) -> bool:
     return value.lower() in _get_stopwords(language)
 
 
+def _stems_from_doc(
+    doc: Iterable[Any], language: str
+) -> tuple[Sequence[str], Sequence[str], Sequence[str]]:
+    # Thesis: Nouns (Triggers) include common nouns and Proper Nouns (Entities)
+    noun_stems = _collect_sorted_unique_stems(doc, {"NOUN", "PROPN"}, language)
+
+    # Thesis: Verbs are 'Diversificators' indicating action
+    verb_stems = _collect_sorted_unique_stems(doc, {"VERB"}, language)
+
+    # Thesis: Adjectives are 'Diversificators' indicating sentiment/direction
+    adj_stems = _collect_sorted_unique_stems(doc, {"ADJ"}, language)
+
+    return noun_stems, verb_stems, adj_stems
+
+
 def _collect_sorted_unique_stems(
     tokens: Iterable[Any],
     allowed_pos: set[str],
@@ -2,54 +2,120 @@
 
 from __future__ import annotations
 
-from html.parser import HTMLParser
+from dataclasses import dataclass
 import logging
 import signal
 import time
 from types import FrameType
-from typing import Any, Optional, cast
+from typing import Optional, cast
 from uuid import UUID
 
 from news_deframer.config import (
+    BACKLOG_RESCHEDULE_DELAY,
     DEFAULT_LOCK_DURATION,
     IDLE_SLEEP_TIME,
+    LOCK_HEARTBEAT_INTERVAL,
+    MINING_CHUNK_SIZE,
     POLLING_INTERVAL,
     Config,
 )
-from news_deframer.netutil import get_root_domain
-from news_deframer.postgres import Feed, Item, Postgres
-from news_deframer.miner import Miner, MiningTask
+from news_deframer.heartbeat import LockHeartbeat
+from news_deframer.miner import Miner, MiningTask, build_task
+from news_deframer.models import Feed
+from news_deframer.postgres import Postgres
+from news_deframer.repository import MiningRepository
+from news_deframer.watchdog import MemoryWatchdog
 
 logger = logging.getLogger(__name__)
 
 
-def poll(config: Config) -> None:
+# Granularity at which ShutdownFlag.wait notices a shutdown request.
+_SHUTDOWN_WAIT_STEP = 0.5
+
+
+class ShutdownFlag:
+    """Shutdown request that can safely be set from a signal handler.
+
+    ``threading.Event.set`` takes a lock and can deadlock when the handler
+    interrupts the main thread inside ``Event.wait``; a plain attribute can't.
+    """
+
+    def __init__(self) -> None:
+        self._set = False
+
+    def set(self) -> None:
+        self._set = True
+
+    def is_set(self) -> bool:
+        return self._set
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to ``timeout`` seconds and return early on a request."""
+        deadline = time.monotonic() + timeout
+        while not self._set:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, _SHUTDOWN_WAIT_STEP))
+        return self._set
+
+
+def poll(config: Config, repository: Optional[MiningRepository] = None) -> bool:
+    """Mine due feeds until shutdown.
+
+    ``repository`` defaults to ``Postgres``; any ``MiningRepository`` such as
+    ``SQLiteRepository`` can be passed instead. Returns ``True`` when the
+    memory watchdog asked for the worker to be recycled; the feed in progress
+    has been released at that point.
+    """
     logger.info("Miner poll started. Press Ctrl+C to exit.")
     logger.debug("Loaded configuration: log level=%s", config.log_level)
 
-    repository = Postgres(config)
+    if repository is None:
+        repository = Postgres(config)
     miner = Miner(config, repository=repository)
+    watchdog = MemoryWatchdog(
+        max_rss_bytes=config.max_rss_mb * 1024 * 1024,
+        max_items=config.max_items_per_process,
+        trace_top=config.tracemalloc_top,
+    )
 
-    previous_sigterm = _install_sigterm_handler()
+    started = time.monotonic()
+    first_item_logged = False
+    shutdown = ShutdownFlag()
+    previous_handlers = _install_sigterm_handler(shutdown, config.shutdown_timeout)
     try:
-        while True:
-            if poll_next_feed(config, miner, repository):
+        while not shutdown.is_set():
+            if poll_next_feed(config, miner, repository, shutdown=shutdown):
                 logger.info("A feed was mined")
+                if not first_item_logged and miner.items_mined:
+                    first_item_logged = True
+                    logger.info(
+                        "Time to first mined item: %.2fs", time.monotonic() - started
+                    )
+                if reason := watchdog.check(miner.items_mined):
+                    logger.warning("Recycling worker: %s", reason)
+                    return True
                 continue
 
             logger.info("Sleeping... duration=%s", IDLE_SLEEP_TIME)
-            time.sleep(IDLE_SLEEP_TIME)
+            shutdown.wait(IDLE_SLEEP_TIME)
+        logger.info("Poll shut down gracefully. Exiting.")
     except KeyboardInterrupt:
         logger.info("Poll interrupted. Exiting.")
     finally:
-        _restore_sigterm_handler(previous_sigterm)
+        _restore_sigterm_handler(previous_handlers)
+    return False
 
 
 def poll_next_feed(
-    config: Config, miner: Miner, repository: Optional[Any] = None
+    config: Config,
+    miner: Miner,
+    repository: Optional[MiningRepository] = None,
+    shutdown: Optional[ShutdownFlag] = None,
 ) -> bool:
-    repo = repository or Postgres(config)
-    logger.info("poll_next_feed")
+    repo: MiningRepository = repository or Postgres(config)
+    logger.debug("poll_next_feed")
 
     try:
         feed = repo.begin_mine_update(DEFAULT_LOCK_DURATION)
@@ -60,144 +126,308 @@ def poll_next_feed(
     if feed is None:
         return False
 
+    result: Optional[FeedPollResult] = None
+    heartbeat = LockHeartbeat(
+        repo,
+        feed.id,
+        DEFAULT_LOCK_DURATION,
+        LOCK_HEARTBEAT_INTERVAL,
+        max_idle=config.lock_idle_timeout,
+        lock_token=feed.lock_token,
+    )
     try:
-        poll_feed(feed, miner, repo)
+        with heartbeat:
+            result = poll_feed(
+                feed,
+                miner,
+                repo,
+                heartbeat=heartbeat,
+                max_items=config.mining_budget_items or None,
+                max_seconds=config.mining_budget_seconds or None,
+                shutdown=shutdown,
+            )
+    except KeyboardInterrupt:
+        # Hard interrupt in the middle of a chunk: hand the feed over to
+        # another worker right away instead of leaving it locked.
+        logger.warning(
+            "Interrupted while mining; releasing feed lock",
+            extra={"feed_id": str(feed.id)},
+        )
+        _end_feed_update(
+            repo, feed.id, BACKLOG_RESCHEDULE_DELAY, lock_token=feed.lock_token
+        )
+        raise
     except Exception as exc:  # pragma: no cover - mining failure path
         logger.error(
             "Feed mining failed", extra={"feed_id": str(feed.id)}, exc_info=exc
         )
 
+    if heartbeat.lost:
+        # Another worker may own the feed by now: its lock and schedule are
+        # left alone, and an unclaimed feed is picked up once the lock expired.
+        logger.warning(
+            "Lost the feed lock; leaving release and schedule to its next claim",
+            extra={"feed_id": str(feed.id)},
+        )
+        return True
+
+    polling_interval = POLLING_INTERVAL
+    pending_items = result.pending if result is not None else None
+    if result is not None and (result.budget_exhausted or result.interrupted):
+        # The backlog is not drained: come back soon, but behind the feeds
+        # that are already due. The partial yield is no arrival rate sample.
+        polling_interval = BACKLOG_RESCHEDULE_DELAY
+        pending_items = None
+
+    _end_feed_update(
+        repo,
+        feed.id,
+        polling_interval,
+        pending_items=pending_items,
+        mined_items=result.mined if result is not None else None,
+        lock_token=feed.lock_token,
+    )
+    return True
+
+
+def _end_feed_update(
+    repo: MiningRepository,
+    feed_id: UUID,
+    polling_interval: int,
+    pending_items: Optional[int] = None,
+    mined_items: Optional[int] = None,
+    lock_token: Optional[UUID] = None,
+) -> None:
     try:
-        repo.end_mine_update(feed.id, POLLING_INTERVAL)
+        repo.end_mine_update(
+            feed_id,
+            polling_interval,
+            pending_items=pending_items,
+            mined_items=mined_items,
+            lock_token=lock_token,
+        )
     except Exception as exc:  # pragma: no cover - db failure path
         logger.error(
             "Failed to end feed update",
-            extra={"feed_id": str(feed.id)},
+            extra={"feed_id": str(feed_id)},
             exc_info=exc,
         )
 
-    return True
 
-
-def poll_feed(feed: Feed, miner: Miner, repository: Any) -> Optional[Exception]:
-    items = repository.fetch_pending_items(feed.id, feed.url)
+@dataclass(slots=True)
+class FeedPollResult:
+    pending: int = 0
+    mined: int = 0
+    failed: int = 0
+    error: Optional[Exception] = None
+    budget_exhausted: bool = False
+    interrupted: bool = False
+
+
+def poll_feed(
+    feed: Feed,
+    miner: Miner,
+    repository: MiningRepository,
+    heartbeat: Optional[LockHeartbeat] = None,
+    max_items: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    shutdown: Optional[ShutdownFlag] = None,
+) -> FeedPollResult:
+    """Mine the pending items of ``feed`` in committed chunks.
+
+    Every chunk of ``MINING_CHUNK_SIZE`` items is upserted in its own
+    transaction and reported to ``heartbeat`` as progress, which keeps the
+    feed lock alive; so is every item of a retried chunk. Mining stops early
+    once the heartbeat lost the lock.
+
+    A failing chunk is retried item by item; items that still fail are
+    handed to ``repository.quarantine_item`` and the rest of the feed is
+    mined normally. If every item of the chunk fails again, the cause is not
+    the items (e.g. the database is down): nothing is quarantined and mining
+    of the feed stops. ``error`` holds the last failure.
+
+    At most ``max_items`` items, oldest first, are mined per call, and no new
+    chunk is started after ``max_seconds``. ``budget_exhausted`` is set on the
+    result when either bound left pending items behind. Once ``shutdown`` is
+    set, the chunk in progress is finished and ``interrupted`` is set instead.
+    """
+    # One extra row tells whether the item budget leaves anything behind.
+    limit = max_items + 1 if max_items is not None else None
+    items = repository.fetch_pending_items(feed.id, feed.url, limit=limit)
     items = [item for item in items if item.feed_id == feed.id]
     feed_label = feed.url or str(feed.id)
+    result = FeedPollResult(pending=len(items))
     if not items:
         logger.info("No pending items to mine for feed %s", feed_label)
-        return None
+        return result
 
     logger.info("Fetched %s pending items for feed %s", len(items), feed_label)
-    for item in items:
-        try:
-            task = _build_task(feed, item)
-            # logger.debug(
-            #     "Mining item %s | Title: %s | Description: %s",
-            #     item.id,
-            #     task.title,
-            #     task.description,
-            # )
-            miner.mine_item(task)
-        except Exception as exc:  # pragma: no cover - per-item failure
-            logger.error(
-                "Failed to process item",
-                extra={
-                    "feed_url": feed.url,
-                    "item_id": str(item.id),
-                },
-                exc_info=exc,
+    if max_items is not None and len(items) > max_items:
+        items = items[:max_items]
+        result.budget_exhausted = True
+
+    started = time.monotonic()
+    for start in range(0, len(items), MINING_CHUNK_SIZE):
+        if shutdown is not None and shutdown.is_set():
+            logger.info(
+                "Shutdown requested; leaving %s items of feed %s for later",
+                len(items) - start,
+                feed_label,
             )
-            return exc
+            result.interrupted = True
+            break
+
+        if start and max_seconds is not None:
+            if time.monotonic() - started >= max_seconds:
+                logger.info(
+                    "Mining budget of %ss used up for feed %s; requeueing",
+                    max_seconds,
+                    feed_label,
+                )
+                result.budget_exhausted = True
+                break
+
+        if heartbeat is not None and heartbeat.lost:
+            logger.warning(
+                "Lost the lock of feed %s; leaving %s items for the next claim",
+                feed_label,
+                len(items) - start,
+            )
+            break
+
+        tasks = []
+        for item in items[start : start + MINING_CHUNK_SIZE]:
+            try:
+                tasks.append(build_task(feed, item))
+            except Exception as exc:  # pragma: no cover - per-item failure
+                _quarantine_item(feed, item.id, exc, repository, result)
+
+        try:
+            miner.mine_items(tasks)
+            result.mined += len(tasks)
+        except Exception as exc:
+            if len(tasks) <= 1:
+                for task in tasks:
+                    _quarantine_item(feed, task.item_id, exc, repository, result)
+            else:
+                logger.warning(
+                    "Failed to process item chunk; retrying items one by one",
+                    extra={"feed_url": feed.url},
+                    exc_info=exc,
+                )
+                if not _retry_items(feed, tasks, miner, repository, heartbeat, result):
+                    logger.error(
+                        "Every item of the chunk failed; stopping feed %s",
+                        feed_label,
+                        exc_info=exc,
+                    )
+                    result.error = exc
+                    break
+
+        if heartbeat is not None:
+            heartbeat.touch()
+
+    return result
+
+
+def _retry_items(
+    feed: Feed,
+    tasks: list[MiningTask],
+    miner: Miner,
+    repository: MiningRepository,
+    heartbeat: Optional[LockHeartbeat],
+    result: FeedPollResult,
+) -> bool:
+    # Returns False, quarantining nothing, when no item could be mined.
+    failures: list[tuple[UUID, Exception]] = []
+    for task in tasks:
+        try:
+            miner.mine_items([task])
+            result.mined += 1
+        except Exception as item_exc:
+            failures.append((task.item_id, item_exc))
+        if heartbeat is not None:
+            heartbeat.touch()
+    if len(failures) == len(tasks):
+        return False
+    for item_id, error in failures:
+        _quarantine_item(feed, item_id, error, repository, result)
+    return True
+
+
+def _quarantine_item(
+    feed: Feed,
+    item_id: UUID,
+    exc: Exception,
+    repository: MiningRepository,
+    result: FeedPollResult,
+) -> None:
+    logger.error(
+        "Failed to process item",
+        extra={
+            "feed_url": feed.url,
+            "item_id": str(item_id),
+        },
+        exc_info=exc,
+    )
+    result.failed += 1
+    result.error = exc
+    try:
+        repository.quarantine_item(item_id, feed.id, repr(exc))
+    except Exception as db_exc:  # pragma: no cover - db failure path
+        logger.error(
+            "Failed to quarantine item",
+            extra={"item_id": str(item_id)},
+            exc_info=db_exc,
+        )
 
-    return None
 
+def _install_sigterm_handler(
+    shutdown: ShutdownFlag, timeout: int
+) -> dict[signal.Signals, signal.Handlers]:
+    """Turn SIGTERM into a shutdown request with a hard deadline.
 
-def _install_sigterm_handler() -> signal.Handlers | None:
+    The worker finishes its current chunk and releases its feed. If that takes
+    longer than ``timeout`` seconds, SIGALRM interrupts it; a second SIGTERM
+    interrupts it immediately.
+    """
     if not hasattr(signal, "SIGTERM"):
-        return None
+        return {}
 
-    previous = signal.getsignal(signal.SIGTERM)
+    previous = {signal.SIGTERM: cast(signal.Handlers, signal.getsignal(signal.SIGTERM))}
 
     def _handle_sigterm(signum: int, _: Optional[FrameType]) -> None:
         try:
             signal_name = signal.Signals(signum).name
         except ValueError:  # pragma: no cover - unexpected signal value
             signal_name = str(signum)
-        logger.info("Received %s; initiating graceful shutdown", signal_name)
+        if shutdown.is_set():
+            logger.warning("Received %s again; exiting immediately", signal_name)
+            raise KeyboardInterrupt
+        logger.info(
+            "Received %s; initiating graceful shutdown (deadline %ss)",
+            signal_name,
+            timeout,
+        )
+        shutdown.set()
+        if hasattr(signal, "SIGALRM") and timeout > 0:
+            signal.alarm(timeout)
+
+    def _handle_deadline(signum: int, _: Optional[FrameType]) -> None:
+        logger.warning("Graceful shutdown deadline exceeded; interrupting")
         raise KeyboardInterrupt
 
     signal.signal(signal.SIGTERM, _handle_sigterm)
-    return cast(signal.Handlers, previous)
-
-
-def _restore_sigterm_handler(previous: signal.Handlers | None) -> None:
-    if previous is None or not hasattr(signal, "SIGTERM"):
-        return
-    signal.signal(signal.SIGTERM, previous)
-
-
-def _build_task(feed: Feed, item: Item) -> MiningTask:
-    language = item.language or feed.language or "en"
-    if language == "en" and not (item.language or feed.language):
-        logger.warning(
-            "Missing language metadata; falling back to 'en'",
-            extra={"feed_url": feed.url, "item_id": str(item.id)},
+    if hasattr(signal, "SIGALRM"):
+        previous[signal.SIGALRM] = cast(
+            signal.Handlers, signal.getsignal(signal.SIGALRM)
         )
-
-    categories = sorted({*feed.categories, *item.categories})
-    domain = feed.root_domain or get_root_domain(feed.url)
-    title, description = _extract_title_and_description(item.content, item_id=item.id)
-    return MiningTask(
-        feed_id=feed.id,
-        feed_url=feed.url,
-        root_domain=domain,
-        item_id=item.id,
-        language=language,
-        categories=categories,
-        title=title,
-        description=description,
-        pub_date=item.pub_date,
-    )
+        signal.signal(signal.SIGALRM, _handle_deadline)
+    return previous
 
 
-class _DeframerParser(HTMLParser):
-    def __init__(self) -> None:
-        super().__init__()
-        self.data: dict[str, Optional[str]] = {
-            "deframer:title_original": None,
-            "deframer:description_original": None,
-        }
-        self._current: Optional[str] = None
-        self._buffer: list[str] = []
-
-    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
-        if tag in self.data:
-            self._current = tag
-            self._buffer = []
-
-    def handle_endtag(self, tag: str) -> None:
-        if tag == self._current:
-            self.data[tag] = "".join(self._buffer).strip() or None
-            self._current = None
-
-    def handle_data(self, data: str) -> None:
-        if self._current:
-            self._buffer.append(data)
-
-
-def _extract_title_and_description(
-    content: str, item_id: Optional[UUID] = None
-) -> tuple[Optional[str], Optional[str]]:
-    parser = _DeframerParser()
-    try:
-        parser.feed(content)
-        parser.close()
-    except Exception as exc:
-        if item_id:
-            logger.error(
-                "Failed to parse content", extra={"item_id": str(item_id)}, exc_info=exc
-            )
-        return None, None
-    return parser.data["deframer:title_original"], parser.data[
-        "deframer:description_original"
-    ]
+def _restore_sigterm_handler(previous: dict[signal.Signals, signal.Handlers]) -> None:
+    if hasattr(signal, "SIGALRM") and signal.SIGALRM in previous:
+        signal.alarm(0)
+    for signum, handler in previous.items():
+        signal.signal(signum, handler)
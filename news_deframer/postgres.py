@@ -3,48 +3,35 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Optional
-from uuid import UUID
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Generator, Iterable, Optional, Sequence
+from uuid import UUID, uuid4
 
 import psycopg2
 from psycopg2.extras import execute_values, register_uuid
 
-from news_deframer.config import Config
+from news_deframer.config import (
+    PRIORITY_AGE_SCALE,
+    PRIORITY_BACKLOG_WEIGHT,
+    SCHEDULING_MODE_PRIORITY,
+    STEM_CACHE_SIZE,
+    STEM_STORAGE_DICTIONARY,
+    TREND_RETENTION_DROP,
+    Config,
+)
 from news_deframer.logger import SilentLogger
-
-
-@dataclass
-class Feed:
-    id: UUID
-    url: str
-    categories: list[str] = field(default_factory=list)
-    language: Optional[str] = None
-    root_domain: Optional[str] = None
-
-
-@dataclass
-class Item:
-    id: UUID
-    feed_id: UUID
-    content: str
-    pub_date: datetime
-    categories: list[str] = field(default_factory=list)
-    language: Optional[str] = None
-
-
-@dataclass
-class Trend:
-    item_id: UUID
-    feed_id: UUID
-    language: str
-    pub_date: datetime
-    root_domain: str
-    category_stems: list[str] = field(default_factory=list)
-    noun_stems: list[str] = field(default_factory=list)
-    verb_stems: list[str] = field(default_factory=list)
-    adjective_stems: list[str] = field(default_factory=list)
+from news_deframer.models import (
+    ContentStems,
+    Feed,
+    Item,
+    Trend,
+    UpsertStats,
+    dedupe_trends,
+    normalize_language_value,
+)
+from news_deframer.scheduling import next_polling_interval, slotted_delay
 
 
 register_uuid()
@@ -58,45 +45,62 @@ class Postgres:
     def __init__(self, config: Config):
         self.config = config
         self._conn = None
+        self._lock_conn = None
         if config.log_database:
             self._logger: logging.Logger | SilentLogger = logger.getChild("Postgres")
         else:
             self._logger = SilentLogger()
+        self._stems: Optional[StemDictionary] = None
+        if config.stem_storage == STEM_STORAGE_DICTIONARY:
+            self._stems = StemDictionary()
 
     def _get_connection(self):
         if self._conn is None or self._conn.closed:
             self._conn = psycopg2.connect(self.config.dsn)
         return self._conn
 
+    def _get_lock_connection(self):
+        # Lock renewals run on the heartbeat thread while the main connection
+        # may be inside a mining transaction, so they get their own session.
+        if self._lock_conn is None or self._lock_conn.closed:
+            self._lock_conn = psycopg2.connect(self.config.dsn)
+        return self._lock_conn
+
     def begin_mine_update(self, lock_duration: int) -> Optional[Feed]:
-        """Attempt to lock the next feed ready for mining."""
-        lock_seconds = max(int(lock_duration), 0)
-        select_sql = """
-            SELECT fs.id, f.categories, f.language, f.url, f.root_domain
-            FROM feed_schedules AS fs
-            JOIN feeds AS f ON f.id = fs.id
-            WHERE fs.next_mining_at IS NOT NULL
-              AND fs.next_mining_at <= NOW()
-              AND (fs.mining_locked_until IS NULL OR fs.mining_locked_until < NOW())
-              AND f.enabled = TRUE
-              AND f.mining = TRUE
-              AND (f.deleted_at IS NULL)
-            ORDER BY fs.next_mining_at ASC
-            LIMIT 1
-            FOR UPDATE SKIP LOCKED
+        """Attempt to lock the next feed ready for mining.
+
+        In ``priority`` scheduling mode due feeds are ranked by their maintained
+        backlog counter and the age of their oldest unmined item instead of by
+        due time alone. Feeds overdue by more than
+        ``priority_starvation_seconds`` always go first, oldest due time first,
+        so small feeds are never starved.
+
+        With ``worker_languages`` set, only feeds in those languages are
+        claimed, so the worker only loads their spaCy models. With
+        ``language_spillover`` enabled, any other due feed is claimed when no
+        feed of the worker's languages is due.
         """
+        lock_seconds = max(int(lock_duration), 0)
+        languages = sorted(set(self.config.worker_languages))
         update_sql = """
             UPDATE feed_schedules
             SET mining_locked_until = NOW() + (%s * INTERVAL '1 second'),
+                mining_locked_by = %s,
                 updated_at = NOW()
             WHERE id = %s
         """
+        lock_token = uuid4()
 
         conn = self._get_connection()
         with conn:
             with conn.cursor() as cur:
-                cur.execute(select_sql)
-                row = cur.fetchone()
+                row = self._select_due_feed(cur, languages)
+                if row is None and languages and self.config.language_spillover:
+                    row = self._select_due_feed(cur, [])
+                    if row is not None:
+                        self._logger.debug(
+                            "No feed due for %s; spilling over", ", ".join(languages)
+                        )
                 if not row:
                     self._logger.debug("No feeds eligible for mining")
                     return None
@@ -105,7 +109,7 @@ class Postgres:
                 categories = row[1] or []
                 language = row[2]
                 url = row[3]
-                cur.execute(update_sql, (lock_seconds, feed_id))
+                cur.execute(update_sql, (lock_seconds, lock_token, feed_id))
                 if url is None:
                     raise RuntimeError("Feed record missing URL")
                 feed_url = str(url)
@@ -116,17 +120,137 @@ class Postgres:
                     id=feed_id,
                     url=feed_url,
                     categories=list(categories),
-                    language=_normalize_language_value(language),
+                    language=normalize_language_value(language),
                     root_domain=root_domain,
+                    lock_token=lock_token,
+                )
+
+    def _select_due_feed(self, cur, languages: list[str]) -> Optional[tuple]:
+        params: list[object] = []
+        language_sql = ""
+        if languages:
+            # Feeds without language are mined as English (see miner.build_task).
+            language_sql = "AND LOWER(LEFT(COALESCE(f.language, 'en'), 2)) = ANY(%s)"
+            params.append(languages)
+        if self.config.scheduling_mode == SCHEDULING_MODE_PRIORITY:
+            join_sql = "LEFT JOIN feed_mining_stats AS st ON st.feed_id = fs.id"
+            order_sql = """
+                CASE
+                    WHEN fs.next_mining_at < NOW() - (%s * INTERVAL '1 second')
+                    THEN fs.next_mining_at
+                END ASC NULLS LAST,
+                LN(1 + GREATEST(COALESCE(st.pending_items, 0), 0)) * %s
+                    + COALESCE(
+                        EXTRACT(EPOCH FROM NOW() - st.oldest_pending_at), 0
+                    ) / %s DESC,
+                fs.next_mining_at ASC
+            """
+            params.extend(
+                (
+                    self.config.priority_starvation_seconds,
+                    PRIORITY_BACKLOG_WEIGHT,
+                    PRIORITY_AGE_SCALE,
                 )
+            )
+            lock_sql = "FOR UPDATE OF fs SKIP LOCKED"
+        else:
+            join_sql = ""
+            order_sql = "fs.next_mining_at ASC"
+            lock_sql = "FOR UPDATE SKIP LOCKED"
+
+        select_sql = f"""
+            SELECT fs.id, f.categories, f.language, f.url, f.root_domain
+            FROM feed_schedules AS fs
+            JOIN feeds AS f ON f.id = fs.id
+            {join_sql}
+            WHERE fs.next_mining_at IS NOT NULL
+              AND fs.next_mining_at <= NOW()
+              AND (fs.mining_locked_until IS NULL OR fs.mining_locked_until < NOW())
+              AND f.enabled = TRUE
+              AND f.mining = TRUE
+              AND (f.deleted_at IS NULL)
+              {language_sql}
+            ORDER BY {order_sql}
+            LIMIT 1
+            {lock_sql}
+        """
+        cur.execute(select_sql, params or None)
+        return cur.fetchone()
+
+    def extend_mine_lock(
+        self, feed_id: UUID, lock_duration: int, lock_token: Optional[UUID] = None
+    ) -> bool:
+        """Push the lock of a feed that is still being mined further out.
+
+        Returns ``False`` when the lock has already expired or was released,
+        or, given the ``lock_token`` of the claim, was taken over by another
+        worker; in all these cases it is not renewed.
+        """
+        lock_seconds = max(int(lock_duration), 0)
+        params: list[object] = [lock_seconds, feed_id]
+        owner_sql = ""
+        if lock_token is not None:
+            owner_sql = "AND mining_locked_by = %s"
+            params.append(lock_token)
+        sql = f"""
+            UPDATE feed_schedules
+            SET mining_locked_until = NOW() + (%s * INTERVAL '1 second'),
+                updated_at = NOW()
+            WHERE id = %s
+              AND mining_locked_until IS NOT NULL
+              AND mining_locked_until >= NOW()
+              {owner_sql}
+        """
+
+        conn = self._get_lock_connection()
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, tuple(params))
+                extended = cur.rowcount == 1
+        self._logger.debug("Extended lock of feed %s: %s", feed_id, extended)
+        return extended
 
-    def end_mine_update(self, feed_id: UUID, polling_interval: int) -> None:
-        """Release the lock and update scheduling metadata."""
-        polling_seconds = max(int(polling_interval), 0)
+    def end_mine_update(
+        self,
+        feed_id: UUID,
+        polling_interval: int,
+        pending_items: Optional[int] = None,
+        mined_items: Optional[int] = None,
+        lock_token: Optional[UUID] = None,
+    ) -> None:
+        """Release the lock and update scheduling metadata.
+
+        Given the ``lock_token`` of the claim, nothing is changed once another
+        worker took the feed over.
+
+        ``pending_items`` is the number of items the finished claim found; it
+        is only passed when the claim saw the feed's whole backlog. With
+        ``adaptive_polling`` enabled it replaces ``polling_interval`` by an
+        interval derived from the feed's recent arrival rate. The maintained
+        backlog counter becomes ``pending_items - mined_items`` then, and is
+        otherwise decremented by ``mined_items``. With
+        ``schedule_slotting`` enabled, the next run is moved onto the feed's
+        slot of the interval (see ``scheduling.slotted_delay``).
+        """
+        polling_seconds: float = max(int(polling_interval), 0)
 
         conn = self._get_connection()
         with conn:
             with conn.cursor() as cur:
+                if lock_token is not None:
+                    cur.execute(
+                        """
+                        SELECT 1 FROM feed_schedules
+                        WHERE id = %s AND mining_locked_by = %s
+                        FOR UPDATE
+                        """,
+                        (feed_id, lock_token),
+                    )
+                    if cur.fetchone() is None:
+                        self._logger.debug(
+                            "Feed %s was claimed by another worker", feed_id
+                        )
+                        return
                 cur.execute(
                     "SELECT enabled, mining, url FROM feeds WHERE id = %s",
                     (feed_id,),
@@ -137,10 +261,28 @@ class Postgres:
                 feed_url = str(row[2]) if row and row[2] is not None else None
                 feed_label = feed_url or str(feed_id)
 
+                # The counter only exists for priority scheduling.
+                priority = self.config.scheduling_mode == SCHEDULING_MODE_PRIORITY
+                if mined_items is not None and priority:
+                    self._update_backlog(cur, feed_id, pending_items, mined_items)
+
                 if enabled and mining:
+                    if self.config.adaptive_polling and pending_items is not None:
+                        polling_seconds = self._adapt_polling_interval(
+                            cur, feed_id, int(polling_seconds), pending_items
+                        )
+                    if self.config.schedule_slotting:
+                        cur.execute("SELECT EXTRACT(EPOCH FROM NOW())")
+                        polling_seconds = slotted_delay(
+                            feed_id,
+                            polling_seconds,
+                            float(cur.fetchone()[0]),
+                            self.config.schedule_slots,
+                        )
                     update_sql = """
                         UPDATE feed_schedules
                         SET mining_locked_until = NULL,
+                            mining_locked_by = NULL,
                             updated_at = NOW(),
                             next_mining_at = NOW() + (%s * INTERVAL '1 second')
                         WHERE id = %s
@@ -153,6 +295,7 @@ class Postgres:
                     update_sql = """
                         UPDATE feed_schedules
                         SET mining_locked_until = NULL,
+                            mining_locked_by = NULL,
                             updated_at = NOW(),
                             next_mining_at = NULL
                         WHERE id = %s
@@ -162,11 +305,193 @@ class Postgres:
                         "Feed %s mining complete; no further schedule", feed_label
                     )
 
+    def rebalance_schedules(self, polling_interval: int) -> int:
+        """Move every scheduled, unlocked feed onto its slot of the interval.
+
+        Each feed becomes due at the next point of its slot grid (see
+        ``scheduling.slotted_delay``) within one interval from now, which
+        spreads feeds that were enabled or released together. The interval is
+        ``polling_interval``, or the feed's adaptive interval with
+        ``adaptive_polling`` enabled. Returns the number of moved feeds.
+        """
+        fallback = max(int(polling_interval), 0)
+        if self.config.adaptive_polling:
+            interval_sql = "st.polling_interval"
+            join_sql = "LEFT JOIN feed_mining_stats AS st ON st.feed_id = fs.id"
+        else:
+            interval_sql = "NULL::integer"
+            join_sql = ""
+
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    SELECT fs.id, {interval_sql}, EXTRACT(EPOCH FROM NOW())
+                    FROM feed_schedules AS fs
+                    {join_sql}
+                    WHERE fs.next_mining_at IS NOT NULL
+                      AND (
+                          fs.mining_locked_until IS NULL
+                          OR fs.mining_locked_until < NOW()
+                      )
+                    ORDER BY fs.id
+                    FOR UPDATE OF fs SKIP LOCKED
+                    """
+                )
+                values = [
+                    (
+                        feed_id,
+                        slotted_delay(
+                            feed_id,
+                            int(interval) if interval else fallback,
+                            float(now),
+                            self.config.schedule_slots,
+                            min_delay=0,
+                        ),
+                    )
+                    for feed_id, interval, now in cur.fetchall()
+                ]
+                if values:
+                    execute_values(
+                        cur,
+                        """
+                        UPDATE feed_schedules AS fs
+                        SET next_mining_at = NOW() + (v.delay * INTERVAL '1 second'),
+                            updated_at = NOW()
+                        FROM (VALUES %s) AS v (id, delay)
+                        WHERE fs.id = v.id
+                        """,
+                        values,
+                        template="(%s::uuid, %s::double precision)",
+                    )
+        self._logger.debug("Rebalanced the schedules of %s feeds", len(values))
+        return len(values)
+
+    def _update_backlog(
+        self,
+        cur,
+        feed_id: UUID,
+        pending_items: Optional[int],
+        mined_items: int,
+    ) -> None:
+        # The counter is incremented by the items insert trigger. A claim that
+        # saw the whole backlog knows the exact count, which also drops items
+        # mined outside of claims (backfill, retention). The oldest pending
+        # item moves on as items are mined oldest first; it is looked up from
+        # the previous value on, which bounds the scan.
+        if pending_items is not None:
+            backlog_sql = "%s"
+            backlog = max(pending_items - mined_items, 0)
+        else:
+            backlog_sql = "GREATEST(st.pending_items - %s, 0)"
+            backlog = mined_items
+        cur.execute(
+            f"""
+            UPDATE feed_mining_stats AS st
+            SET pending_items = {backlog_sql},
+                oldest_pending_at = CASE
+                    WHEN {backlog_sql} = 0 THEN NULL
+                    ELSE (
+                        SELECT MIN(i.pub_date)
+                        FROM items i
+                        LEFT JOIN trends t ON t.item_id = i.id
+                        WHERE i.feed_id = st.feed_id
+                          AND (
+                              st.oldest_pending_at IS NULL
+                              OR i.pub_date >= st.oldest_pending_at
+                          )
+                          AND t.item_id IS NULL
+                    )
+                END,
+                updated_at = NOW()
+            WHERE st.feed_id = %s
+            """,
+            (backlog, backlog, feed_id),
+        )
+
+    def _adapt_polling_interval(
+        self, cur, feed_id: UUID, polling_seconds: int, pending_items: int
+    ) -> int:
+        cur.execute(
+            """
+            SELECT polling_interval, arrival_rate,
+                   EXTRACT(EPOCH FROM NOW() - last_mined_at)
+            FROM feed_mining_stats
+            WHERE feed_id = %s
+            FOR UPDATE
+            """,
+            (feed_id,),
+        )
+        row = cur.fetchone()
+        previous_interval = int(row[0]) if row and row[0] else polling_seconds
+        previous_rate = float(row[1]) if row and row[1] is not None else None
+        elapsed = float(row[2]) if row and row[2] is not None else previous_interval
+
+        interval, rate = next_polling_interval(
+            previous_interval,
+            pending_items,
+            elapsed,
+            previous_rate,
+            self.config.polling_interval_min,
+            self.config.polling_interval_max,
+            self.config.polling_target_yield,
+        )
+        cur.execute(
+            """
+            INSERT INTO feed_mining_stats (
+                feed_id,
+                polling_interval,
+                arrival_rate,
+                last_yield,
+                last_mined_at,
+                updated_at
+            ) VALUES (%s, %s, %s, %s, NOW(), NOW())
+            ON CONFLICT (feed_id) DO UPDATE SET
+                polling_interval = EXCLUDED.polling_interval,
+                arrival_rate = EXCLUDED.arrival_rate,
+                last_yield = EXCLUDED.last_yield,
+                last_mined_at = NOW(),
+                updated_at = NOW()
+            """,
+            (feed_id, interval, rate, pending_items),
+        )
+        self._logger.debug(
+            "Feed %s yielded %s items; next interval %ss",
+            feed_id,
+            pending_items,
+            interval,
+        )
+        return interval
+
     def fetch_pending_items(
-        self, feed_id: UUID, feed_url: Optional[str] = None
+        self,
+        feed_id: UUID,
+        feed_url: Optional[str] = None,
+        limit: Optional[int] = None,
     ) -> list[Item]:
-        """Fetch items for the feed that still need mining."""
-        sql = """
+        """Fetch items for the feed that still need mining, oldest first.
+
+        ``limit`` caps the number of returned items. With ``item_quarantine``
+        enabled, quarantined items are skipped until their retry is due. With
+        partitioned trends and ``trend_retention_days``, items older than the
+        retention horizon are skipped, so expired partitions are not re-mined.
+        """
+        params: list[object] = [feed_id]
+        quarantine_join_sql = ""
+        quarantine_sql = ""
+        if self.config.item_quarantine:
+            quarantine_join_sql = "LEFT JOIN item_quarantine q ON q.item_id = i.id"
+            quarantine_sql = "AND (q.item_id IS NULL OR q.next_retry_at <= NOW())"
+        retention_sql = ""
+        if self.config.trends_partitioned and self.config.trend_retention_days > 0:
+            retention_sql = "AND i.pub_date >= NOW() - (%s * INTERVAL '1 day')"
+            params.append(int(self.config.trend_retention_days))
+        limit_sql = ""
+        if limit is not None:
+            limit_sql = "LIMIT %s"
+            params.append(max(int(limit), 0))
+        sql = f"""
             SELECT
                 i.id,
                 i.feed_id,
@@ -176,21 +501,26 @@ class Postgres:
                 i.content
             FROM items i
             LEFT JOIN trends t ON t.item_id = i.id
+            {quarantine_join_sql}
             WHERE i.feed_id = %s
               AND t.item_id IS NULL
+              {retention_sql}
+              {quarantine_sql}
+            ORDER BY i.pub_date, i.id
+            {limit_sql}
         """
 
         conn = self._get_connection()
         with conn:
             with conn.cursor() as cur:
-                cur.execute(sql, (feed_id,))
+                cur.execute(sql, tuple(params))
                 rows = cur.fetchall()
                 items = [
                     Item(
                         id=row[0],
                         feed_id=row[1],
                         categories=list(row[2] or []),
-                        language=_normalize_language_value(row[3]),
+                        language=normalize_language_value(row[3]),
                         pub_date=row[4],
                         content=row[5],
                     )
@@ -202,63 +532,804 @@ class Postgres:
                 )
                 return items
 
-    def upsert_trends(self, trends: list[Trend]) -> None:
-        """Insert or update multiple trend records in batch."""
-        if not trends:
+    def quarantine_item(self, item_id: UUID, feed_id: UUID, error: str) -> None:
+        """Record a failed mining attempt and schedule the item's next retry.
+
+        The retry delay starts at ``quarantine_retry_seconds`` and doubles with
+        every attempt, capped at ``quarantine_max_retry_seconds``. Does nothing
+        unless ``item_quarantine`` is enabled.
+        """
+        if not self.config.item_quarantine:
             return
 
+        base = max(int(self.config.quarantine_retry_seconds), 1)
+        cap = max(int(self.config.quarantine_max_retry_seconds), base)
         sql = """
-            INSERT INTO trends (
+            INSERT INTO item_quarantine (
                 item_id,
                 feed_id,
-                language,
-                pub_date,
-                category_stems,
-                noun_stems,
-                verb_stems,
-                adjective_stems,
-                root_domain
-            ) VALUES %s
+                attempts,
+                last_error,
+                first_failed_at,
+                last_failed_at,
+                next_retry_at
+            ) VALUES (%s, %s, 1, %s, NOW(), NOW(), NOW() + %s * INTERVAL '1 second')
             ON CONFLICT (item_id) DO UPDATE SET
-                feed_id = EXCLUDED.feed_id,
+                attempts = item_quarantine.attempts + 1,
+                last_error = EXCLUDED.last_error,
+                last_failed_at = NOW(),
+                next_retry_at = NOW() + LEAST(
+                    %s * POWER(2, item_quarantine.attempts), %s
+                ) * INTERVAL '1 second'
+            RETURNING attempts, next_retry_at
+        """
+
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (item_id, feed_id, error, base, base, cap))
+                row = cur.fetchone()
+        if row:
+            self._logger.warning(
+                "Quarantined item %s after %s failed attempts until %s",
+                item_id,
+                row[0],
+                row[1],
+            )
+
+    def fetch_backfill_items(
+        self,
+        since: datetime,
+        until: datetime,
+        limit: int,
+        after: Optional[tuple[datetime, UUID]] = None,
+        feed_ids: Optional[Sequence[UUID]] = None,
+        languages: Optional[Sequence[str]] = None,
+    ) -> list[tuple[Feed, Item]]:
+        """Fetch a pub_date-ordered page of items regardless of their schedule.
+
+        Pages are addressed by the ``(pub_date, id)`` key of the last item of the
+        previous page so that a backfill can resume from a checkpoint. Like
+        ``fetch_pending_items``, items beyond the trend retention horizon are
+        skipped.
+        """
+        conditions = [
+            "i.pub_date >= %s",
+            "i.pub_date < %s",
+            "f.deleted_at IS NULL",
+        ]
+        params: list[object] = [since, until]
+        if self.config.trends_partitioned and self.config.trend_retention_days > 0:
+            conditions.append("i.pub_date >= NOW() - (%s * INTERVAL '1 day')")
+            params.append(int(self.config.trend_retention_days))
+        if after is not None:
+            conditions.append("(i.pub_date, i.id) > (%s, %s)")
+            params.extend(after)
+        if feed_ids:
+            conditions.append("i.feed_id = ANY(%s)")
+            params.append(list(feed_ids))
+        if languages:
+            # Match the language build_task mines the item in.
+            conditions.append(
+                f"""COALESCE(
+                    {_normalized_language_sql("i.language")},
+                    {_normalized_language_sql("f.language")},
+                    'en'
+                ) = ANY(%s)"""
+            )
+            params.append(
+                [normalize_language_value(language) or "" for language in languages]
+            )
+        params.append(max(int(limit), 1))
+
+        sql = f"""
+            SELECT
+                i.id,
+                i.feed_id,
+                i.categories,
+                i.language,
+                i.pub_date,
+                i.content,
+                f.url,
+                f.categories,
+                f.language,
+                f.root_domain
+            FROM items i
+            JOIN feeds f ON f.id = i.feed_id
+            WHERE {" AND ".join(conditions)}
+            ORDER BY i.pub_date ASC, i.id ASC
+            LIMIT %s
+        """
+
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+                pairs = [
+                    (
+                        Feed(
+                            id=row[1],
+                            url=str(row[6]) if row[6] is not None else "",
+                            categories=list(row[7] or []),
+                            language=normalize_language_value(row[8]),
+                            root_domain=str(row[9]) if row[9] is not None else None,
+                        ),
+                        Item(
+                            id=row[0],
+                            feed_id=row[1],
+                            categories=list(row[2] or []),
+                            language=normalize_language_value(row[3]),
+                            pub_date=row[4],
+                            content=row[5],
+                        ),
+                    )
+                    for row in rows
+                ]
+                self._logger.debug("Fetched %s backfill items", len(pairs))
+                return pairs
+
+    def load_backfill_checkpoint(self, name: str) -> Optional[tuple[datetime, UUID]]:
+        """Return the ``(pub_date, item_id)`` key a backfill last committed."""
+        sql = """
+            SELECT last_pub_date, last_item_id
+            FROM backfill_checkpoints
+            WHERE name = %s
+        """
+
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (name,))
+                row = cur.fetchone()
+                if not row or row[0] is None or row[1] is None:
+                    return None
+                return row[0], row[1]
+
+    def save_backfill_checkpoint(
+        self, name: str, pub_date: datetime, item_id: UUID
+    ) -> None:
+        """Record the key of the last item a backfill has persisted."""
+        sql = """
+            INSERT INTO backfill_checkpoints (
+                name, last_pub_date, last_item_id, updated_at
+            ) VALUES (%s, %s, %s, NOW())
+            ON CONFLICT (name) DO UPDATE SET
+                last_pub_date = EXCLUDED.last_pub_date,
+                last_item_id = EXCLUDED.last_item_id,
+                updated_at = NOW()
+        """
+
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (name, pub_date, item_id))
+        self._logger.debug("Backfill %s checkpointed at %s", name, pub_date)
+
+    def clear_backfill_checkpoint(self, name: str) -> None:
+        """Forget the progress of a backfill so it starts from the beginning."""
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM backfill_checkpoints WHERE name = %s", (name,))
+
+    def iter_trends(
+        self,
+        batch_size: int,
+        after: Optional[tuple[datetime, UUID]] = None,
+        until: Optional[datetime] = None,
+        languages: Optional[Sequence[str]] = None,
+    ) -> Generator[list[Trend], None, None]:
+        """Stream trends in ``(pub_date, item_id)`` order in batches.
+
+        Rows are read through a server-side cursor, so at most ``batch_size``
+        trends are held in memory regardless of the size of the table.
+        """
+        conditions = ["TRUE"]
+        params: list[object] = []
+        if after is not None:
+            conditions.append("(pub_date, item_id) > (%s, %s)")
+            params.extend(after)
+        if until is not None:
+            conditions.append("pub_date < %s")
+            params.append(until)
+        if languages:
+            conditions.append("language = ANY(%s)")
+            params.append([language.lower() for language in languages])
+
+        sql = f"""
+            SELECT {self._trend_columns()}
+            FROM trends
+            WHERE {" AND ".join(conditions)}
+            ORDER BY pub_date ASC, item_id ASC
+        """
+
+        size = max(int(batch_size), 1)
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor(name="news_deframer_iter_trends") as cur:
+                cur.itersize = size
+                cur.execute(sql, params)
+                while rows := cur.fetchmany(size):
+                    yield self._trends_from_rows(conn, rows)
+
+    def fetch_content_stems(self, hashes: Sequence[str]) -> dict[str, ContentStems]:
+        """Return previously extracted stems for the given content hashes."""
+        if not hashes:
+            return {}
+
+        sql = """
+            SELECT content_hash, language, noun_stems, verb_stems, adjective_stems
+            FROM content_stems
+            WHERE content_hash = ANY(%s)
+        """
+
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (list(hashes),))
+                found = {
+                    row[0]: ContentStems(
+                        content_hash=row[0],
+                        language=row[1],
+                        noun_stems=list(row[2] or []),
+                        verb_stems=list(row[3] or []),
+                        adjective_stems=list(row[4] or []),
+                    )
+                    for row in cur.fetchall()
+                }
+        self._logger.debug(
+            "Found stems for %s of %s content hashes", len(found), len(hashes)
+        )
+        return found
+
+    def store_content_stems(
+        self, entries: Sequence[ContentStems], replace: bool = False
+    ) -> None:
+        """Remember extracted stems under their content hash.
+
+        Stems already stored for a hash are kept unless ``replace`` is set.
+        """
+        if not entries:
+            return
+
+        conflict_sql = "DO NOTHING"
+        if replace:
+            conflict_sql = """DO UPDATE SET
                 language = EXCLUDED.language,
-                pub_date = EXCLUDED.pub_date,
-                category_stems = EXCLUDED.category_stems,
                 noun_stems = EXCLUDED.noun_stems,
                 verb_stems = EXCLUDED.verb_stems,
-                adjective_stems = EXCLUDED.adjective_stems,
-                root_domain = EXCLUDED.root_domain
+                adjective_stems = EXCLUDED.adjective_stems
+            WHERE (
+                content_stems.noun_stems,
+                content_stems.verb_stems,
+                content_stems.adjective_stems
+            ) IS DISTINCT FROM (
+                EXCLUDED.noun_stems,
+                EXCLUDED.verb_stems,
+                EXCLUDED.adjective_stems
+            )"""
+        sql = f"""
+            INSERT INTO content_stems (
+                content_hash, language, noun_stems, verb_stems, adjective_stems
+            ) VALUES %s
+            ON CONFLICT (content_hash) {conflict_sql}
         """
-
+        unique = {entry.content_hash: entry for entry in entries}
         values = [
+            (
+                entry.content_hash,
+                entry.language,
+                entry.noun_stems,
+                entry.verb_stems,
+                entry.adjective_stems,
+            )
+            for _, entry in sorted(unique.items())
+        ]
+
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor() as cur:
+                execute_values(cur, sql, values)
+        self._logger.debug("Stored stems for %s content hashes", len(values))
+
+    def upsert_trends(self, trends: list[Trend]) -> UpsertStats:
+        """Insert or update multiple trend records in batch.
+
+        Existing rows are only rewritten when a value actually changed, so
+        re-mining unchanged items produces no row versions, WAL or index churn.
+        With ``trend_rollups`` enabled, ``trend_rollups`` is adjusted in the same
+        transaction by the difference between the previous and the new stems of
+        every item, so re-upserting an item never counts it twice.
+
+        With ``trends_partitioned`` enabled, rows are keyed by
+        ``(item_id, pub_date)`` and the previous row of an item whose pub_date
+        changed is deleted from its old partition.
+        """
+        if not trends:
+            return UpsertStats()
+
+        trends = dedupe_trends(trends)
+
+        columns = ["item_id", "feed_id", "language", "pub_date", *_STEM_COLUMNS]
+        columns.append("root_domain")
+        if self._stems is not None:
+            columns.extend(_STEM_ID_COLUMNS)
+        updates = ",\n                ".join(
+            f"{column} = EXCLUDED.{column}" for column in columns[1:]
+        )
+        current = ", ".join(f"trends.{column}" for column in columns[1:])
+        excluded = ", ".join(f"EXCLUDED.{column}" for column in columns[1:])
+        # Rows skipped by the WHERE clause are not returned; xmax = 0 tells
+        # freshly inserted rows from updated ones.
+        conflict = "item_id, pub_date" if self.config.trends_partitioned else "item_id"
+        sql = f"""
+            INSERT INTO trends ({", ".join(columns)}) VALUES %s
+            ON CONFLICT ({conflict}) DO UPDATE SET
+                {updates}
+            WHERE ({current}) IS DISTINCT FROM ({excluded})
+            RETURNING (xmax = 0)
+        """
+
+        if self._stems is None:
+            values = [
+                (
+                    t.item_id,
+                    t.feed_id,
+                    t.language,
+                    t.pub_date,
+                    t.category_stems,
+                    t.noun_stems,
+                    t.verb_stems,
+                    t.adjective_stems,
+                    t.root_domain,
+                )
+                for t in trends
+            ]
+        else:
+            values = self._dictionary_values(trends)
+
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor() as cur:
+                previous: list[Trend] = []
+                if self.config.trend_rollups:
+                    previous = self._lock_trends(conn, cur, [t.item_id for t in trends])
+                moved = 0
+                if self.config.trends_partitioned:
+                    moved = self._delete_moved_trends(cur, trends)
+                rows = execute_values(cur, sql, values, fetch=True) or []
+                if self.config.trend_rollups:
+                    self._apply_rollup_deltas(cur, previous, trends)
+                if self.config.item_quarantine:
+                    cur.execute(
+                        "DELETE FROM item_quarantine WHERE item_id = ANY(%s)",
+                        ([t.item_id for t in trends],),
+                    )
+        # Rows moved to another partition are re-inserted but were updated.
+        inserted = sum(1 for row in rows if row[0]) - moved
+        stats = UpsertStats(
+            inserted=inserted,
+            updated=len(rows) - inserted,
+            unchanged=len(trends) - len(rows),
+        )
+        self._logger.debug(
+            "Upserted %s trends: %s inserted, %s updated, %s unchanged",
+            len(trends),
+            stats.inserted,
+            stats.updated,
+            stats.unchanged,
+        )
+        return stats
+
+    def _delete_moved_trends(self, cur, trends: list[Trend]) -> int:
+        # RETURNING instead of rowcount, which only covers the last page.
+        rows = execute_values(
+            cur,
+            """
+            DELETE FROM trends AS t
+            USING (VALUES %s) AS n(item_id, pub_date)
+            WHERE t.item_id = n.item_id AND t.pub_date <> n.pub_date
+            RETURNING t.item_id
+            """,
+            [(t.item_id, t.pub_date) for t in trends],
+            template="(%s::uuid, %s::timestamptz)",
+            fetch=True,
+        )
+        return len(rows or [])
+
+    def ensure_trend_partitions(
+        self,
+        months_ahead: int,
+        since: Optional[datetime] = None,
+        now: Optional[datetime] = None,
+    ) -> list[str]:
+        """Create the monthly trends partitions that do not exist yet.
+
+        Partitions are created from the month of ``since`` (the current month
+        by default) up to ``months_ahead`` months after the current one and
+        named ``trends_pYYYYMM``. Returns the names of all covered partitions.
+
+        Postgres refuses to create a partition while the ``trends_default``
+        partition holds rows of its range, so those rows are moved into the
+        new partition in the same transaction.
+        """
+        current = _month_start(now or datetime.now(timezone.utc))
+        month = _month_start(since) if since is not None else current
+        last = _add_months(current, max(int(months_ahead), 0))
+
+        names = []
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('trends_default') IS NOT NULL")
+                row = cur.fetchone()
+                has_default = bool(row and row[0])
+                if has_default:
+                    cur.execute(
+                        """
+                        CREATE TEMP TABLE IF NOT EXISTS trends_moved
+                        (LIKE trends) ON COMMIT DROP
+                        """
+                    )
+                while month <= last:
+                    name = trend_partition_name(month)
+                    bounds = (month, _add_months(month, 1))
+                    if has_default:
+                        cur.execute(
+                            """
+                            WITH moved AS (
+                                DELETE FROM trends_default
+                                WHERE pub_date >= %s AND pub_date < %s
+                                RETURNING *
+                            )
+                            INSERT INTO trends_moved SELECT * FROM moved
+                            """,
+                            bounds,
+                        )
+                    cur.execute(
+                        f"""
+                        CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF trends
+                        FOR VALUES FROM (%s) TO (%s)
+                        """,
+                        bounds,
+                    )
+                    if has_default:
+                        cur.execute("INSERT INTO trends SELECT * FROM trends_moved")
+                        cur.execute("TRUNCATE trends_moved")
+                    names.append(name)
+                    month = _add_months(month, 1)
+        self._logger.debug("Ensured %s trend partitions", len(names))
+        return names
+
+    def expire_trend_partitions(
+        self,
+        retention_days: int,
+        mode: str,
+        now: Optional[datetime] = None,
+    ) -> list[str]:
+        """Detach or drop monthly trends partitions older than the horizon.
+
+        A partition is expired once its whole month lies more than
+        ``retention_days`` in the past; removing it is a catalog operation
+        instead of a ``DELETE`` of its rows. ``trend_rollups`` is not touched.
+        Returns the names of the expired partitions.
+        """
+        if retention_days <= 0:
+            return []
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT c.relname
+                    FROM pg_inherits AS i
+                    JOIN pg_class AS c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = 'trends'::regclass
+                    ORDER BY c.relname
+                    """
+                )
+                expired = [
+                    name
+                    for (name,) in cur.fetchall()
+                    if (month := _partition_month(name)) is not None
+                    and _add_months(month, 1) <= cutoff
+                ]
+                for name in expired:
+                    # Names matched _PARTITION_NAME, so they are safe to inline.
+                    if mode == TREND_RETENTION_DROP:
+                        cur.execute(f'DROP TABLE "{name}"')
+                    else:
+                        cur.execute(f'ALTER TABLE trends DETACH PARTITION "{name}"')
+        for name in expired:
+            self._logger.debug("Expired trend partition %s (%s)", name, mode)
+        return expired
+
+    def _lock_trends(self, conn, cur, item_ids: list[UUID]) -> list[Trend]:
+        # The advisory locks serialize concurrent upserts of the same item,
+        # including its first insert, so rollup deltas are computed against
+        # the row that is actually replaced.
+        cur.execute(
+            """
+            SELECT pg_advisory_xact_lock(hashtextextended(ids.id::text, 0))
+            FROM (SELECT unnest(%s::uuid[]) AS id ORDER BY 1) AS ids
+            """,
+            (sorted(item_ids),),
+        )
+        cur.execute(
+            f"""
+            SELECT {self._trend_columns()}
+            FROM trends
+            WHERE item_id = ANY(%s)
+            """,
+            (item_ids,),
+        )
+        return self._trends_from_rows(conn, cur.fetchall())
+
+    def _trend_columns(self) -> str:
+        columns = ["item_id", "feed_id", "language", "pub_date", *_STEM_COLUMNS]
+        columns.append("root_domain")
+        if self._stems is not None:
+            columns.extend(_STEM_ID_COLUMNS)
+        return ", ".join(columns)
+
+    def _trends_from_rows(self, conn, rows: Sequence[Sequence]) -> list[Trend]:
+        decoded: dict[int, str] = {}
+        if self._stems is not None:
+            ids = {
+                stem_id
+                for row in rows
+                for column in row[9:13]
+                for stem_id in column or []
+            }
+            if ids:
+                with conn.cursor() as cur:
+                    decoded = self._stems.resolve(cur, ids)
+
+        trends = []
+        for row in rows:
+            stems = [list(column or []) for column in row[4:8]]
+            # Rows written in text mode carry no id arrays.
+            for index, column in enumerate(row[9:13]):
+                if column:
+                    stems[index] = [decoded[stem_id] for stem_id in column]
+            trends.append(
+                Trend(
+                    item_id=row[0],
+                    feed_id=row[1],
+                    language=row[2],
+                    pub_date=row[3],
+                    category_stems=stems[0],
+                    noun_stems=stems[1],
+                    verb_stems=stems[2],
+                    adjective_stems=stems[3],
+                    root_domain=row[8],
+                )
+            )
+        return trends
+
+    def _dictionary_values(self, trends: list[Trend]) -> list[tuple]:
+        assert self._stems is not None
+        entries = {
+            (trend.language, stem)
+            for trend in trends
+            for column in _STEM_COLUMNS
+            for stem in getattr(trend, column)
+        }
+        # Interned stems are committed on their own, so cached ids always
+        # refer to existing rows even when the trend upsert is rolled back.
+        conn = self._get_connection()
+        with conn:
+            with conn.cursor() as cur:
+                ids = self._stems.intern(cur, entries)
+
+        return [
             (
                 t.item_id,
                 t.feed_id,
                 t.language,
                 t.pub_date,
-                t.category_stems,
-                t.noun_stems,
-                t.verb_stems,
-                t.adjective_stems,
+                [],
+                [],
+                [],
+                [],
                 t.root_domain,
+                *(
+                    [ids[(t.language, stem)] for stem in getattr(t, column)]
+                    for column in _STEM_COLUMNS
+                ),
             )
             for t in trends
         ]
 
-        conn = self._get_connection()
-        with conn:
-            with conn.cursor() as cur:
-                execute_values(cur, sql, values)
-        self._logger.debug("Upserted %s trends", len(trends))
+    def _apply_rollup_deltas(
+        self, cur, previous: list[Trend], current: list[Trend]
+    ) -> None:
+        bucket_seconds = self.config.rollup_bucket_seconds
+        deltas = rollup_counts(current, bucket_seconds)
+        deltas.subtract(rollup_counts(previous, bucket_seconds))
+        # Sorted keys give concurrent writers the same row lock order.
+        changed = sorted((key, delta) for key, delta in deltas.items() if delta)
+        if not changed:
+            return
+
+        execute_values(
+            cur,
+            """
+            INSERT INTO trend_rollups (
+                bucket, language, root_domain, kind, stem, count
+            ) VALUES %s
+            ON CONFLICT (bucket, language, root_domain, kind, stem) DO UPDATE SET
+                count = trend_rollups.count + EXCLUDED.count
+            """,
+            [(*key, delta) for key, delta in changed],
+        )
+        decremented = [key for key, delta in changed if delta < 0]
+        if decremented:
+            execute_values(
+                cur,
+                """
+                DELETE FROM trend_rollups AS r
+                USING (VALUES %s) AS d(bucket, language, root_domain, kind, stem)
+                WHERE r.bucket = d.bucket
+                  AND r.language = d.language
+                  AND r.root_domain = d.root_domain
+                  AND r.kind = d.kind
+                  AND r.stem = d.stem
+                  AND r.count <= 0
+                """,
+                decremented,
+            )
+        self._logger.debug("Applied %s trend rollup deltas", len(changed))
+
+
+class StemDictionary:
+    """In-process interning cache for the ``stems`` dictionary table.
 
+    Lookups of known stems never leave the process; unknown stems are
+    inserted and fetched with one statement pair per call, however many there
+    are. The cache is dropped wholesale once it exceeds ``max_entries``.
+    """
 
-def _normalize_language_value(value: Optional[str]) -> Optional[str]:
-    if not isinstance(value, str):
+    def __init__(self, max_entries: int = STEM_CACHE_SIZE) -> None:
+        self.max_entries = max(int(max_entries), 1)
+        self._ids: dict[tuple[str, str], int] = {}
+        self._texts: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def intern(
+        self, cur, entries: Iterable[tuple[str, str]]
+    ) -> dict[tuple[str, str], int]:
+        """Return the ids of ``(language, text)`` entries, inserting missing ones."""
+        wanted = set(entries)
+        if len(self._ids) + len(wanted) > self.max_entries:
+            self.clear()
+
+        missing = sorted(entry for entry in wanted if entry not in self._ids)
+        if missing:
+            languages = [language for language, _ in missing]
+            texts = [text for _, text in missing]
+            cur.execute(
+                """
+                INSERT INTO stems (language, text)
+                SELECT * FROM unnest(%s::text[], %s::text[])
+                ON CONFLICT (language, text) DO NOTHING
+                """,
+                (languages, texts),
+            )
+            cur.execute(
+                """
+                SELECT s.id, s.language, s.text
+                FROM stems AS s
+                JOIN unnest(%s::text[], %s::text[]) AS m(language, text)
+                  ON s.language = m.language AND s.text = m.text
+                """,
+                (languages, texts),
+            )
+            for stem_id, language, text in cur.fetchall():
+                self._remember(stem_id, language, text)
+
+        return {entry: self._ids[entry] for entry in wanted}
+
+    def resolve(self, cur, ids: Iterable[int]) -> dict[int, str]:
+        """Return the text of every stem id, loading unknown ids in bulk."""
+        wanted = set(ids)
+        if len(self._texts) + len(wanted) > self.max_entries:
+            self.clear()
+
+        missing = sorted(stem_id for stem_id in wanted if stem_id not in self._texts)
+        if missing:
+            cur.execute(
+                "SELECT id, language, text FROM stems WHERE id = ANY(%s)",
+                (missing,),
+            )
+            for stem_id, language, text in cur.fetchall():
+                self._remember(stem_id, language, text)
+
+        return {stem_id: self._texts[stem_id] for stem_id in wanted}
+
+    def clear(self) -> None:
+        self._ids.clear()
+        self._texts.clear()
+
+    def _remember(self, stem_id: int, language: str, text: str) -> None:
+        self._ids[(language, text)] = stem_id
+        self._texts[stem_id] = text
+
+
+_STEM_COLUMNS = ("category_stems", "noun_stems", "verb_stems", "adjective_stems")
+_STEM_ID_COLUMNS = (
+    "category_stem_ids",
+    "noun_stem_ids",
+    "verb_stem_ids",
+    "adjective_stem_ids",
+)
+
+RollupKey = tuple[datetime, str, str, str, str]
+
+_ROLLUP_KINDS = (
+    ("category", "category_stems"),
+    ("noun", "noun_stems"),
+    ("verb", "verb_stems"),
+    ("adjective", "adjective_stems"),
+)
+
+
+def rollup_counts(trends: list[Trend], bucket_seconds: int) -> Counter[RollupKey]:
+    """Count stems per (bucket, language, root_domain, kind, stem) for ``trends``."""
+    counts: Counter[RollupKey] = Counter()
+    for trend in trends:
+        bucket = rollup_bucket(trend.pub_date, bucket_seconds)
+        for kind, attribute in _ROLLUP_KINDS:
+            for stem in set(getattr(trend, attribute)):
+                counts[(bucket, trend.language, trend.root_domain, kind, stem)] += 1
+    return counts
+
+
+def rollup_bucket(pub_date: datetime, bucket_seconds: int) -> datetime:
+    """Return the start of the rollup bucket ``pub_date`` falls into."""
+    if pub_date.tzinfo is None:
+        pub_date = pub_date.replace(tzinfo=timezone.utc)
+    seconds = max(int(bucket_seconds), 1)
+    epoch = int(pub_date.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=timezone.utc)
+
+
+_PARTITION_NAME = re.compile(r"trends_p(\d{4})(\d{2})")
+
+
+def trend_partition_name(month: datetime) -> str:
+    """Return the name of the trends partition holding ``month``."""
+    return f"trends_p{month.year:04d}{month.month:02d}"
+
+
+def _partition_month(name: str) -> Optional[datetime]:
+    match = _PARTITION_NAME.fullmatch(name)
+    if match is None:
         return None
-    stripped = value.strip().lower()
-    filtered = "".join(ch for ch in stripped if ch.isalpha())
-    if len(filtered) >= 2:
-        return filtered[:2]
-    if len(stripped) >= 2:
-        return stripped[:2]
-    return None
+    return datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)
+
+
+def _month_start(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _normalized_language_sql(column: str) -> str:
+    # SQL form of normalize_language_value.
+    alpha = f"regexp_replace(lower(btrim({column})), '[^[:alpha:]]', '', 'g')"
+    return f"""CASE
+        WHEN length({alpha}) >= 2 THEN left({alpha}, 2)
+        WHEN length(btrim({column})) >= 2 THEN left(lower(btrim({column})), 2)
+    END"""
@@ -0,0 +1,133 @@
+"""Recomputation of trend stems from cached spaCy annotations."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+import logging
+from typing import Optional
+from uuid import UUID
+
+from news_deframer.config import EXPORT_BATCH_SIZE, Config
+from news_deframer.doc_cache import open_doc_cache
+from news_deframer.nlp import document_content_hash, model_version, stems_from_bytes
+from news_deframer.models import ContentStems, Trend
+from news_deframer.postgres import Postgres
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class RederiveOptions:
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    languages: list[str] = field(default_factory=list)
+    batch_size: int = EXPORT_BATCH_SIZE
+
+
+@dataclass(slots=True)
+class RederiveStats:
+    rederived: int = 0
+    # Trends without annotations of the current model in the cache.
+    missing: int = 0
+    # Re-derived trends whose stems changed.
+    updated: int = 0
+
+
+def rederive(
+    config: Config, options: RederiveOptions, repository: Optional[Postgres] = None
+) -> RederiveStats:
+    """Recompute the noun, verb and adjective stems of stored trends.
+
+    Stems are derived from the annotations ``DOC_CACHE_PATH`` holds for each
+    item, so changed POS or stopword rules apply without running the spaCy
+    pipeline. Trends are read in ``(pub_date, item_id)`` order; unchanged ones
+    are not rewritten. Category stems are left as they are. With
+    ``content_dedup`` enabled, the stems stored for the content of re-derived
+    items are replaced too, so later copies of it do not get the old stems.
+    """
+    doc_cache = open_doc_cache(config)
+    if doc_cache is None:
+        raise ValueError("rederive requires DOC_CACHE_PATH")
+
+    repo = repository or Postgres(config)
+    stats = RederiveStats()
+    # The all-zero id makes the first page include trends at ``since``.
+    after: Optional[tuple[datetime, UUID]] = None
+    if options.since is not None:
+        after = (options.since, UUID(int=0))
+    try:
+        while True:
+            # One page per query: the upsert below must not run while the
+            # server-side cursor of iter_trends is open on the connection.
+            pages = repo.iter_trends(
+                options.batch_size,
+                after=after,
+                until=options.until,
+                languages=options.languages,
+            )
+            trends = next(pages, [])
+            pages.close()
+            if not trends:
+                break
+
+            cached = doc_cache.lookup([t.item_id for t in trends])
+            updated = _rederive_batch(trends, cached)
+            stats.rederived += len(updated)
+            stats.missing += len(trends) - len(updated)
+            stats.updated += repo.upsert_trends(updated).updated
+            if config.content_dedup:
+                repo.store_content_stems(_content_stems(updated, cached), replace=True)
+
+            last = trends[-1]
+            after = (last.pub_date, last.item_id)
+            logger.info(
+                "Re-derived %s trends (through %s)", stats.rederived, last.pub_date
+            )
+    finally:
+        doc_cache.close()
+
+    logger.info(
+        "Re-derived %s trends, %s without cached annotations; %s updated",
+        stats.rederived,
+        stats.missing,
+        stats.updated,
+    )
+    return stats
+
+
+def _rederive_batch(
+    trends: list[Trend], cached: dict[UUID, tuple[str, str, str, bytes]]
+) -> list[Trend]:
+    updated = []
+    for trend in trends:
+        entry = cached.get(trend.item_id)
+        if entry is None:
+            continue
+        _, language, version, data = entry
+        if language != trend.language or version != model_version(language):
+            continue
+        noun_stems, verb_stems, adj_stems = stems_from_bytes(data, language)
+        trend.noun_stems = list(noun_stems)
+        trend.verb_stems = list(verb_stems)
+        trend.adjective_stems = list(adj_stems)
+        updated.append(trend)
+    return updated
+
+
+def _content_stems(
+    trends: list[Trend], cached: dict[UUID, tuple[str, str, str, bytes]]
+) -> list[ContentStems]:
+    # Syndicated copies share one document and therefore one content hash.
+    entries: dict[str, ContentStems] = {}
+    for trend in trends:
+        doc_key = cached[trend.item_id][0]
+        digest = document_content_hash(doc_key, trend.language)
+        entries[digest] = ContentStems(
+            content_hash=digest,
+            language=trend.language,
+            noun_stems=list(trend.noun_stems),
+            verb_stems=list(trend.verb_stems),
+            adjective_stems=list(trend.adjective_stems),
+        )
+    return list(entries.values())
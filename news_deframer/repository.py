@@ -0,0 +1,49 @@
+"""Repository interfaces the miner and the poller are written against."""
+
+from __future__ import annotations
+
+from typing import Optional, Protocol, Sequence
+from uuid import UUID
+
+from news_deframer.models import ContentStems, Feed, Item, Trend, UpsertStats
+
+
+class TrendRepository(Protocol):
+    """Storage of mined trends and of the stems of known content."""
+
+    def upsert_trends(self, trends: list[Trend]) -> UpsertStats: ...
+
+    def fetch_content_stems(self, hashes: Sequence[str]) -> dict[str, ContentStems]: ...
+
+    def store_content_stems(self, entries: Sequence[ContentStems]) -> None: ...
+
+
+class MiningRepository(TrendRepository, Protocol):
+    """Feed claims and pending items on top of trend storage.
+
+    Implemented by ``postgres.Postgres`` and ``sqlite.SQLiteRepository``.
+    """
+
+    def begin_mine_update(self, lock_duration: int) -> Optional[Feed]: ...
+
+    def extend_mine_lock(
+        self, feed_id: UUID, lock_duration: int, lock_token: Optional[UUID] = None
+    ) -> bool: ...
+
+    def end_mine_update(
+        self,
+        feed_id: UUID,
+        polling_interval: int,
+        pending_items: Optional[int] = None,
+        mined_items: Optional[int] = None,
+        lock_token: Optional[UUID] = None,
+    ) -> None: ...
+
+    def fetch_pending_items(
+        self,
+        feed_id: UUID,
+        feed_url: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[Item]: ...
+
+    def quarantine_item(self, item_id: UUID, feed_id: UUID, error: str) -> None: ...
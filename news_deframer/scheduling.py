@@ -0,0 +1,86 @@
+"""Pure scheduling policies shared by the repository implementations."""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import Optional
+from uuid import UUID
+
+# Weight of the newest arrival-rate sample in the moving average.
+ARRIVAL_RATE_SMOOTHING = 0.3
+
+# Factor by which the interval of a feed grows after a claim without items.
+QUIET_BACKOFF_FACTOR = 2.0
+
+
+def next_polling_interval(
+    previous_interval: int,
+    pending_items: int,
+    elapsed_seconds: float,
+    previous_rate: Optional[float],
+    min_interval: int,
+    max_interval: int,
+    target_yield: int,
+) -> tuple[int, float]:
+    """Return the next polling interval of a feed and its smoothed arrival rate.
+
+    The yield of a claim (pending items found) is turned into an arrival rate
+    by dividing it by the time since the previous claim and smoothed with an
+    exponential moving average. Busy feeds are scheduled so that a claim finds
+    about ``target_yield`` items; a claim that finds nothing backs the interval
+    off exponentially. The result is clamped to ``[min_interval, max_interval]``.
+    """
+
+    lower = max(int(min_interval), 1)
+    upper = max(int(max_interval), lower)
+
+    sample = max(pending_items, 0) / max(elapsed_seconds, 1.0)
+    if previous_rate is None:
+        rate = sample
+    else:
+        rate = (
+            ARRIVAL_RATE_SMOOTHING * sample
+            + (1 - ARRIVAL_RATE_SMOOTHING) * previous_rate
+        )
+
+    if pending_items <= 0:
+        interval = max(previous_interval, lower) * QUIET_BACKOFF_FACTOR
+    elif rate > 0:
+        interval = max(target_yield, 1) / rate
+    else:
+        interval = upper
+
+    return int(min(max(interval, lower), upper)), rate
+
+
+def schedule_slot(feed_id: UUID, slots: int) -> int:
+    """Return the stable slot of a feed among ``slots`` phases of an interval."""
+    digest = hashlib.blake2b(feed_id.bytes, digest_size=8).digest()
+    return int.from_bytes(digest, "big") % max(int(slots), 1)
+
+
+def slotted_delay(
+    feed_id: UUID,
+    interval: float,
+    now: float,
+    slots: int,
+    min_delay: Optional[float] = None,
+) -> float:
+    """Return the seconds from ``now`` to the next due time of a feed on its slot.
+
+    Every interval is divided into ``slots`` phases and each feed is pinned to
+    one of them by ``schedule_slot``, so feeds released together drift apart
+    instead of staying phase-locked. The due time is the first point of the
+    feed's grid (its phase plus multiples of ``interval`` since the epoch) at
+    least ``min_delay`` after ``now``; by default half an interval, so the
+    delay lies in ``[interval / 2, 3 * interval / 2)`` and averages
+    ``interval``.
+    """
+    if interval <= 0:
+        return 0.0
+    slots = max(int(slots), 1)
+    phase = schedule_slot(feed_id, slots) * interval / slots
+    earliest = now + (interval / 2 if min_delay is None else max(min_delay, 0.0))
+    periods = math.ceil((earliest - phase) / interval)
+    return periods * interval + phase - now
@@ -1,11 +1,22 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import importlib.util
 import os
+from pathlib import Path
+import shutil
 import subprocess
 import sys
+import tempfile
+import urllib.parse
 import urllib.request
 
 SPACY_VERSION = "3.8.0"
 
+GITHUB_RELEASES_URL = "https://github.com/explosion/spacy-models/releases/download"
+
+# Seconds a single wheel download may take.
+DOWNLOAD_TIMEOUT = 300
+
 SPACY_LANGUAGE_MODELS = {
     "en": "en_core_web_sm",
     "de": "de_core_news_sm",
@@ -42,6 +53,164 @@ def check_url(url):
         return False
 
 
+def wheel_filename(model_name):
+    return f"{model_name}-{SPACY_VERSION}-py3-none-any.whl"
+
+
+def wheel_url(model_name, mirror=None):
+    """Return the download URL of a model wheel.
+
+    A mirror serves all wheels flat from one base URL; without a mirror the
+    GitHub release of the model is used.
+    """
+    filename = wheel_filename(model_name)
+    if mirror:
+        return f"{mirror.rstrip('/')}/{filename}"
+    return f"{GITHUB_RELEASES_URL}/{model_name}-{SPACY_VERSION}/{filename}"
+
+
+def local_mirror(mirror):
+    """Return the directory of a ``file://`` or plain path mirror, else None."""
+    if not mirror:
+        return None
+    parsed = urllib.parse.urlparse(mirror)
+    if parsed.scheme == "file":
+        return Path(urllib.request.url2pathname(parsed.path))
+    if "://" not in mirror:
+        return Path(mirror)
+    return None
+
+
+def load_checksums(path):
+    """Read trusted wheel digests from a file in ``sha256sum`` format.
+
+    Returns a mapping of wheel filename to lower-case hex digest.
+    """
+    checksums = {}
+    for line in Path(path).read_text().splitlines():
+        fields = line.split()
+        if len(fields) == 2:
+            checksums[fields[1].lstrip("*")] = fields[0].lower()
+    return checksums
+
+
+def trusted_checksum(checksums, model_name):
+    """Return the trusted digest of a model wheel or fail without one."""
+    filename = wheel_filename(model_name)
+    if expected := (checksums or {}).get(filename):
+        return expected
+    raise RuntimeError(
+        f"No trusted checksum for {filename}; add it to SPACY_MODEL_CHECKSUMS."
+    )
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cached_wheel(cache_dir, model_name, checksums=None):
+    """Return the cached wheel of a model if it matches its trusted checksum."""
+    path = Path(cache_dir) / wheel_filename(model_name)
+    if not path.is_file():
+        return None
+    if file_sha256(path) != trusted_checksum(checksums, model_name):
+        print(f"Cached wheel {path.name} fails checksum verification; refetching.")
+        return None
+    return path
+
+
+def fetch_wheel(model_name, cache_dir, mirror=None, checksums=None):
+    """Fetch a model wheel, verify it and return its path.
+
+    Returns ``None`` when the wheel does not exist, and fails when it exists
+    but ``checksums`` has no trusted digest for it or the digest differs.
+    Wheels of a local mirror are verified and used in place; downloads are
+    stored in ``cache_dir``.
+    """
+    if (directory := local_mirror(mirror)) is not None:
+        path = directory / wheel_filename(model_name)
+        if not path.is_file():
+            return None
+        _verify(path, model_name, checksums, str(path))
+        return path
+
+    url = wheel_url(model_name, mirror)
+    if not check_url(url):
+        return None
+    trusted_checksum(checksums, model_name)
+
+    path = Path(cache_dir) / wheel_filename(model_name)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    print(f"Downloading model from: {url}...")
+    try:
+        with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+            with open(tmp_path, "wb") as f:
+                shutil.copyfileobj(response, f)
+        _verify(tmp_path, model_name, checksums, url)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    os.replace(tmp_path, path)
+    return path
+
+
+def _verify(path, model_name, checksums, source):
+    expected = trusted_checksum(checksums, model_name)
+    actual = file_sha256(path)
+    if actual != expected:
+        raise RuntimeError(
+            f"Checksum mismatch for {source}: expected {expected}, got {actual}"
+        )
+
+
+def model_candidates(lang):
+    # Construct potential model names.
+    # Most languages use 'news', English uses 'web'.
+    if known := SPACY_LANGUAGE_MODELS.get(lang):
+        return [known]
+    return [f"{lang}_core_news_sm", f"{lang}_core_web_sm"]
+
+
+def resolve_wheel(candidates, cache_dir, mirror=None, checksums=None):
+    """Return a local wheel for the first available candidate.
+
+    A verified cached wheel is used without any network access.
+    """
+    for model_name in candidates:
+        if path := cached_wheel(cache_dir, model_name, checksums):
+            print(f"Using cached wheel {path.name}.")
+            return path
+    for model_name in candidates:
+        if path := fetch_wheel(model_name, cache_dir, mirror, checksums):
+            return path
+    return None
+
+
+def fetch_wheels(languages, cache_dir, mirror=None, workers=None, checksums=None):
+    """Resolve and fetch the wheels of ``languages`` concurrently.
+
+    Returns a mapping of language to wheel path, ``None`` for languages
+    without an available model. Every wheel is checked against its digest in
+    ``checksums`` (wheel filename to SHA-256).
+    """
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    if not languages:
+        return {}
+    with ThreadPoolExecutor(max_workers=workers or len(languages)) as executor:
+        paths = executor.map(
+            lambda lang: resolve_wheel(
+                model_candidates(lang), cache_dir, mirror, checksums
+            ),
+            languages,
+        )
+        return dict(zip(languages, paths))
+
+
 def install_models():
     # Example ENV: SPACY_MODELS="en de"
     requested = os.environ.get("SPACY_MODELS", "").split()
@@ -50,49 +219,59 @@ def install_models():
         print("Info: Set SPACY_MODELS to install additional languages.")
         return
 
-    pip_checked = False
+    # 1. Skip languages whose model is already installed locally
+    missing = []
     for lang in requested:
-        # Construct potential model names.
-        # Most languages use 'news', English uses 'web'.
-        if known := SPACY_LANGUAGE_MODELS.get(lang):
-            candidates = [known]
+        installed = next(
+            (name for name in model_candidates(lang) if importlib.util.find_spec(name)),
+            None,
+        )
+        if installed:
+            print(f"Model {installed} already installed.")
         else:
-            candidates = [f"{lang}_core_news_sm", f"{lang}_core_web_sm"]
-
-        # 1. Check if any candidate is already installed locally
-        installed = False
-        for model_name in candidates:
-            if importlib.util.find_spec(model_name):
-                print(f"Model {model_name} already installed.")
-                installed = True
-                break
+            missing.append(lang)
 
-        if installed:
-            continue
+    if not missing:
+        return
 
-        # 2. If not installed, find the valid one on GitHub
-        found_url = None
-        for model_name in candidates:
-            url = f"https://github.com/explosion/spacy-models/releases/download/{model_name}-{SPACY_VERSION}/{model_name}-{SPACY_VERSION}-py3-none-any.whl"
-            if check_url(url):
-                found_url = url
-                break
+    # 2. Resolve and fetch the wheels in parallel, into the cache if configured
+    # Example ENV: SPACY_WHEEL_CACHE=/var/cache/spacy-wheels
+    # Example ENV: SPACY_MODELS_MIRROR=https://mirror.example.com/spacy
+    # Example ENV: SPACY_MODELS_MIRROR=file:///srv/spacy-wheels (offline)
+    # Example ENV: SPACY_MODEL_CHECKSUMS=/etc/spacy-models.sha256
+    # The checksums file lists the trusted SHA-256 of each wheel in
+    # `sha256sum` format; wheels without an entry are refused.
+    cache_dir = os.environ.get("SPACY_WHEEL_CACHE")
+    mirror = os.environ.get("SPACY_MODELS_MIRROR") or None
+    checksums_path = os.environ.get("SPACY_MODEL_CHECKSUMS")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        try:
+            checksums = load_checksums(checksums_path) if checksums_path else {}
+            wheels = fetch_wheels(
+                missing, cache_dir or tmp_dir, mirror, checksums=checksums
+            )
+        except Exception as e:
+            print(f"Failed to fetch spaCy models: {e}")
+            sys.exit(1)
 
-        if not found_url:
+        unavailable = [lang for lang, path in wheels.items() if path is None]
+        for lang in unavailable:
             print(
-                f"Could not find a valid spaCy model for '{lang}' (checked {candidates})."
+                f"Could not find a valid spaCy model for '{lang}' "
+                f"(checked {model_candidates(lang)})."
             )
+        if unavailable:
             sys.exit(1)
 
-        if not pip_checked:
-            ensure_pip()
-            pip_checked = True
-
-        print(f"Downloading model from: {found_url}...")
+        # 3. Install all wheels at once from local files only
+        ensure_pip()
+        paths = [str(path) for path in wheels.values()]
         try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", found_url])
+            subprocess.check_call(
+                [sys.executable, "-m", "pip", "install", "--no-index", *paths]
+            )
         except subprocess.CalledProcessError as e:
-            print(f"Failed to download {found_url}: {e}")
+            print(f"Failed to install {', '.join(paths)}: {e}")
             sys.exit(1)
 
 
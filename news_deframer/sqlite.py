@@ -0,0 +1,737 @@
+"""SQLite-backed mining repository for local experiments without Postgres."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterator, Optional, Sequence
+from uuid import UUID, uuid4
+
+from news_deframer.config import (
+    PRIORITY_AGE_SCALE,
+    PRIORITY_BACKLOG_WEIGHT,
+    SCHEDULING_MODE_PRIORITY,
+    Config,
+)
+from news_deframer.logger import SilentLogger
+from news_deframer.models import (
+    ContentStems,
+    Feed,
+    Item,
+    Trend,
+    UpsertStats,
+    dedupe_trends,
+    normalize_language_value,
+)
+from news_deframer.scheduling import next_polling_interval, slotted_delay
+
+logger = logging.getLogger(__name__)
+
+# Timestamps are stored as seconds since the epoch (UTC); list columns as JSON.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feeds (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    categories TEXT NOT NULL DEFAULT '[]',
+    language TEXT,
+    root_domain TEXT,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    mining INTEGER NOT NULL DEFAULT 1,
+    deleted_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS feed_schedules (
+    id TEXT PRIMARY KEY REFERENCES feeds (id),
+    next_mining_at REAL,
+    mining_locked_until REAL,
+    mining_locked_by TEXT,
+    updated_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS feed_mining_stats (
+    feed_id TEXT PRIMARY KEY REFERENCES feeds (id),
+    polling_interval INTEGER,
+    arrival_rate REAL,
+    last_yield INTEGER,
+    last_mined_at REAL,
+    pending_items INTEGER NOT NULL DEFAULT 0,
+    oldest_pending_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    feed_id TEXT NOT NULL REFERENCES feeds (id),
+    content TEXT NOT NULL,
+    pub_date REAL NOT NULL,
+    categories TEXT NOT NULL DEFAULT '[]',
+    language TEXT
+);
+
+CREATE INDEX IF NOT EXISTS items_feed_id_pub_date_idx
+    ON items (feed_id, pub_date, id);
+
+CREATE TABLE IF NOT EXISTS trends (
+    item_id TEXT PRIMARY KEY,
+    feed_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    pub_date REAL NOT NULL,
+    category_stems TEXT NOT NULL,
+    noun_stems TEXT NOT NULL,
+    verb_stems TEXT NOT NULL,
+    adjective_stems TEXT NOT NULL,
+    root_domain TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS content_stems (
+    content_hash TEXT PRIMARY KEY,
+    language TEXT NOT NULL,
+    noun_stems TEXT NOT NULL,
+    verb_stems TEXT NOT NULL,
+    adjective_stems TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS item_quarantine (
+    item_id TEXT PRIMARY KEY,
+    feed_id TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    last_error TEXT,
+    next_retry_at REAL NOT NULL
+);
+
+-- Same backlog counter as the trigger in sql/feed_mining_stats.sql.
+CREATE TRIGGER IF NOT EXISTS items_feed_mining_stats
+AFTER INSERT ON items
+BEGIN
+    INSERT INTO feed_mining_stats (feed_id, pending_items, oldest_pending_at)
+    VALUES (NEW.feed_id, 1, NEW.pub_date)
+    ON CONFLICT (feed_id) DO UPDATE SET
+        pending_items = pending_items + 1,
+        oldest_pending_at = MIN(
+            COALESCE(oldest_pending_at, excluded.oldest_pending_at),
+            excluded.oldest_pending_at
+        );
+END;
+"""
+
+
+class SQLiteRepository:
+    """Implements the mining repository against a SQLite database.
+
+    Claims, lock renewal, rescheduling, adaptive polling, priority scheduling,
+    worker languages and quarantine follow the same rules as ``Postgres``, so
+    the poller and the scheduler can be exercised at scale on a laptop. Stems
+    are always stored as text; rollups, dictionary storage and partitioning
+    are not supported. ``clock`` returns the current time in epoch seconds
+    and may be replaced to simulate time.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        path: str = ":memory:",
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.config = config
+        self.clock = clock
+        # The lock heartbeat renews locks from its own thread.
+        self._conn = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.RLock()
+        if config.log_database:
+            self._logger: logging.Logger | SilentLogger = logger.getChild(
+                "SQLiteRepository"
+            )
+        else:
+            self._logger = SilentLogger()
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add_feed(
+        self,
+        url: str,
+        language: Optional[str] = None,
+        categories: Sequence[str] = (),
+        root_domain: Optional[str] = None,
+        next_mining_at: Optional[float] = None,
+        feed_id: Optional[UUID] = None,
+    ) -> UUID:
+        """Create an enabled feed that is due at ``next_mining_at`` (now)."""
+        feed_id = feed_id or uuid4()
+        due = self.clock() if next_mining_at is None else next_mining_at
+        with self._transaction() as cur:
+            cur.execute(
+                """
+                INSERT INTO feeds (id, url, categories, language, root_domain)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    str(feed_id),
+                    url,
+                    json.dumps(list(categories)),
+                    language,
+                    root_domain,
+                ),
+            )
+            cur.execute(
+                "INSERT INTO feed_schedules (id, next_mining_at) VALUES (?, ?)",
+                (str(feed_id), due),
+            )
+        return feed_id
+
+    def add_items(self, items: Sequence[Item]) -> None:
+        """Insert items as the crawler would; they become pending."""
+        with self._transaction() as cur:
+            cur.executemany(
+                """
+                INSERT INTO items (id, feed_id, content, pub_date, categories, language)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        str(item.id),
+                        str(item.feed_id),
+                        item.content,
+                        _to_epoch(item.pub_date),
+                        json.dumps(item.categories),
+                        item.language,
+                    )
+                    for item in items
+                ],
+            )
+
+    def fetch_trends(self) -> list[Trend]:
+        """Return all stored trends in ``(pub_date, item_id)`` order."""
+        with self._transaction() as cur:
+            cur.execute(
+                """
+                SELECT item_id, feed_id, language, pub_date, category_stems,
+                       noun_stems, verb_stems, adjective_stems, root_domain
+                FROM trends
+                ORDER BY pub_date, item_id
+                """
+            )
+            rows = cur.fetchall()
+        return [
+            Trend(
+                item_id=UUID(row[0]),
+                feed_id=UUID(row[1]),
+                language=row[2],
+                pub_date=_from_epoch(row[3]),
+                category_stems=json.loads(row[4]),
+                noun_stems=json.loads(row[5]),
+                verb_stems=json.loads(row[6]),
+                adjective_stems=json.loads(row[7]),
+                root_domain=row[8],
+            )
+            for row in rows
+        ]
+
+    def begin_mine_update(self, lock_duration: int) -> Optional[Feed]:
+        """Attempt to lock the next feed ready for mining."""
+        lock_seconds = max(int(lock_duration), 0)
+        languages = sorted(set(self.config.worker_languages))
+        with self._transaction() as cur:
+            now = self.clock()
+            row = self._select_due_feed(cur, now, languages)
+            if row is None and languages and self.config.language_spillover:
+                row = self._select_due_feed(cur, now, [])
+            if row is None:
+                self._logger.debug("No feeds eligible for mining")
+                return None
+
+            lock_token = uuid4()
+            cur.execute(
+                """
+                UPDATE feed_schedules
+                SET mining_locked_until = ?, mining_locked_by = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (now + lock_seconds, str(lock_token), now, row[0]),
+            )
+        self._logger.debug("Locked feed %s for mining", row[3])
+        return Feed(
+            id=UUID(row[0]),
+            url=row[3],
+            categories=json.loads(row[1]),
+            language=normalize_language_value(row[2]),
+            root_domain=row[4],
+            lock_token=lock_token,
+        )
+
+    def _select_due_feed(
+        self, cur: sqlite3.Cursor, now: float, languages: list[str]
+    ) -> Optional[tuple]:
+        params: list[object] = [now, now]
+        language_sql = ""
+        if languages:
+            # Feeds without language are mined as English (see miner.build_task).
+            placeholders = ", ".join("?" for _ in languages)
+            language_sql = (
+                "AND LOWER(SUBSTR(COALESCE(f.language, 'en'), 1, 2))"
+                f" IN ({placeholders})"
+            )
+            params.extend(languages)
+        cur.execute(
+            f"""
+            SELECT fs.id, f.categories, f.language, f.url, f.root_domain,
+                   fs.next_mining_at, st.pending_items, st.oldest_pending_at
+            FROM feed_schedules AS fs
+            JOIN feeds AS f ON f.id = fs.id
+            LEFT JOIN feed_mining_stats AS st ON st.feed_id = fs.id
+            WHERE fs.next_mining_at IS NOT NULL
+              AND fs.next_mining_at <= ?
+              AND (fs.mining_locked_until IS NULL OR fs.mining_locked_until < ?)
+              AND f.enabled = 1
+              AND f.mining = 1
+              AND f.deleted_at IS NULL
+              {language_sql}
+            ORDER BY fs.next_mining_at ASC
+            """,
+            params,
+        )
+        if self.config.scheduling_mode != SCHEDULING_MODE_PRIORITY:
+            return cur.fetchone()
+
+        candidates = cur.fetchall()
+        if not candidates:
+            return None
+        starved_before = now - self.config.priority_starvation_seconds
+        starved = [row for row in candidates if row[5] < starved_before]
+        if starved:
+            return starved[0]
+
+        def score(row: tuple) -> float:
+            backlog = max(row[6] or 0, 0)
+            age = now - row[7] if row[7] is not None else 0.0
+            return (
+                math.log1p(backlog) * PRIORITY_BACKLOG_WEIGHT + age / PRIORITY_AGE_SCALE
+            )
+
+        # Stable sort: equal scores keep the due-time order.
+        return sorted(candidates, key=score, reverse=True)[0]
+
+    def extend_mine_lock(
+        self, feed_id: UUID, lock_duration: int, lock_token: Optional[UUID] = None
+    ) -> bool:
+        """Push the lock of a feed that is still being mined further out."""
+        with self._transaction() as cur:
+            now = self.clock()
+            params: list[object] = [
+                now + max(int(lock_duration), 0),
+                now,
+                str(feed_id),
+                now,
+            ]
+            owner_sql = ""
+            if lock_token is not None:
+                owner_sql = "AND mining_locked_by = ?"
+                params.append(str(lock_token))
+            cur.execute(
+                f"""
+                UPDATE feed_schedules
+                SET mining_locked_until = ?, updated_at = ?
+                WHERE id = ?
+                  AND mining_locked_until IS NOT NULL
+                  AND mining_locked_until >= ?
+                  {owner_sql}
+                """,
+                params,
+            )
+            return cur.rowcount == 1
+
+    def end_mine_update(
+        self,
+        feed_id: UUID,
+        polling_interval: int,
+        pending_items: Optional[int] = None,
+        mined_items: Optional[int] = None,
+        lock_token: Optional[UUID] = None,
+    ) -> None:
+        """Release the lock and update scheduling metadata."""
+        polling_seconds: float = max(int(polling_interval), 0)
+        key = str(feed_id)
+        with self._transaction() as cur:
+            now = self.clock()
+            if lock_token is not None:
+                cur.execute(
+                    """
+                    SELECT 1 FROM feed_schedules
+                    WHERE id = ? AND mining_locked_by = ?
+                    """,
+                    (key, str(lock_token)),
+                )
+                if cur.fetchone() is None:
+                    self._logger.debug("Feed %s was claimed by another worker", key)
+                    return
+            cur.execute("SELECT enabled, mining FROM feeds WHERE id = ?", (key,))
+            row = cur.fetchone()
+            schedulable = bool(row and row[0] and row[1])
+            priority = self.config.scheduling_mode == SCHEDULING_MODE_PRIORITY
+
+            if mined_items is not None and priority:
+                # Same rules as Postgres._update_backlog.
+                if pending_items is not None:
+                    backlog_sql = "?"
+                    backlog = max(pending_items - mined_items, 0)
+                else:
+                    backlog_sql = "MAX(st.pending_items - ?, 0)"
+                    backlog = mined_items
+                cur.execute(
+                    f"""
+                    UPDATE feed_mining_stats AS st
+                    SET pending_items = {backlog_sql},
+                        oldest_pending_at = CASE
+                            WHEN {backlog_sql} = 0 THEN NULL
+                            ELSE (
+                                SELECT MIN(i.pub_date)
+                                FROM items i
+                                LEFT JOIN trends t ON t.item_id = i.id
+                                WHERE i.feed_id = st.feed_id
+                                  AND (
+                                      st.oldest_pending_at IS NULL
+                                      OR i.pub_date >= st.oldest_pending_at
+                                  )
+                                  AND t.item_id IS NULL
+                            )
+                        END
+                    WHERE st.feed_id = ?
+                    """,
+                    (backlog, backlog, key),
+                )
+
+            next_mining_at = None
+            if schedulable:
+                if self.config.adaptive_polling and pending_items is not None:
+                    polling_seconds = self._adapt_polling_interval(
+                        cur, key, now, int(polling_seconds), pending_items
+                    )
+                if self.config.schedule_slotting:
+                    polling_seconds = slotted_delay(
+                        feed_id, polling_seconds, now, self.config.schedule_slots
+                    )
+                next_mining_at = now + polling_seconds
+            cur.execute(
+                """
+                UPDATE feed_schedules
+                SET mining_locked_until = NULL,
+                    mining_locked_by = NULL,
+                    updated_at = ?,
+                    next_mining_at = ?
+                WHERE id = ?
+                """,
+                (now, next_mining_at, key),
+            )
+
+    def rebalance_schedules(self, polling_interval: int) -> int:
+        """Move every scheduled, unlocked feed onto its slot of the interval."""
+        fallback = max(int(polling_interval), 0)
+        with self._transaction() as cur:
+            now = self.clock()
+            cur.execute(
+                """
+                SELECT fs.id, st.polling_interval
+                FROM feed_schedules AS fs
+                LEFT JOIN feed_mining_stats AS st ON st.feed_id = fs.id
+                WHERE fs.next_mining_at IS NOT NULL
+                  AND (fs.mining_locked_until IS NULL OR fs.mining_locked_until < ?)
+                ORDER BY fs.id
+                """,
+                (now,),
+            )
+            values = []
+            for key, interval in cur.fetchall():
+                if not (self.config.adaptive_polling and interval):
+                    interval = fallback
+                delay = slotted_delay(
+                    UUID(key), interval, now, self.config.schedule_slots, min_delay=0
+                )
+                values.append((now + delay, now, key))
+            cur.executemany(
+                """
+                UPDATE feed_schedules SET next_mining_at = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                values,
+            )
+        return len(values)
+
+    def _adapt_polling_interval(
+        self,
+        cur: sqlite3.Cursor,
+        feed_id: str,
+        now: float,
+        polling_seconds: int,
+        pending_items: int,
+    ) -> int:
+        cur.execute(
+            """
+            SELECT polling_interval, arrival_rate, last_mined_at
+            FROM feed_mining_stats
+            WHERE feed_id = ?
+            """,
+            (feed_id,),
+        )
+        row = cur.fetchone()
+        previous_interval = int(row[0]) if row and row[0] else polling_seconds
+        previous_rate = float(row[1]) if row and row[1] is not None else None
+        elapsed = now - row[2] if row and row[2] is not None else previous_interval
+
+        interval, rate = next_polling_interval(
+            previous_interval,
+            pending_items,
+            elapsed,
+            previous_rate,
+            self.config.polling_interval_min,
+            self.config.polling_interval_max,
+            self.config.polling_target_yield,
+        )
+        cur.execute(
+            """
+            INSERT INTO feed_mining_stats (
+                feed_id, polling_interval, arrival_rate, last_yield, last_mined_at
+            ) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (feed_id) DO UPDATE SET
+                polling_interval = excluded.polling_interval,
+                arrival_rate = excluded.arrival_rate,
+                last_yield = excluded.last_yield,
+                last_mined_at = excluded.last_mined_at
+            """,
+            (feed_id, interval, rate, pending_items, now),
+        )
+        return interval
+
+    def fetch_pending_items(
+        self,
+        feed_id: UUID,
+        feed_url: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[Item]:
+        """Fetch items for the feed that still need mining, oldest first."""
+        params: list[object] = [str(feed_id)]
+        # Same horizon as Postgres, whose expired partitions must not be re-mined.
+        retention_sql = ""
+        if self.config.trends_partitioned and self.config.trend_retention_days > 0:
+            retention_sql = "AND i.pub_date >= ?"
+            params.append(self.clock() - self.config.trend_retention_days * 86400)
+        quarantine_sql = ""
+        if self.config.item_quarantine:
+            quarantine_sql = """
+                AND NOT EXISTS (
+                    SELECT 1 FROM item_quarantine q
+                    WHERE q.item_id = i.id AND q.next_retry_at > ?
+                )
+            """
+            params.append(self.clock())
+        params.append(-1 if limit is None else max(int(limit), 0))
+        with self._transaction() as cur:
+            cur.execute(
+                f"""
+                SELECT i.id, i.feed_id, i.categories, i.language, i.pub_date, i.content
+                FROM items i
+                LEFT JOIN trends t ON t.item_id = i.id
+                WHERE i.feed_id = ?
+                  AND t.item_id IS NULL
+                  {retention_sql}
+                  {quarantine_sql}
+                ORDER BY i.pub_date, i.id
+                LIMIT ?
+                """,
+                params,
+            )
+            rows = cur.fetchall()
+        return [
+            Item(
+                id=UUID(row[0]),
+                feed_id=UUID(row[1]),
+                categories=json.loads(row[2]),
+                language=normalize_language_value(row[3]),
+                pub_date=_from_epoch(row[4]),
+                content=row[5],
+            )
+            for row in rows
+        ]
+
+    def quarantine_item(self, item_id: UUID, feed_id: UUID, error: str) -> None:
+        """Record a failed mining attempt and schedule the item's next retry."""
+        if not self.config.item_quarantine:
+            return
+
+        base = max(int(self.config.quarantine_retry_seconds), 1)
+        cap = max(int(self.config.quarantine_max_retry_seconds), base)
+        with self._transaction() as cur:
+            now = self.clock()
+            cur.execute(
+                "SELECT attempts FROM item_quarantine WHERE item_id = ?",
+                (str(item_id),),
+            )
+            row = cur.fetchone()
+            attempts = row[0] if row else 0
+            delay = base if not attempts else min(base * 2**attempts, cap)
+            cur.execute(
+                """
+                INSERT INTO item_quarantine (
+                    item_id, feed_id, attempts, last_error, next_retry_at
+                ) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (item_id) DO UPDATE SET
+                    attempts = excluded.attempts,
+                    last_error = excluded.last_error,
+                    next_retry_at = excluded.next_retry_at
+                """,
+                (str(item_id), str(feed_id), attempts + 1, error, now + delay),
+            )
+        self._logger.warning(
+            "Quarantined item %s after %s failed attempts", item_id, attempts + 1
+        )
+
+    def upsert_trends(self, trends: list[Trend]) -> UpsertStats:
+        """Insert or update trends, leaving unchanged rows untouched."""
+        if not trends:
+            return UpsertStats()
+
+        trends = dedupe_trends(trends)
+        rows = {
+            str(t.item_id): (
+                str(t.feed_id),
+                t.language,
+                _to_epoch(t.pub_date),
+                json.dumps(t.category_stems),
+                json.dumps(t.noun_stems),
+                json.dumps(t.verb_stems),
+                json.dumps(t.adjective_stems),
+                t.root_domain,
+            )
+            for t in trends
+        }
+        stats = UpsertStats()
+        with self._transaction() as cur:
+            placeholders = ", ".join("?" for _ in rows)
+            cur.execute(
+                f"""
+                SELECT item_id, feed_id, language, pub_date, category_stems,
+                       noun_stems, verb_stems, adjective_stems, root_domain
+                FROM trends
+                WHERE item_id IN ({placeholders})
+                """,
+                list(rows),
+            )
+            existing = {row[0]: tuple(row[1:]) for row in cur.fetchall()}
+            changed = []
+            for item_id, values in rows.items():
+                if item_id not in existing:
+                    stats.inserted += 1
+                elif existing[item_id] != values:
+                    stats.updated += 1
+                else:
+                    stats.unchanged += 1
+                    continue
+                changed.append((item_id, *values))
+            cur.executemany(
+                """
+                INSERT OR REPLACE INTO trends (
+                    item_id, feed_id, language, pub_date, category_stems,
+                    noun_stems, verb_stems, adjective_stems, root_domain
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                changed,
+            )
+            if self.config.item_quarantine:
+                cur.execute(
+                    f"DELETE FROM item_quarantine WHERE item_id IN ({placeholders})",
+                    list(rows),
+                )
+        self._logger.debug(
+            "Upserted %s trends: %s inserted, %s updated, %s unchanged",
+            len(trends),
+            stats.inserted,
+            stats.updated,
+            stats.unchanged,
+        )
+        return stats
+
+    def fetch_content_stems(self, hashes: Sequence[str]) -> dict[str, ContentStems]:
+        """Return previously extracted stems for the given content hashes."""
+        if not hashes:
+            return {}
+        placeholders = ", ".join("?" for _ in hashes)
+        with self._transaction() as cur:
+            cur.execute(
+                f"""
+                SELECT content_hash, language, noun_stems, verb_stems, adjective_stems
+                FROM content_stems
+                WHERE content_hash IN ({placeholders})
+                """,
+                list(hashes),
+            )
+            rows = cur.fetchall()
+        return {
+            row[0]: ContentStems(
+                content_hash=row[0],
+                language=row[1],
+                noun_stems=json.loads(row[2]),
+                verb_stems=json.loads(row[3]),
+                adjective_stems=json.loads(row[4]),
+            )
+            for row in rows
+        }
+
+    def store_content_stems(self, entries: Sequence[ContentStems]) -> None:
+        """Remember extracted stems under their content hash."""
+        if not entries:
+            return
+        with self._transaction() as cur:
+            cur.executemany(
+                """
+                INSERT INTO content_stems (
+                    content_hash, language, noun_stems, verb_stems, adjective_stems
+                ) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (content_hash) DO NOTHING
+                """,
+                [
+                    (
+                        entry.content_hash,
+                        entry.language,
+                        json.dumps(entry.noun_stems),
+                        json.dumps(entry.verb_stems),
+                        json.dumps(entry.adjective_stems),
+                    )
+                    for entry in entries
+                ],
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        # BEGIN IMMEDIATE takes the write lock up front, so claims made by
+        # several processes on one database file serialize like FOR UPDATE.
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                yield cur
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+            else:
+                cur.execute("COMMIT")
+            finally:
+                cur.close()
+
+
+def _to_epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _from_epoch(value: float) -> datetime:
+    return datetime.fromtimestamp(value, timezone.utc)
@@ -0,0 +1,64 @@
+"""Memory watchdog deciding when a long-lived worker should be recycled."""
+
+from __future__ import annotations
+
+import logging
+import os
+import tracemalloc
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_STATM_PATH = "/proc/self/statm"
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Return the resident set size of this process, if the OS exposes it."""
+    try:
+        with open(_STATM_PATH, encoding="ascii") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+class MemoryWatchdog:
+    """Tracks RSS and processed items of a worker between feed claims.
+
+    spaCy's ``StringStore`` and ``Vocab`` only ever grow, so a worker that
+    runs long enough eventually exceeds any memory limit. ``check`` is called
+    after a feed was released and returns a reason once ``max_rss_bytes`` or
+    ``max_items`` is reached; the caller then exits or re-execs cleanly.
+    With ``trace_top`` set, ``tracemalloc`` runs and the largest allocation
+    sites are logged with every check.
+    """
+
+    def __init__(
+        self,
+        max_rss_bytes: int = 0,
+        max_items: int = 0,
+        trace_top: int = 0,
+    ) -> None:
+        self.max_rss_bytes = max(int(max_rss_bytes), 0)
+        self.max_items = max(int(max_items), 0)
+        self.trace_top = max(int(trace_top), 0)
+        if self.trace_top and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def check(self, items_processed: int) -> Optional[str]:
+        """Return why the worker should be recycled, or ``None``."""
+        rss = current_rss_bytes()
+        logger.debug("Worker RSS %s bytes after %s items", rss, items_processed)
+        if self.trace_top:
+            self.log_top_allocations()
+
+        if self.max_items and items_processed >= self.max_items:
+            return f"processed {items_processed} items (limit {self.max_items})"
+        if self.max_rss_bytes and rss is not None and rss >= self.max_rss_bytes:
+            return f"RSS {rss} bytes (limit {self.max_rss_bytes})"
+        return None
+
+    def log_top_allocations(self) -> None:
+        snapshot = tracemalloc.take_snapshot()
+        for index, stat in enumerate(snapshot.statistics("lineno")[: self.trace_top]):
+            logger.info("Top allocation #%s: %s", index + 1, stat)
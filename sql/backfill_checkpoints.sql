@@ -0,0 +1,7 @@
+-- Progress of `miner-cli backfill` runs, keyed by the backfill name.
+CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+    name TEXT PRIMARY KEY,
+    last_pub_date TIMESTAMPTZ,
+    last_item_id UUID,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,9 @@
+-- Stems per normalized content hash, used to skip NLP for syndicated copies.
+CREATE TABLE IF NOT EXISTS content_stems (
+    content_hash TEXT PRIMARY KEY,
+    language TEXT NOT NULL,
+    noun_stems TEXT[] NOT NULL DEFAULT '{}',
+    verb_stems TEXT[] NOT NULL DEFAULT '{}',
+    adjective_stems TEXT[] NOT NULL DEFAULT '{}',
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
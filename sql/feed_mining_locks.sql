@@ -0,0 +1,4 @@
+-- Owner of a feed's mining lock, written by every claim. Lock renewals and
+-- the release only apply while the claiming worker still owns the lock, so
+-- a worker whose lock expired cannot extend or clear another worker's claim.
+ALTER TABLE feed_schedules ADD COLUMN IF NOT EXISTS mining_locked_by UUID;
@@ -0,0 +1,48 @@
+-- Per-feed mining statistics used by the miner's scheduler.
+CREATE TABLE IF NOT EXISTS feed_mining_stats (
+    feed_id UUID PRIMARY KEY REFERENCES feeds (id) ON DELETE CASCADE,
+    -- Adaptive polling (ADAPTIVE_POLLING=true)
+    polling_interval INTEGER,
+    arrival_rate DOUBLE PRECISION,
+    last_yield INTEGER,
+    last_mined_at TIMESTAMPTZ,
+    -- Backlog counter (SCHEDULING_MODE=priority)
+    pending_items INTEGER NOT NULL DEFAULT 0,
+    oldest_pending_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Maintain the backlog counter as items arrive; the miner decrements it.
+CREATE OR REPLACE FUNCTION feed_mining_stats_count_items() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO feed_mining_stats (feed_id, pending_items, oldest_pending_at)
+    SELECT feed_id, COUNT(*), MIN(COALESCE(pub_date, NOW()))
+    FROM new_items
+    GROUP BY feed_id
+    ORDER BY feed_id
+    ON CONFLICT (feed_id) DO UPDATE SET
+        pending_items = feed_mining_stats.pending_items + EXCLUDED.pending_items,
+        oldest_pending_at = LEAST(
+            feed_mining_stats.oldest_pending_at, EXCLUDED.oldest_pending_at
+        ),
+        updated_at = NOW();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER items_feed_mining_stats
+    AFTER INSERT ON items
+    REFERENCING NEW TABLE AS new_items
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION feed_mining_stats_count_items();
+
+-- Initialize the counter from the current backlog:
+--
+-- INSERT INTO feed_mining_stats (feed_id, pending_items, oldest_pending_at)
+-- SELECT i.feed_id, COUNT(*), MIN(i.pub_date)
+-- FROM items i LEFT JOIN trends t ON t.item_id = i.id
+-- WHERE t.item_id IS NULL
+-- GROUP BY i.feed_id
+-- ON CONFLICT (feed_id) DO UPDATE SET
+--     pending_items = EXCLUDED.pending_items,
+--     oldest_pending_at = EXCLUDED.oldest_pending_at;
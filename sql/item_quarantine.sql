@@ -0,0 +1,14 @@
+-- Items whose mining failed, excluded from fetch_pending_items until
+-- next_retry_at. The retry delay doubles with every failed attempt.
+CREATE TABLE IF NOT EXISTS item_quarantine (
+    item_id UUID PRIMARY KEY REFERENCES items (id) ON DELETE CASCADE,
+    feed_id UUID NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    last_error TEXT,
+    first_failed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_failed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    next_retry_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS item_quarantine_feed_id_next_retry_at_idx
+    ON item_quarantine (feed_id, next_retry_at);
@@ -0,0 +1,16 @@
+-- Dictionary-encoded stem storage, used when STEM_STORAGE=dictionary.
+CREATE TABLE IF NOT EXISTS stems (
+    id INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    language TEXT NOT NULL,
+    text TEXT NOT NULL,
+    UNIQUE (language, text)
+);
+
+ALTER TABLE trends
+    ADD COLUMN IF NOT EXISTS category_stem_ids INTEGER[],
+    ADD COLUMN IF NOT EXISTS noun_stem_ids INTEGER[],
+    ADD COLUMN IF NOT EXISTS verb_stem_ids INTEGER[],
+    ADD COLUMN IF NOT EXISTS adjective_stem_ids INTEGER[];
+
+CREATE INDEX IF NOT EXISTS trends_noun_stem_ids_idx
+    ON trends USING GIN (noun_stem_ids);
@@ -0,0 +1,35 @@
+-- Stem counts per pub_date bucket, maintained by the miner when TREND_ROLLUPS=true.
+CREATE TABLE IF NOT EXISTS trend_rollups (
+    bucket TIMESTAMPTZ NOT NULL,
+    language TEXT NOT NULL,
+    root_domain TEXT NOT NULL,
+    kind TEXT NOT NULL CHECK (kind IN ('category', 'noun', 'verb', 'adjective')),
+    stem TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (bucket, language, root_domain, kind, stem)
+);
+
+CREATE INDEX IF NOT EXISTS trend_rollups_language_kind_bucket_idx
+    ON trend_rollups (language, kind, bucket);
+
+-- Seed the rollups from existing trends before enabling TREND_ROLLUPS
+-- (bucket width must match ROLLUP_BUCKET_SECONDS, 1 hour by default):
+--
+-- INSERT INTO trend_rollups (bucket, language, root_domain, kind, stem, count)
+-- SELECT date_bin('1 hour', t.pub_date, TIMESTAMPTZ 'epoch'), t.language,
+--        t.root_domain, s.kind, s.stem, COUNT(*)
+-- FROM trends t
+-- CROSS JOIN LATERAL (
+--     SELECT DISTINCT 'category', unnest(t.category_stems)
+--     UNION ALL SELECT DISTINCT 'noun', unnest(t.noun_stems)
+--     UNION ALL SELECT DISTINCT 'verb', unnest(t.verb_stems)
+--     UNION ALL SELECT DISTINCT 'adjective', unnest(t.adjective_stems)
+-- ) AS s(kind, stem)
+-- GROUP BY 1, 2, 3, 4, 5;
+--
+-- Top noun stems of the last 24 hours:
+--
+-- SELECT stem, SUM(count) AS count
+-- FROM trend_rollups
+-- WHERE language = 'en' AND kind = 'noun' AND bucket >= NOW() - INTERVAL '24 hours'
+-- GROUP BY stem ORDER BY count DESC LIMIT 50;
@@ -0,0 +1,35 @@
+-- Monthly pub_date partitions of trends, used when TRENDS_PARTITIONED=true.
+--
+-- Converts an existing trends table in place. The old table is kept as
+-- trends_unpartitioned until its rows were copied over (see below).
+ALTER TABLE trends RENAME TO trends_unpartitioned;
+
+CREATE TABLE trends (
+    LIKE trends_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+) PARTITION BY RANGE (pub_date);
+
+-- The partition key must be part of every unique constraint, so trends are
+-- upserted on (item_id, pub_date); the miner removes the row of an item
+-- whose pub_date moved to another partition.
+ALTER TABLE trends ADD PRIMARY KEY (item_id, pub_date);
+
+CREATE INDEX IF NOT EXISTS trends_item_id_idx ON trends (item_id);
+CREATE INDEX IF NOT EXISTS trends_language_pub_date_idx ON trends (language, pub_date);
+
+-- Catches rows outside of the created months, e.g. items with bogus dates.
+-- `miner-cli partitions` moves the rows of a month out of it before creating
+-- that month's partition, which Postgres would otherwise refuse.
+CREATE TABLE IF NOT EXISTS trends_default PARTITION OF trends DEFAULT;
+
+-- Create the monthly partitions from the oldest trend up to
+-- TREND_PARTITIONS_AHEAD months ahead, then copy the rows and drop the old
+-- table:
+--
+--   miner-cli partitions --since "$(psql -Atc 'SELECT MIN(pub_date) FROM trends_unpartitioned')"
+--
+-- INSERT INTO trends SELECT * FROM trends_unpartitioned;
+-- DROP TABLE trends_unpartitioned;
+--
+-- Run `miner-cli partitions` (e.g. daily) to keep months ahead available and
+-- `miner-cli retention` to detach or drop months older than
+-- TREND_RETENTION_DAYS.
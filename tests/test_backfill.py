@@ -0,0 +1,169 @@
+from datetime import datetime, timezone
+from typing import cast
+from uuid import UUID, uuid4
+
+from news_deframer.backfill import BackfillOptions, backfill
+from news_deframer.config import Config
+from news_deframer.miner import MiningTask
+from news_deframer.postgres import Feed, Item, Postgres, Trend
+
+
+def make_config() -> Config:
+    return Config(dsn="", log_level="INFO", log_database=False, content_dedup=False)
+
+
+class BackfillRepo:
+    def __init__(self, pairs: list[tuple[Feed, Item]]) -> None:
+        self.pairs = sorted(pairs, key=lambda pair: (pair[1].pub_date, pair[1].id))
+        self.checkpoints: dict[str, tuple[datetime, UUID]] = {}
+        self.upserted: list[Trend] = []
+        self.fail_after_upserts: int | None = None
+        self.failing_items: set[UUID] = set()
+        self.quarantined: list[UUID] = []
+
+    def fetch_backfill_items(
+        self, since, until, limit, after=None, feed_ids=None, languages=None
+    ):
+        selected = [
+            pair
+            for pair in self.pairs
+            if since <= pair[1].pub_date < until
+            and (after is None or (pair[1].pub_date, pair[1].id) > after)
+        ]
+        return selected[:limit]
+
+    def load_backfill_checkpoint(self, name: str):
+        return self.checkpoints.get(name)
+
+    def save_backfill_checkpoint(self, name: str, pub_date, item_id) -> None:
+        self.checkpoints[name] = (pub_date, item_id)
+
+    def clear_backfill_checkpoint(self, name: str) -> None:
+        self.checkpoints.pop(name, None)
+
+    def upsert_trends(self, trends: list[Trend]) -> None:
+        if self.fail_after_upserts is not None:
+            if self.fail_after_upserts == 0:
+                raise RuntimeError("db down")
+            self.fail_after_upserts -= 1
+        if any(trend.item_id in self.failing_items for trend in trends):
+            raise ValueError("bad item")
+        self.upserted.extend(trends)
+
+    def quarantine_item(self, item_id: UUID, feed_id: UUID, error: str) -> None:
+        self.quarantined.append(item_id)
+
+
+def fake_extract_trends(
+    tasks: list[MiningTask], contents=None, max_chars=0
+) -> list[Trend]:
+    return [
+        Trend(
+            item_id=task.item_id,
+            feed_id=task.feed_id,
+            language=task.language,
+            pub_date=task.pub_date,
+            root_domain=task.root_domain,
+        )
+        for task in tasks
+    ]
+
+
+def make_pairs(count: int) -> list[tuple[Feed, Item]]:
+    feed = Feed(id=uuid4(), url="https://feed.example", language="en")
+    return [
+        (
+            feed,
+            Item(
+                id=uuid4(),
+                feed_id=feed.id,
+                content="<item/>",
+                pub_date=datetime(2024, 1, 1, hour, tzinfo=timezone.utc),
+            ),
+        )
+        for hour in range(count)
+    ]
+
+
+def make_options(**kwargs) -> BackfillOptions:
+    return BackfillOptions(
+        since=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        until=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        chunk_size=2,
+        **kwargs,
+    )
+
+
+def test_backfill_mines_all_items_in_chunks(monkeypatch) -> None:
+    monkeypatch.setattr("news_deframer.miner.extract_trends", fake_extract_trends)
+    pairs = make_pairs(5)
+    repo = BackfillRepo(pairs)
+    options = make_options()
+
+    mined = backfill(make_config(), options, repository=cast(Postgres, repo))
+
+    assert mined == 5
+    assert [t.item_id for t in repo.upserted] == [item.id for _, item in pairs]
+    last = pairs[-1][1]
+    assert repo.checkpoints[options.checkpoint_name] == (last.pub_date, last.id)
+
+
+def test_backfill_resumes_from_checkpoint(monkeypatch) -> None:
+    monkeypatch.setattr("news_deframer.miner.extract_trends", fake_extract_trends)
+    pairs = make_pairs(5)
+    repo = BackfillRepo(pairs)
+    repo.fail_after_upserts = 1
+    options = make_options()
+
+    try:
+        backfill(make_config(), options, repository=cast(Postgres, repo))
+    except RuntimeError:
+        pass
+
+    assert len(repo.upserted) == 2
+    repo.fail_after_upserts = None
+
+    mined = backfill(make_config(), options, repository=cast(Postgres, repo))
+
+    assert mined == 3
+    assert [t.item_id for t in repo.upserted] == [item.id for _, item in pairs]
+
+
+def test_backfill_skips_failing_item_and_advances(monkeypatch) -> None:
+    monkeypatch.setattr("news_deframer.miner.extract_trends", fake_extract_trends)
+    pairs = make_pairs(5)
+    repo = BackfillRepo(pairs)
+    bad = pairs[2][1].id
+    repo.failing_items = {bad}
+    options = make_options()
+
+    mined = backfill(make_config(), options, repository=cast(Postgres, repo))
+
+    assert mined == 4
+    assert repo.quarantined == [bad]
+    assert bad not in {t.item_id for t in repo.upserted}
+    last = pairs[-1][1]
+    assert repo.checkpoints[options.checkpoint_name] == (last.pub_date, last.id)
+
+
+def test_backfill_restart_ignores_checkpoint(monkeypatch) -> None:
+    monkeypatch.setattr("news_deframer.miner.extract_trends", fake_extract_trends)
+    pairs = make_pairs(3)
+    repo = BackfillRepo(pairs)
+    options = make_options(restart=True)
+    last = pairs[-1][1]
+    repo.checkpoints[options.checkpoint_name] = (last.pub_date, last.id)
+
+    mined = backfill(make_config(), options, repository=cast(Postgres, repo))
+
+    assert mined == 3
+
+
+def test_checkpoint_name_depends_on_filters() -> None:
+    feed_id = uuid4()
+    plain = make_options()
+    filtered = make_options(feed_ids=[feed_id], languages=["de"])
+
+    assert plain.checkpoint_name != filtered.checkpoint_name
+    assert str(feed_id) in filtered.checkpoint_name
+    assert make_options(name="rerun").checkpoint_name == "rerun"
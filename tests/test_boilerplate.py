@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from uuid import uuid4
+
+from news_deframer.boilerplate import BoilerplateLearner, split_segments
+
+
+def test_split_segments_uses_lines_and_sentences():
+    assert split_segments("First one. Second one!\n\nThird") == [
+        "First one.",
+        "Second one!",
+        "Third",
+    ]
+
+
+def test_learns_repeated_trailer_per_feed():
+    learner = BoilerplateLearner(window=10, min_items=3, min_share=0.5)
+    feed_id = uuid4()
+    other_feed = uuid4()
+    for index in range(4):
+        learner.observe(
+            feed_id,
+            uuid4(),
+            f"Story number {index} happened. Subscribe to our newsletter!",
+        )
+
+    stripped = learner.strip(feed_id, "Markets rally. Subscribe to our  newsletter!")
+
+    assert stripped == "Markets rally."
+    assert learner.strip(other_feed, "Subscribe to our newsletter! Yes.") == (
+        "Subscribe to our newsletter! Yes."
+    )
+
+
+def test_needs_min_items_and_ignores_reobserved_items():
+    learner = BoilerplateLearner(window=10, min_items=3, min_share=0.5)
+    feed_id = uuid4()
+    item_id = uuid4()
+    for _ in range(5):
+        learner.observe(feed_id, item_id, "Same item. Trailer line.")
+
+    assert learner.boilerplate(feed_id) == set()
+
+
+def test_window_forgets_old_items():
+    learner = BoilerplateLearner(window=3, min_items=1, min_share=0.5)
+    feed_id = uuid4()
+    for _ in range(3):
+        learner.observe(feed_id, uuid4(), "Old trailer.")
+    for index in range(3):
+        learner.observe(feed_id, uuid4(), f"Fresh item {index}.")
+
+    assert learner.boilerplate(feed_id) == set()
+
+
+def test_builtin_patterns_strip_common_trailers():
+    learner = BoilerplateLearner()
+    content = (
+        "Central bank raises rates.\n"
+        "The post Rates rise appeared first on Example News.\n"
+        "© 2024 Example Media"
+    )
+
+    assert learner.strip(uuid4(), content) == "Central bank raises rates."
+    assert learner.strip(uuid4(), "Read more") == "Read more"
+
+
+def test_read_more_is_only_stripped_at_the_end_of_a_paragraph():
+    learner = BoilerplateLearner()
+    running = "Rates rise. Read more about the decision. Markets fell."
+
+    assert learner.strip(uuid4(), running) == running
+    assert (
+        learner.strip(uuid4(), "Rates rise. Continue reading on Example News »")
+        == "Rates rise."
+    )
+    assert (
+        learner.strip(uuid4(), "Rates rise. Read more...\nMarkets fell.")
+        == "Rates rise.\nMarkets fell."
+    )
+
+
+def test_stripping_keeps_paragraph_breaks():
+    learner = BoilerplateLearner()
+    content = "Rates rise. Read more…\n\nMarkets fell. Read more…\nBonds rallied."
+
+    assert (
+        learner.strip(uuid4(), content)
+        == "Rates rise.\n\nMarkets fell.\nBonds rallied."
+    )
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 from unittest.mock import MagicMock
 
 from news_deframer.cli import miner as miner_cli
+from news_deframer.config import RECYCLE_EXIT_CODE
 
 
 def test_main_runs_poll(monkeypatch):
@@ -10,7 +12,9 @@ def test_main_runs_poll(monkeypatch):
     called = {}
 
     monkeypatch.setattr("news_deframer.cli.miner.Config.load", lambda: fake_config)
-    monkeypatch.setattr("news_deframer.cli.miner.configure_logging", lambda level: None)
+    monkeypatch.setattr(
+        "news_deframer.cli.miner.configure_logging", lambda level, **kwargs: None
+    )
 
     def fake_poll(config):
         called["config"] = config
@@ -21,3 +25,59 @@ def test_main_runs_poll(monkeypatch):
 
     assert exit_code == 0
     assert called["config"] is fake_config
+
+
+def test_main_exits_for_recycling(monkeypatch):
+    fake_config = MagicMock()
+    fake_config.recycle_mode = "exit"
+
+    monkeypatch.setattr("news_deframer.cli.miner.Config.load", lambda: fake_config)
+    monkeypatch.setattr(
+        "news_deframer.cli.miner.configure_logging", lambda level, **kwargs: None
+    )
+    monkeypatch.setattr(
+        "news_deframer.cli.miner.poller_module.poll", lambda config: True
+    )
+
+    assert miner_cli.main([]) == RECYCLE_EXIT_CODE
+
+
+def test_main_runs_backfill(monkeypatch):
+    fake_config = MagicMock()
+    called = {}
+
+    monkeypatch.setattr("news_deframer.cli.miner.Config.load", lambda: fake_config)
+    monkeypatch.setattr(
+        "news_deframer.cli.miner.configure_logging", lambda level, **kwargs: None
+    )
+
+    def fake_backfill(config, options):
+        called["config"] = config
+        called["options"] = options
+
+    monkeypatch.setattr(
+        "news_deframer.cli.miner.backfill_module.backfill", fake_backfill
+    )
+
+    exit_code = miner_cli.main(
+        [
+            "backfill",
+            "--since",
+            "2024-01-01",
+            "--until",
+            "2024-02-01T00:00:00+00:00",
+            "--languages",
+            "en",
+            "de",
+            "--workers",
+            "2",
+        ]
+    )
+
+    assert exit_code == 0
+    options = called["options"]
+    assert called["config"] is fake_config
+    assert options.since == datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert options.until == datetime(2024, 2, 1, tzinfo=timezone.utc)
+    assert options.languages == ["en", "de"]
+    assert options.workers == 2
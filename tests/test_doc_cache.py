@@ -0,0 +1,82 @@
+import pickle
+from uuid import uuid4
+
+from news_deframer.doc_cache import DocCache, document_key
+
+
+def test_document_key_normalizes_case_and_whitespace() -> None:
+    assert document_key("Hello  World", "en") == document_key("hello world\n", "en")
+    assert document_key("Hello World", "en") != document_key("Hello World", "de")
+
+
+def test_lookup_returns_annotations_of_linked_items(tmp_path) -> None:
+    cache = DocCache(str(tmp_path / "docs.sqlite"), max_bytes=0)
+    first, copy, unknown = uuid4(), uuid4(), uuid4()
+    key = document_key("Some text", "en")
+
+    cache.store([(key, "en", "en_core_web_sm-3.8.0", b"doc")])
+    cache.link([(first, key), (copy, key)])
+
+    assert cache.lookup([first, copy, unknown]) == {
+        first: (key, "en", "en_core_web_sm-3.8.0", b"doc"),
+        copy: (key, "en", "en_core_web_sm-3.8.0", b"doc"),
+    }
+
+
+def test_store_evicts_least_recently_used_beyond_max_bytes(
+    tmp_path, monkeypatch
+) -> None:
+    now = [1000.0]
+    monkeypatch.setattr("news_deframer.doc_cache.time.time", lambda: now[0])
+    cache = DocCache(str(tmp_path / "docs.sqlite"), max_bytes=15)
+    items = {name: uuid4() for name in "abc"}
+    for name, item_id in items.items():
+        cache.store([(name, "en", "v1", b"12345")])
+        cache.link([(item_id, name)])
+        now[0] += 1
+    # Using "a" makes "b" the least recently used document.
+    cache.lookup([items["a"]])
+    now[0] += 1
+
+    cache.store([("d", "en", "v1", b"12345")])
+
+    assert set(cache.lookup(list(items.values()))) == {items["a"], items["c"]}
+    assert cache.size() == 15
+
+
+def test_cache_reopens_after_pickling(tmp_path) -> None:
+    cache = DocCache(str(tmp_path / "docs.sqlite"), max_bytes=100)
+    item_id = uuid4()
+    cache.store([("key", "en", "v1", b"doc")])
+    cache.link([(item_id, "key")])
+
+    clone = pickle.loads(pickle.dumps(cache))
+
+    assert clone.max_bytes == 100
+    assert clone.lookup([item_id]) == {item_id: ("key", "en", "v1", b"doc")}
+
+
+def test_link_skips_keys_without_stored_annotations(tmp_path) -> None:
+    cache = DocCache(str(tmp_path / "docs.sqlite"), max_bytes=0)
+    item_id = uuid4()
+    cache.store([("old", "en", "v1", b"doc")])
+    cache.link([(item_id, "old")])
+
+    # The new content of the item was never stored, e.g. it was not parsed.
+    cache.link([(item_id, "new")])
+
+    assert cache.lookup([item_id]) == {}
+
+
+def test_size_follows_replaced_and_evicted_documents(tmp_path, monkeypatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr("news_deframer.doc_cache.time.time", lambda: now[0])
+    cache = DocCache(str(tmp_path / "docs.sqlite"), max_bytes=10)
+    cache.store([("b", "en", "v1", b"123"), ("c", "en", "v1", b"12")])
+    now[0] += 1
+
+    # Replacing "c" grows the total beyond the cap and evicts "b".
+    cache.store([("c", "en", "v2", b"123456789")])
+
+    assert cache.size() == 9
+    assert DocCache(cache.path, max_bytes=10).size() == 9
@@ -0,0 +1,125 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import cast
+from uuid import uuid4
+
+import pyarrow.parquet as pq  # type: ignore[import-untyped]
+import pytest
+
+from news_deframer.config import Config
+from news_deframer.export import ExportOptions, export_trends, read_watermark
+from news_deframer.postgres import Postgres, Trend
+
+
+def make_config() -> Config:
+    return Config(dsn="", log_level="INFO", log_database=False)
+
+
+def make_trend(language: str, day: int, hour: int = 0) -> Trend:
+    return Trend(
+        item_id=uuid4(),
+        feed_id=uuid4(),
+        language=language,
+        pub_date=datetime(2024, 1, day, hour, tzinfo=timezone.utc),
+        root_domain="example.com",
+        category_stems=["politics"],
+        noun_stems=["city", "mayor"],
+        verb_stems=["elect"],
+    )
+
+
+class ExportRepo:
+    def __init__(self, trends: list[Trend], fail: bool = False) -> None:
+        self.trends = sorted(trends, key=lambda t: (t.pub_date, t.item_id))
+        self.fail = fail
+        self.calls: list[dict] = []
+
+    def iter_trends(self, batch_size, after=None, until=None, languages=None):
+        self.calls.append({"after": after, "until": until, "languages": languages})
+        selected = [
+            t
+            for t in self.trends
+            if (after is None or (t.pub_date, t.item_id) > after)
+            and (not languages or t.language in languages)
+        ]
+        for start in range(0, len(selected), batch_size):
+            yield selected[start : start + batch_size]
+            if self.fail:
+                raise RuntimeError("connection lost")
+
+
+def partition_files(root: Path) -> list[str]:
+    return sorted(
+        str(path.relative_to(root).parent) for path in root.rglob("*.parquet")
+    )
+
+
+def test_export_writes_partitions_with_list_columns(tmp_path: Path) -> None:
+    trends = [make_trend("en", 1), make_trend("de", 1, 5), make_trend("en", 2)]
+    repo = ExportRepo(trends)
+
+    exported = export_trends(
+        make_config(),
+        ExportOptions(output=tmp_path, batch_size=1),
+        repository=cast(Postgres, repo),
+    )
+
+    assert exported == 3
+    assert partition_files(tmp_path) == [
+        "language=de/date=2024-01-01",
+        "language=en/date=2024-01-01",
+        "language=en/date=2024-01-02",
+    ]
+    table = pq.read_table(next((tmp_path / "language=de").rglob("*.parquet")))
+    assert table.column("noun_stems").to_pylist() == [["city", "mayor"]]
+    assert table.column("item_id").to_pylist() == [str(trends[1].item_id)]
+
+
+def test_export_is_incremental(tmp_path: Path) -> None:
+    first = make_trend("en", 1)
+    repo = ExportRepo([first])
+    options = ExportOptions(output=tmp_path)
+
+    export_trends(make_config(), options, repository=cast(Postgres, repo))
+    assert read_watermark(tmp_path) == (first.pub_date, first.item_id)
+
+    second = make_trend("en", 3)
+    repo.trends.append(second)
+    exported = export_trends(make_config(), options, repository=cast(Postgres, repo))
+
+    assert exported == 1
+    assert repo.calls[-1]["after"] == (first.pub_date, first.item_id)
+    assert read_watermark(tmp_path) == (second.pub_date, second.item_id)
+
+
+def test_filtered_export_keeps_its_own_watermark(tmp_path: Path) -> None:
+    english, german = make_trend("en", 1), make_trend("de", 2)
+    repo = ExportRepo([english, german])
+
+    export_trends(
+        make_config(),
+        ExportOptions(output=tmp_path, languages=["de"]),
+        repository=cast(Postgres, repo),
+    )
+
+    assert read_watermark(tmp_path, ["de"]) == (german.pub_date, german.item_id)
+    assert read_watermark(tmp_path) is None
+    export_trends(
+        make_config(), ExportOptions(output=tmp_path), repository=cast(Postgres, repo)
+    )
+    assert repo.calls[-1]["after"] is None
+
+
+def test_export_failure_leaves_no_files(tmp_path: Path) -> None:
+    repo = ExportRepo([make_trend("en", 1), make_trend("en", 2)], fail=True)
+
+    with pytest.raises(RuntimeError):
+        export_trends(
+            make_config(),
+            ExportOptions(output=tmp_path, batch_size=1),
+            repository=cast(Postgres, repo),
+        )
+
+    assert list(tmp_path.rglob("*.parquet")) == []
+    assert list(tmp_path.rglob("*.tmp")) == []
+    assert read_watermark(tmp_path) is None
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+import logging
+
+from news_deframer import logger as logger_module
+from news_deframer.logger import (
+    JsonFormatter,
+    RateLimitFilter,
+    configure_logging,
+    shutdown_logging,
+)
+
+
+def make_record(msg: str, level: int = logging.INFO, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("test", level, __file__, 1, msg, (), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_merges_extras():
+    line = JsonFormatter().format(make_record("hello", feed_url="https://a", skip=None))
+
+    payload = json.loads(line)
+    assert payload["message"] == "hello"
+    assert payload["level"] == "INFO"
+    assert payload["feed_url"] == "https://a"
+    assert "skip" not in payload
+
+
+def test_rate_limit_filter_samples_repeated_messages(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(logger_module.time, "monotonic", lambda: now[0])
+    rate_filter = RateLimitFilter(burst=2, interval=60)
+
+    passed = [rate_filter.filter(make_record("hot loop")) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert rate_filter.filter(make_record("other message")) is True
+    assert rate_filter.filter(make_record("hot loop", logging.WARNING)) is True
+
+    now[0] = 61.0
+    record = make_record("hot loop")
+    assert rate_filter.filter(record) is True
+    assert record.__dict__["suppressed"] == 3
+
+
+def test_async_logging_writes_from_listener(capsys):
+    configure_logging("INFO", log_format="json", async_logging=True)
+    try:
+        logging.getLogger("news_deframer.test").info("queued", extra={"n": 1})
+    finally:
+        shutdown_logging()
+        configure_logging("WARNING")
+
+    payload = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert payload["message"] == "queued"
+    assert payload["n"] == 1
@@ -0,0 +1,137 @@
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+from uuid import uuid4
+
+import pyarrow as pa  # type: ignore[import-untyped]
+import pyarrow.parquet as pq  # type: ignore[import-untyped]
+import pytest
+
+from news_deframer.config import Config
+from news_deframer.miner import MiningTask
+from news_deframer.mine_file import MineFileOptions, mine_file, record_task
+from news_deframer.postgres import Trend
+
+
+def make_config() -> Config:
+    return Config(dsn="", log_level="INFO", log_database=False)
+
+
+def fake_extract_trends(
+    tasks: list[MiningTask], contents=None, max_chars=0
+) -> list[Trend]:
+    return [
+        Trend(
+            item_id=task.item_id,
+            feed_id=task.feed_id,
+            language=task.language,
+            pub_date=task.pub_date,
+            root_domain=task.root_domain,
+            noun_stems=sorted((task.title or "").lower().split()),
+        )
+        for task in tasks
+    ]
+
+
+def make_records(count: int) -> list[dict]:
+    return [
+        {
+            "id": str(uuid4()),
+            "feed_url": "https://news.example.co.uk/rss",
+            "language": "EN",
+            "pub_date": f"2024-01-01T{index:02d}:00:00+00:00",
+            "content": (
+                f"<deframer:title_original>Story {index}</deframer:title_original>"
+            ),
+        }
+        for index in range(count)
+    ]
+
+
+def test_record_task_reads_deframer_markup() -> None:
+    (record,) = make_records(1)
+
+    task = record_task(record)
+
+    assert task.title == "Story 0"
+    assert task.language == "en"
+    assert task.root_domain == "example.co.uk"
+    assert task.pub_date == datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_record_task_rejects_non_list_categories() -> None:
+    (record,) = make_records(1)
+    record["categories"] = "Politics"
+
+    with pytest.raises(ValueError, match="categories"):
+        record_task(record)
+
+
+def test_mine_file_failure_leaves_no_output(monkeypatch, tmp_path: Path) -> None:
+    calls: list[int] = []
+
+    def failing_extract_trends(tasks, contents=None, max_chars=0):
+        calls.append(len(tasks))
+        if len(calls) > 1:
+            raise RuntimeError("model crashed")
+        return fake_extract_trends(tasks)
+
+    monkeypatch.setattr("news_deframer.miner.extract_trends", failing_extract_trends)
+    source = tmp_path / "items.jsonl"
+    source.write_text("\n".join(map(json.dumps, make_records(3))) + "\n")
+    target = tmp_path / "trends.parquet"
+
+    with pytest.raises(RuntimeError, match="model crashed"):
+        mine_file(
+            make_config(), MineFileOptions(input=source, output=target, batch_size=2)
+        )
+
+    assert list(tmp_path.iterdir()) == [source]
+
+
+def test_mine_file_streams_jsonl_into_parquet(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr("news_deframer.miner.extract_trends", fake_extract_trends)
+    records = make_records(5)
+    source = tmp_path / "items.jsonl"
+    source.write_text(
+        "\n".join([json.dumps(records[0]), "not json", *map(json.dumps, records[1:])])
+        + "\n"
+    )
+    target = tmp_path / "out" / "trends.parquet"
+
+    mined = mine_file(
+        make_config(), MineFileOptions(input=source, output=target, batch_size=2)
+    )
+
+    assert mined == 5
+    table = pq.read_table(target)
+    assert table.column("item_id").to_pylist() == [r["id"] for r in records]
+    assert table.column("language").to_pylist() == ["en"] * 5
+    assert table.column("noun_stems").to_pylist()[1] == ["1", "story"]
+    assert not list(target.parent.glob(".*.tmp"))
+
+
+def test_mine_file_reads_parquet_and_writes_jsonl(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr("news_deframer.miner.extract_trends", fake_extract_trends)
+    source = tmp_path / "items.parquet"
+    pq.write_table(
+        pa.table(
+            {
+                "title": ["Mayor elected", None],
+                "description": ["in the city", None],
+                "pub_date": [datetime(2024, 1, 1, tzinfo=timezone.utc)] * 2,
+                "language": ["de", "de"],
+            }
+        ),
+        source,
+    )
+    target = tmp_path / "trends.jsonl"
+
+    mined = mine_file(make_config(), MineFileOptions(input=source, output=target))
+
+    assert mined == 1
+    (line,) = target.read_text().splitlines()
+    trend = json.loads(line)
+    assert trend["language"] == "de"
+    assert trend["noun_stems"] == ["elected", "mayor"]
+    assert trend["pub_date"] == "2024-01-01T00:00:00+00:00"
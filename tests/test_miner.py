@@ -1,22 +1,34 @@
-from datetime import datetime
-from typing import cast
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from datetime import datetime, timezone
+from typing import Any, cast
 from uuid import uuid4
 
 import pytest
 
-from news_deframer import nlp
+from news_deframer import arrow_ipc, nlp
 from news_deframer.config import Config
-from news_deframer.miner import Miner, MiningTask
-from news_deframer.postgres import Postgres, Trend
+from news_deframer.miner import Miner, MiningTask, discard_extract, submit_extract
+from news_deframer.postgres import ContentStems, Postgres, Trend
 
 
 class RepositoryStub:
     def __init__(self):
         self.upserted = []
+        self.content_stems: dict[str, ContentStems] = {}
+        self.content_lookups: list[list[str]] = []
 
     def upsert_trends(self, trends: list[Trend]):
         self.upserted.extend(trends)
 
+    def fetch_content_stems(self, hashes):
+        self.content_lookups.append(list(hashes))
+        return {h: self.content_stems[h] for h in hashes if h in self.content_stems}
+
+    def store_content_stems(self, entries):
+        for entry in entries:
+            self.content_stems[entry.content_hash] = entry
+
 
 def make_config() -> Config:
     return Config(dsn="", log_level="INFO", log_database=False)
@@ -111,3 +123,195 @@ def test_miner_stem_extraction_real_models(
     stored_trend = repo.upserted[0]
     assert stored_trend.noun_stems == expected_nouns
     assert stored_trend.verb_stems == expected_verbs
+
+
+def make_task(title: str, description: str, **kwargs) -> MiningTask:
+    values: dict[str, Any] = {
+        "feed_id": uuid4(),
+        "feed_url": "https://feed",
+        "item_id": uuid4(),
+        "language": "en",
+        "categories": [],
+        "title": title,
+        "description": description,
+        "pub_date": datetime(2024, 1, 1, 12, 0, 0),
+        "root_domain": "example.com",
+    }
+    values.update(kwargs)
+    return MiningTask(**values)
+
+
+def test_mine_items_reuses_stems_for_duplicate_content(monkeypatch):
+    mined: list[list[str]] = []
+
+    def fake_extract_trends(tasks, contents=None, max_chars=0):
+        mined.append(list(contents or []))
+        return [
+            Trend(
+                item_id=task.item_id,
+                feed_id=task.feed_id,
+                language=task.language,
+                pub_date=task.pub_date,
+                root_domain=task.root_domain,
+                noun_stems=sorted(content.lower().split()),
+            )
+            for task, content in zip(tasks, contents or [])
+        ]
+
+    monkeypatch.setattr("news_deframer.miner.extract_trends", fake_extract_trends)
+    monkeypatch.setattr(
+        "news_deframer.miner.content_hash",
+        lambda content, language: f"{language}:{' '.join(content.lower().split())}",
+    )
+
+    repo = RepositoryStub()
+    config = make_config()
+    config.content_dedup = True
+    miner = Miner(config, repository=cast(Postgres, repo))
+    original = make_task("Wire <b>Story</b>", "Markets rally")
+    copy = make_task("wire story", " markets   rally ", root_domain="other.org")
+    other = make_task("Other", "news")
+
+    miner.mine_items([original, copy, other])
+
+    assert mined == [["Wire Story Markets rally", "Other news"]]
+    assert [t.item_id for t in repo.upserted] == [
+        original.item_id,
+        copy.item_id,
+        other.item_id,
+    ]
+    assert repo.upserted[1].noun_stems == ["markets", "rally", "story", "wire"]
+    assert repo.upserted[1].root_domain == "other.org"
+    assert repo.upserted[1].feed_id == copy.feed_id
+    assert len(repo.content_stems) == 2
+
+    fresh_miner = Miner(config, repository=cast(Postgres, repo))
+    fresh_miner.mine_items([make_task("WIRE STORY", "markets rally")])
+    assert len(mined) == 1
+
+    repo.content_lookups.clear()
+    fresh_miner.mine_items([make_task("Wire Story", "Markets rally")])
+    assert repo.content_lookups == []
+    assert len(mined) == 1
+
+
+def test_mine_items_counts_oversized_items_per_feed(monkeypatch):
+    limits: list[int] = []
+
+    def fake_extract_trends(tasks, contents=None, max_chars=0):
+        limits.append(max_chars)
+        return []
+
+    monkeypatch.setattr("news_deframer.miner.extract_trends", fake_extract_trends)
+
+    config = make_config()
+    config.content_dedup = False
+    config.max_content_chars = 20
+    miner = Miner(config, repository=cast(Postgres, RepositoryStub()))
+
+    miner.mine_items(
+        [
+            make_task("Short", "text", feed_url="https://a"),
+            make_task(
+                "A very long title", "and an even longer body", feed_url="https://a"
+            ),
+            make_task("Another long title", "with a long body", feed_url="https://b"),
+        ]
+    )
+
+    assert limits == [20]
+    assert miner.oversized_items == {"https://a": 1, "https://b": 1}
+
+
+def test_mine_items_strips_feed_boilerplate(monkeypatch):
+    mined: list[str] = []
+
+    def fake_extract_trends(tasks, contents=None, max_chars=0):
+        mined.extend(contents or [])
+        return []
+
+    monkeypatch.setattr("news_deframer.miner.extract_trends", fake_extract_trends)
+
+    config = make_config()
+    config.content_dedup = False
+    config.boilerplate_stripping = True
+    miner = Miner(config, repository=cast(Postgres, RepositoryStub()))
+    feed_id = uuid4()
+    tasks = [
+        make_task(f"Story {index}", "Happened today. Follow us for more news.")
+        for index in range(6)
+    ]
+    for task in tasks:
+        task.feed_id = feed_id
+
+    miner.mine_items(tasks)
+
+    assert mined[0] == "Story 0 Happened today."
+
+
+def test_mine_items_hands_batches_over_shared_memory(monkeypatch):
+    seen: list[tuple[list[MiningTask], list[str]]] = []
+
+    def fake_extract_trends(tasks, contents=None, max_chars=0):
+        seen.append((list(tasks), list(contents or [])))
+        return [
+            Trend(
+                item_id=task.item_id,
+                feed_id=task.feed_id,
+                language=task.language,
+                pub_date=task.pub_date,
+                root_domain=task.root_domain,
+                noun_stems=sorted(content.lower().split()),
+            )
+            for task, content in zip(tasks, contents or [])
+        ]
+
+    monkeypatch.setattr("news_deframer.miner.extract_trends", fake_extract_trends)
+    released: list[str] = []
+    monkeypatch.setattr(
+        "news_deframer.miner.release",
+        lambda handle: (released.append(handle.name), arrow_ipc.release(handle)),
+    )
+    config = make_config()
+    config.content_dedup = False
+    config.arrow_ipc = True
+    repo = RepositoryStub()
+    miner = Miner(config, repository=cast(Postgres, repo))
+    tasks = [
+        make_task(
+            "Mayor",
+            "elected",
+            categories=["Politics"],
+            pub_date=datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+        )
+        for _ in range(3)
+    ]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        trends = miner.mine_items(tasks, executor=executor)
+
+    ((received, contents),) = seen
+    assert received == tasks
+    assert contents == ["Mayor elected"] * 3
+    assert [t.item_id for t in trends] == [task.item_id for task in tasks]
+    assert trends[0].noun_stems == ["elected", "mayor"]
+    assert trends[0].pub_date == tasks[0].pub_date
+    # The task batch and the result batch are both freed.
+    assert len(released) == 2
+
+
+def test_discarded_shared_batch_result_is_released(monkeypatch):
+    monkeypatch.setattr(
+        "news_deframer.miner.extract_trends",
+        lambda tasks, contents=None, max_chars=0: [],
+    )
+    tasks = [make_task("Mayor", "elected")]
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = submit_extract(executor, tasks, ["Mayor elected"], 0, True)
+        result = future.result()
+        discard_extract(future)
+
+    # Nobody read the trends, yet their segment is gone.
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=result.name)
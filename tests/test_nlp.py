@@ -3,6 +3,7 @@ from __future__ import annotations
 import pytest
 
 from news_deframer import nlp
+from news_deframer.doc_cache import document_key
 
 
 def test_sanitize_text_strips_html() -> None:
@@ -162,3 +163,188 @@ def test_stem_category_real_models(
         pytest.skip(f"spaCy model for {language} unavailable")
 
     assert nlp.stem_category(text, language) == expected
+
+
+def test_extract_stems_batch_preserves_order(monkeypatch) -> None:
+    class DummyToken:
+        def __init__(self, lemma: str, pos: str):
+            self.lemma_ = lemma
+            self.pos_ = pos
+            self.is_alpha = True
+            self.is_stop = False
+
+    class DummyModel:
+        def __init__(self) -> None:
+            self.piped: list[str] = []
+
+        def pipe(self, texts, batch_size: int = 1):
+            for text in texts:
+                self.piped.append(text)
+                yield [DummyToken(word, "NOUN") for word in text.split()]
+
+    model = DummyModel()
+    monkeypatch.setattr(nlp, "_get_spacy_model", lambda _: model)
+
+    results = nlp.extract_stems_batch(["b a", "  ", "c"], "en")
+
+    assert model.piped == ["b a", "c"]
+    assert [nouns for nouns, _, _ in results] == [["a", "b"], [], ["c"]]
+
+
+def test_extract_stems_batch_merges_pieces_of_oversized_content(monkeypatch) -> None:
+    class DummyToken:
+        def __init__(self, lemma: str):
+            self.lemma_ = lemma
+            self.pos_ = "NOUN"
+            self.is_alpha = True
+            self.is_stop = False
+
+    class DummyModel:
+        def __init__(self) -> None:
+            self.piped: list[str] = []
+
+        def pipe(self, texts, batch_size: int = 1):
+            for text in texts:
+                self.piped.append(text)
+                yield [DummyToken(word.strip(".")) for word in text.split()]
+
+    model = DummyModel()
+    monkeypatch.setattr(nlp, "_get_spacy_model", lambda _: model)
+
+    results = nlp.extract_stems_batch(
+        ["short", "alpha beta.\n\ngamma alpha.", "delta"], "en", max_chars=12
+    )
+
+    assert model.piped == ["short", "alpha beta.", "gamma alpha.", "delta"]
+    assert [nouns for nouns, _, _ in results] == [
+        ["short"],
+        ["alpha", "beta", "gamma"],
+        ["delta"],
+    ]
+
+
+def test_split_content_prefers_paragraphs_then_sentences() -> None:
+    text = "One two. Three four.\n\nFive.\n\n" + "x" * 25
+
+    pieces = nlp.split_content(text, 10)
+
+    assert pieces == [
+        "One two.",
+        "Three",
+        "four.",
+        "Five.",
+        "x" * 10,
+        "x" * 10,
+        "x" * 5,
+    ]
+    assert nlp.split_content("fits", 10) == ["fits"]
+    assert nlp.split_content("long text stays whole", 0) == ["long text stays whole"]
+
+
+def test_content_hash_normalizes_case_and_whitespace(monkeypatch) -> None:
+    monkeypatch.setattr(nlp, "pipeline_version", lambda _lang: "v1")
+
+    digest = nlp.content_hash("Breaking:  Markets\nRally", "en")
+
+    assert digest == nlp.content_hash("breaking: markets rally", "en")
+    assert digest != nlp.content_hash("breaking: markets rally", "de")
+
+    monkeypatch.setattr(nlp, "pipeline_version", lambda _lang: "v2")
+    assert digest != nlp.content_hash("breaking: markets rally", "en")
+    assert nlp.content_hash("Markets rally", "en") == nlp.document_content_hash(
+        document_key("markets  rally", "en"), "en"
+    )
+
+
+def _patch_blank_model(monkeypatch) -> list[object]:
+    spacy = pytest.importorskip("spacy")
+    real_load = spacy.load
+    loads: list[object] = []
+
+    def fake_load(name, **kwargs):
+        loads.append(name)
+        if name == "en_core_web_sm":
+            return spacy.blank("en")
+        return real_load(name, **kwargs)
+
+    monkeypatch.setattr(spacy, "load", fake_load)
+    monkeypatch.setattr(nlp, "_NLP_CACHE", {})
+    monkeypatch.setattr(nlp, "_STOPWORD_CACHE", {})
+    return loads
+
+
+def test_get_spacy_model_loads_matching_snapshot(monkeypatch, tmp_path) -> None:
+    loads = _patch_blank_model(monkeypatch)
+    monkeypatch.setattr(nlp, "_installed_model_version", lambda name: "0.0.0")
+    target = nlp.save_snapshot("en", tmp_path)
+    assert (target / "stopwords.json").exists()
+
+    nlp._STOPWORD_CACHE.clear()
+    loads.clear()
+    monkeypatch.setenv("SPACY_SNAPSHOT_DIR", str(tmp_path))
+
+    model = nlp._get_spacy_model("en")
+
+    assert model.lang == "en"
+    assert loads == [target / "pipeline"]
+    assert "the" in nlp._STOPWORD_CACHE["en"]
+
+
+def test_get_spacy_model_ignores_outdated_snapshot(monkeypatch, tmp_path) -> None:
+    loads = _patch_blank_model(monkeypatch)
+    monkeypatch.setattr(nlp, "_installed_model_version", lambda name: "0.0.0")
+    nlp.save_snapshot("en", tmp_path)
+
+    loads.clear()
+    monkeypatch.setattr(nlp, "_installed_model_version", lambda name: "9.9.9")
+    monkeypatch.setenv("SPACY_SNAPSHOT_DIR", str(tmp_path))
+
+    nlp._get_spacy_model("en")
+
+    assert loads == ["en_core_web_sm"]
+
+
+def test_stems_from_bytes_matches_stems_of_serialized_docs(monkeypatch) -> None:
+    spacy = pytest.importorskip("spacy")
+    from spacy.tokens import Doc
+
+    model = spacy.blank("en")
+    monkeypatch.setattr(nlp, "_get_spacy_model", lambda _: model)
+    docs = [
+        Doc(
+            model.vocab,
+            words=["Cities", "grow", "the", "fast"],
+            pos=["NOUN", "VERB", "DET", "ADJ"],
+            lemmas=["city", "grow", "the", "fast"],
+        ),
+        Doc(model.vocab, words=["Towns"], pos=["NOUN"], lemmas=["town"]),
+    ]
+
+    data = nlp.docs_to_bytes(docs)
+
+    assert nlp.stems_from_bytes(data, "en") == (["city", "town"], ["grow"], ["fast"])
+
+
+def test_model_version_uses_installed_package_without_loading(monkeypatch) -> None:
+    monkeypatch.setattr(nlp, "_VERSION_CACHE", {})
+    monkeypatch.setattr(nlp, "_installed_model_version", lambda name: "3.8.0")
+
+    def fail(_language):
+        raise AssertionError("model loaded")
+
+    monkeypatch.setattr(nlp, "_get_spacy_model", fail)
+
+    assert nlp.model_version("en") == "en_core_web_sm-3.8.0"
+    assert nlp.pipeline_version("en") == (
+        f"en_core_web_sm-3.8.0/rules-{nlp.STEM_RULES_VERSION}"
+    )
+
+
+def test_sanitized_paragraphs_are_split_before_sentences() -> None:
+    text = nlp.sanitize_text("<p>First one. Still first.</p><p>Second<br>line.</p>")
+
+    assert text == "First one. Still first.\n\nSecond\nline."
+    assert nlp.split_content(text or "", 24) == [
+        "First one. Still first.",
+        "Second\nline.",
+    ]
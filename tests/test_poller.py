@@ -1,12 +1,29 @@
 from datetime import datetime
-from typing import cast
+from typing import Sequence, cast
 from uuid import UUID, uuid4
 
-from news_deframer.config import Config, DEFAULT_LOCK_DURATION, POLLING_INTERVAL
-from news_deframer.postgres import Feed, Item, Postgres
-from news_deframer.miner import Miner, MiningTask
+import pytest
+
+from news_deframer.config import (
+    BACKLOG_RESCHEDULE_DELAY,
+    Config,
+    DEFAULT_LOCK_DURATION,
+    LOCK_IDLE_TIMEOUT,
+    POLLING_INTERVAL,
+)
+from news_deframer.heartbeat import LockHeartbeat
+from news_deframer.postgres import (
+    ContentStems,
+    Feed,
+    Item,
+    Postgres,
+    Trend,
+    UpsertStats,
+)
+from news_deframer.miner import Miner, MiningTask, extract_title_and_description
 from news_deframer.poller import (
-    _extract_title_and_description,
+    FeedPollResult,
+    ShutdownFlag,
     poll_feed,
     poll_next_feed,
 )
@@ -25,6 +42,10 @@ class DummyRepo:
         self.end_calls: list[tuple[str, int]] = []
         self.lock_duration: int | None = None
         self.fetched_for: list[str] = []
+        self.pending_reported: list[int | None] = []
+        self.extended: list[str] = []
+        self.lock_held = True
+        self.quarantined: list[UUID] = []
 
     def begin_mine_update(self, lock_duration: int) -> Feed | None:
         self.lock_duration = lock_duration
@@ -32,23 +53,52 @@ class DummyRepo:
             raise RuntimeError("boom")
         return self.feed
 
-    def end_mine_update(self, feed_id: UUID, polling_interval: int) -> None:
+    def end_mine_update(
+        self,
+        feed_id: UUID,
+        polling_interval: int,
+        pending_items: int | None = None,
+        mined_items: int | None = None,
+        lock_token: UUID | None = None,
+    ) -> None:
         self.end_calls.append((str(feed_id), polling_interval))
+        self.pending_reported.append(pending_items)
 
     def fetch_pending_items(
-        self, feed_id: UUID, feed_url: str | None = None
+        self, feed_id: UUID, feed_url: str | None = None, limit: int | None = None
     ) -> list[Item]:
         self.fetched_for.append(str(feed_id))
-        return list(self.pending_items)
+        return list(self.pending_items)[:limit]
+
+    def quarantine_item(self, item_id: UUID, feed_id: UUID, error: str) -> None:
+        self.quarantined.append(item_id)
+
+    def extend_mine_lock(
+        self, feed_id: UUID, lock_duration: int, lock_token: UUID | None = None
+    ) -> bool:
+        self.extended.append(str(feed_id))
+        return self.lock_held
+
+    def upsert_trends(self, trends: list[Trend]) -> UpsertStats:
+        return UpsertStats(inserted=len(trends))
+
+    def fetch_content_stems(self, hashes: Sequence[str]) -> dict[str, ContentStems]:
+        return {}
+
+    def store_content_stems(self, entries: Sequence[ContentStems]) -> None:
+        pass
 
 
 class DummyMiner(Miner):
     def __init__(self) -> None:
         super().__init__(make_config(), repository=cast(Postgres, DummyRepo()))
         self.tasks: list[MiningTask] = []
+        self.chunks: list[int] = []
 
-    def mine_item(self, task: MiningTask) -> None:
-        self.tasks.append(task)
+    def mine_items(self, tasks, executor=None):
+        self.chunks.append(len(tasks))
+        self.tasks.extend(tasks)
+        return []
 
 
 def make_config() -> Config:
@@ -68,7 +118,9 @@ def test_poll_next_feed_success_calls_end_update(monkeypatch) -> None:
     repo = DummyRepo(feed=Feed(id=feed_id, url="https://feed"))
     miner = DummyMiner()
 
-    def fake_poll_feed(feed: Feed, miner_obj: DummyMiner, repo_obj: DummyRepo) -> None:
+    def fake_poll_feed(
+        feed: Feed, miner_obj: DummyMiner, repo_obj: DummyRepo, **kwargs
+    ) -> FeedPollResult:
         miner_obj.tasks.append(
             MiningTask(
                 feed_id=feed.id,
@@ -82,11 +134,13 @@ def test_poll_next_feed_success_calls_end_update(monkeypatch) -> None:
                 root_domain="example.com",
             )
         )
+        return FeedPollResult(pending=1, mined=1)
 
     monkeypatch.setattr("news_deframer.poller.poll_feed", fake_poll_feed)
 
     assert poll_next_feed(make_config(), miner, repo) is True
     assert repo.end_calls == [(str(feed_id), POLLING_INTERVAL)]
+    assert repo.pending_reported == [1]
 
 
 def test_poll_next_feed_passes_errors(monkeypatch) -> None:
@@ -94,7 +148,7 @@ def test_poll_next_feed_passes_errors(monkeypatch) -> None:
     repo = DummyRepo(feed=Feed(id=feed_id, url="https://feed"))
     miner = DummyMiner()
 
-    def boom(feed: Feed, miner_obj: DummyMiner, repo_obj: DummyRepo) -> None:  # noqa: ARG001
+    def boom(feed: Feed, miner_obj: DummyMiner, repo_obj: DummyRepo, **kwargs) -> None:  # noqa: ARG001
         raise ValueError("fail")
 
     monkeypatch.setattr("news_deframer.poller.poll_feed", boom)
@@ -104,6 +158,7 @@ def test_poll_next_feed_passes_errors(monkeypatch) -> None:
     feed_id_value, retry = repo.end_calls[0]
     assert feed_id_value == str(feed_id)
     assert retry == POLLING_INTERVAL
+    assert repo.pending_reported == [None]
 
 
 def test_poll_next_feed_handles_begin_failure(caplog) -> None:
@@ -172,18 +227,103 @@ def test_poll_feed_returns_error(monkeypatch, caplog) -> None:
         def __init__(self) -> None:
             super().__init__(make_config(), repository=cast(Postgres, DummyRepo()))
 
-        def mine_item(self, task: MiningTask) -> None:
+        def mine_items(self, tasks, executor=None):
             raise RuntimeError("boom")
 
     miner = ExplodingMiner()
 
     with caplog.at_level("ERROR"):
-        error = poll_feed(feed, miner, repo)
+        result = poll_feed(feed, miner, repo)
 
-    assert isinstance(error, RuntimeError)
+    assert isinstance(result.error, RuntimeError)
+    assert result.pending == 1
+    assert result.mined == 0
+    assert result.failed == 1
+    assert repo.quarantined == [item.id]
     assert any("Failed to process item" in record.message for record in caplog.records)
 
 
+def make_items(feed_id: UUID, count: int) -> list[Item]:
+    return [
+        Item(
+            id=uuid4(),
+            feed_id=feed_id,
+            content="<item/>",
+            pub_date=datetime(2024, 1, 1, 0, 0, 0),
+        )
+        for _ in range(count)
+    ]
+
+
+def test_poll_feed_commits_in_chunks(monkeypatch) -> None:
+    monkeypatch.setattr("news_deframer.poller.MINING_CHUNK_SIZE", 2)
+    feed = Feed(id=uuid4(), url="https://feed")
+    repo = DummyRepo(pending_items=make_items(feed.id, 5))
+    miner = DummyMiner()
+    heartbeat = LockHeartbeat(repo, feed.id, lock_duration=30)
+    touched: list[int] = []
+    monkeypatch.setattr(heartbeat, "touch", lambda: touched.append(1))
+
+    result = poll_feed(feed, miner, repo, heartbeat=heartbeat)
+
+    assert miner.chunks == [2, 2, 1]
+    assert len(touched) == 3
+    assert result.pending == 5
+    assert result.mined == 5
+
+
+def test_poll_feed_stops_after_losing_lock(monkeypatch) -> None:
+    monkeypatch.setattr("news_deframer.poller.MINING_CHUNK_SIZE", 2)
+    feed = Feed(id=uuid4(), url="https://feed")
+    repo = DummyRepo(pending_items=make_items(feed.id, 5))
+    repo.lock_held = False
+    miner = DummyMiner()
+    heartbeat = LockHeartbeat(repo, feed.id, lock_duration=30)
+
+    def mine_and_beat(tasks, executor=None):
+        miner.chunks.append(len(tasks))
+        heartbeat.beat()
+        return []
+
+    monkeypatch.setattr(miner, "mine_items", mine_and_beat)
+
+    result = poll_feed(feed, miner, repo, heartbeat=heartbeat)
+
+    assert heartbeat.lost is True
+    assert miner.chunks == [2]
+    assert result.mined == 2
+
+
+def test_heartbeat_skips_renewal_without_progress(monkeypatch) -> None:
+    repo = DummyRepo()
+    heartbeat = LockHeartbeat(repo, uuid4(), lock_duration=30)
+    now = [1000.0]
+    monkeypatch.setattr("news_deframer.heartbeat.time.monotonic", lambda: now[0])
+
+    heartbeat.touch()
+    now[0] += 10
+    heartbeat.beat()
+    now[0] += LOCK_IDLE_TIMEOUT
+    heartbeat.beat()
+
+    assert len(repo.extended) == 1
+    assert heartbeat.lost is False
+
+
+def test_heartbeat_renews_during_slow_chunk(monkeypatch) -> None:
+    repo = DummyRepo()
+    heartbeat = LockHeartbeat(repo, uuid4(), lock_duration=30, max_idle=300)
+    now = [1000.0]
+    monkeypatch.setattr("news_deframer.heartbeat.time.monotonic", lambda: now[0])
+
+    heartbeat.touch()
+    for _ in range(10):
+        now[0] += 25
+        heartbeat.beat()
+
+    assert len(repo.extended) == 10
+
+
 def test_extract_title_and_description_success() -> None:
     content = """
     <item>
@@ -196,7 +336,7 @@ def test_extract_title_and_description_success() -> None:
       <title>Ignored Standard Title</title>
     </item>
     """
-    title, description = _extract_title_and_description(content)
+    title, description = extract_title_and_description(content)
     assert title == "Boost Your Productivity"
     assert description == "Simple Tips"
 
@@ -208,14 +348,14 @@ def test_extract_title_and_description_ignores_standard_tags() -> None:
       <description>Standard Description</description>
     </item>
     """
-    title, description = _extract_title_and_description(content)
+    title, description = extract_title_and_description(content)
     assert title is None
     assert description is None
 
 
 def test_extract_title_and_description_handles_malformed_xml() -> None:
     content = "<item><title>Unclosed"
-    title, description = _extract_title_and_description(content)
+    title, description = extract_title_and_description(content)
     assert title is None
     assert description is None
 
@@ -227,6 +367,166 @@ def test_extract_title_and_description_with_unknown_namespaces() -> None:
   <wfw:commentRss>http://example.com/feed</wfw:commentRss>
   <slash:comments>10</slash:comments>
 </item>"""
-    title, description = _extract_title_and_description(content)
+    title, description = extract_title_and_description(content)
     assert title == "Extracted Title"
     assert description == "Extracted Description"
+
+
+def test_poll_feed_stops_at_item_budget(monkeypatch) -> None:
+    monkeypatch.setattr("news_deframer.poller.MINING_CHUNK_SIZE", 2)
+    feed = Feed(id=uuid4(), url="https://feed")
+    repo = DummyRepo(pending_items=make_items(feed.id, 5))
+    miner = DummyMiner()
+
+    result = poll_feed(feed, miner, repo, max_items=3)
+
+    assert miner.chunks == [2, 1]
+    assert result.mined == 3
+    assert result.budget_exhausted is True
+
+
+def test_poll_feed_stops_at_time_budget(monkeypatch) -> None:
+    monkeypatch.setattr("news_deframer.poller.MINING_CHUNK_SIZE", 2)
+    feed = Feed(id=uuid4(), url="https://feed")
+    repo = DummyRepo(pending_items=make_items(feed.id, 5))
+    miner = DummyMiner()
+    now = [0.0]
+    monkeypatch.setattr("news_deframer.poller.time.monotonic", lambda: now[0])
+
+    def slow_mine(tasks, executor=None):
+        miner.chunks.append(len(tasks))
+        now[0] += 60
+        return []
+
+    monkeypatch.setattr(miner, "mine_items", slow_mine)
+
+    result = poll_feed(feed, miner, repo, max_seconds=100)
+
+    assert miner.chunks == [2, 2]
+    assert result.budget_exhausted is True
+
+
+def test_poll_next_feed_requeues_feed_with_exhausted_budget(monkeypatch) -> None:
+    feed_id = uuid4()
+    repo = DummyRepo(feed=Feed(id=feed_id, url="https://feed"))
+    miner = DummyMiner()
+
+    def partial_poll_feed(
+        feed: Feed, miner_obj: DummyMiner, repo_obj: DummyRepo, **kwargs
+    ) -> FeedPollResult:
+        return FeedPollResult(pending=501, mined=500, budget_exhausted=True)
+
+    monkeypatch.setattr("news_deframer.poller.poll_feed", partial_poll_feed)
+
+    assert poll_next_feed(make_config(), miner, repo) is True
+    assert repo.end_calls == [(str(feed_id), BACKLOG_RESCHEDULE_DELAY)]
+    assert repo.pending_reported == [None]
+
+
+def test_poll_feed_quarantines_poison_item_and_continues(monkeypatch) -> None:
+    monkeypatch.setattr("news_deframer.poller.MINING_CHUNK_SIZE", 3)
+    feed = Feed(id=uuid4(), url="https://feed")
+    items = make_items(feed.id, 5)
+    poison = items[1].id
+    repo = DummyRepo(pending_items=items)
+    miner = DummyMiner()
+
+    def mine_items(tasks, executor=None):
+        if any(task.item_id == poison for task in tasks):
+            raise RuntimeError("poison")
+        miner.tasks.extend(tasks)
+        return []
+
+    monkeypatch.setattr(miner, "mine_items", mine_items)
+
+    result = poll_feed(feed, miner, repo)
+
+    assert repo.quarantined == [poison]
+    assert [task.item_id for task in miner.tasks] == [
+        item.id for item in items if item.id != poison
+    ]
+    assert result.mined == 4
+    assert result.failed == 1
+
+
+def test_poll_feed_finishes_chunk_on_shutdown(monkeypatch) -> None:
+    monkeypatch.setattr("news_deframer.poller.MINING_CHUNK_SIZE", 2)
+    feed = Feed(id=uuid4(), url="https://feed")
+    repo = DummyRepo(pending_items=make_items(feed.id, 5))
+    miner = DummyMiner()
+    shutdown = ShutdownFlag()
+
+    def mine_then_shutdown(tasks, executor=None):
+        miner.chunks.append(len(tasks))
+        shutdown.set()
+        return []
+
+    monkeypatch.setattr(miner, "mine_items", mine_then_shutdown)
+
+    result = poll_feed(feed, miner, repo, shutdown=shutdown)
+
+    assert miner.chunks == [2]
+    assert result.mined == 2
+    assert result.interrupted is True
+
+
+def test_poll_next_feed_releases_lock_on_shutdown(monkeypatch) -> None:
+    feed_id = uuid4()
+    repo = DummyRepo(feed=Feed(id=feed_id, url="https://feed"))
+    miner = DummyMiner()
+
+    def interrupted_poll_feed(
+        feed: Feed, miner_obj: DummyMiner, repo_obj: DummyRepo, **kwargs
+    ) -> FeedPollResult:
+        return FeedPollResult(pending=10, mined=2, interrupted=True)
+
+    monkeypatch.setattr("news_deframer.poller.poll_feed", interrupted_poll_feed)
+
+    assert poll_next_feed(make_config(), miner, repo, shutdown=ShutdownFlag())
+    assert repo.end_calls == [(str(feed_id), BACKLOG_RESCHEDULE_DELAY)]
+
+
+def test_poll_next_feed_releases_lock_on_hard_interrupt(monkeypatch) -> None:
+    feed_id = uuid4()
+    repo = DummyRepo(feed=Feed(id=feed_id, url="https://feed"))
+    miner = DummyMiner()
+
+    def interrupt(
+        feed: Feed, miner_obj: DummyMiner, repo_obj: DummyRepo, **kwargs
+    ) -> FeedPollResult:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr("news_deframer.poller.poll_feed", interrupt)
+
+    with pytest.raises(KeyboardInterrupt):
+        poll_next_feed(make_config(), miner, repo)
+    assert repo.end_calls == [(str(feed_id), BACKLOG_RESCHEDULE_DELAY)]
+
+
+def test_shutdown_flag_wait_returns_early(monkeypatch) -> None:
+    shutdown = ShutdownFlag()
+    monkeypatch.setattr("news_deframer.poller.time.sleep", lambda _: shutdown.set())
+
+    assert shutdown.wait(60) is True
+
+
+def test_poll_feed_does_not_quarantine_when_every_item_fails(monkeypatch) -> None:
+    monkeypatch.setattr("news_deframer.poller.MINING_CHUNK_SIZE", 2)
+    feed = Feed(id=uuid4(), url="https://feed")
+    repo = DummyRepo(pending_items=make_items(feed.id, 5))
+    miner = DummyMiner()
+
+    def failing_upsert(tasks, executor=None):
+        miner.chunks.append(len(tasks))
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(miner, "mine_items", failing_upsert)
+
+    result = poll_feed(feed, miner, repo)
+
+    assert repo.quarantined == []
+    # The first chunk and its two retries; later chunks are left alone.
+    assert miner.chunks == [2, 1, 1]
+    assert isinstance(result.error, RuntimeError)
+    assert result.mined == 0
+    assert result.failed == 0
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Tuple
 from uuid import uuid4
 
 from news_deframer.config import Config
 import news_deframer.postgres as postgres_module
+from news_deframer.scheduling import slotted_delay
 
 
 def make_config() -> Config:
@@ -22,6 +23,8 @@ class CursorStub:
     fetchone_queue: List[Tuple] = field(default_factory=list)
     fetchall_result: List[Tuple] = field(default_factory=list)
     execute_calls: list[tuple[str, tuple | None]] = field(default_factory=list)
+    itersize: int = 0
+    rowcount: int = 0
 
     # Context manager methods
     def __enter__(self):
@@ -41,10 +44,19 @@ class CursorStub:
     def fetchall(self):
         return list(self.fetchall_result)
 
+    def fetchmany(self, size):
+        rows, self.fetchall_result = (
+            self.fetchall_result[:size],
+            self.fetchall_result[size:],
+        )
+        return rows
+
 
 @dataclass
 class ConnectionStub:
     cursor_stub: CursorStub
+    cursor_names: list[str | None] = field(default_factory=list)
+    closed: bool = False
 
     def __enter__(self):
         return self
@@ -52,7 +64,8 @@ class ConnectionStub:
     def __exit__(self, exc_type, exc, tb):
         return False
 
-    def cursor(self):
+    def cursor(self, name=None):
+        self.cursor_names.append(name)
         return self.cursor_stub
 
 
@@ -129,6 +142,20 @@ def test_fetch_pending_items(monkeypatch):
     assert items[0].content == "raw content"
 
 
+def test_fetch_pending_items_applies_limit(monkeypatch):
+    cursor = CursorStub()
+    patch_connect(monkeypatch, cursor)
+    repo = postgres_module.Postgres(make_config())
+    feed_id = uuid4()
+
+    repo.fetch_pending_items(feed_id=feed_id, limit=11)
+
+    sql, params = cursor.execute_calls[-1]
+    assert "ORDER BY i.pub_date" in sql
+    assert "LIMIT %s" in sql
+    assert params == (feed_id, 11)
+
+
 def test_upsert_trends(monkeypatch):
     cursor = CursorStub()
     patch_connect(monkeypatch, cursor)
@@ -164,3 +191,561 @@ def test_upsert_trends(monkeypatch):
     assert tup[1] == trend.feed_id
     assert tup[2] == "en"
     assert tup[4] == ["cat1"]
+
+
+def test_iter_trends_streams_batches_from_named_cursor(monkeypatch):
+    rows = [
+        (
+            uuid4(),
+            uuid4(),
+            "en",
+            datetime(2024, 1, 1, hour),
+            ["cat"],
+            ["noun"],
+            None,
+            [],
+            "example.com",
+        )
+        for hour in range(3)
+    ]
+    cursor = CursorStub(fetchall_result=list(rows))
+    conn = patch_connect(monkeypatch, cursor)
+    repo = postgres_module.Postgres(make_config())
+
+    batches = list(repo.iter_trends(batch_size=2, languages=["EN"]))
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert batches[0][0].item_id == rows[0][0]
+    assert batches[0][0].verb_stems == []
+    assert conn.cursor_names[0] is not None
+    assert cursor.itersize == 2
+    sql, params = cursor.execute_calls[0]
+    assert "ORDER BY pub_date ASC, item_id ASC" in sql
+    assert params == [["en"]]
+
+
+def test_rollup_counts_buckets_stems():
+    trend = postgres_module.Trend(
+        item_id=uuid4(),
+        feed_id=uuid4(),
+        language="en",
+        pub_date=datetime(2024, 1, 1, 12, 34, 56, tzinfo=timezone.utc),
+        root_domain="example.com",
+        noun_stems=["city", "city"],
+        verb_stems=["run"],
+    )
+
+    counts = postgres_module.rollup_counts([trend, trend], 3600)
+
+    bucket = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    assert counts == {
+        (bucket, "en", "example.com", "noun", "city"): 2,
+        (bucket, "en", "example.com", "verb", "run"): 2,
+    }
+
+
+def test_upsert_trends_applies_rollup_deltas(monkeypatch):
+    item_id = uuid4()
+    feed_id = uuid4()
+    pub_date = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    cursor = CursorStub(
+        fetchall_result=[
+            (
+                item_id,
+                feed_id,
+                "en",
+                pub_date,
+                [],
+                ["city", "mayor"],
+                [],
+                [],
+                "example.com",
+            )
+        ]
+    )
+    patch_connect(monkeypatch, cursor)
+    config = make_config()
+    config.trend_rollups = True
+    repo = postgres_module.Postgres(config)
+
+    executed_values = []
+    monkeypatch.setattr(
+        postgres_module,
+        "execute_values",
+        lambda cur, sql, args, **kwargs: executed_values.append((sql, args)),
+    )
+
+    trend = postgres_module.Trend(
+        item_id=item_id,
+        feed_id=feed_id,
+        language="en",
+        pub_date=pub_date,
+        root_domain="example.com",
+        noun_stems=["city", "council"],
+    )
+
+    repo.upsert_trends([trend])
+
+    assert "pg_advisory_xact_lock" in cursor.execute_calls[0][0]
+    assert "INSERT INTO trends" in executed_values[0][0]
+    rollup_sql, rollup_args = executed_values[1]
+    assert "INSERT INTO trend_rollups" in rollup_sql
+    assert rollup_args == [
+        (pub_date, "en", "example.com", "noun", "council", 1),
+        (pub_date, "en", "example.com", "noun", "mayor", -1),
+    ]
+    delete_sql, delete_args = executed_values[2]
+    assert "DELETE FROM trend_rollups" in delete_sql
+    assert delete_args == [(pub_date, "en", "example.com", "noun", "mayor")]
+
+
+def test_upsert_trends_reupsert_without_changes_keeps_rollups(monkeypatch):
+    trend = postgres_module.Trend(
+        item_id=uuid4(),
+        feed_id=uuid4(),
+        language="en",
+        pub_date=datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc),
+        root_domain="example.com",
+        noun_stems=["city"],
+    )
+    cursor = CursorStub(
+        fetchall_result=[
+            (
+                trend.item_id,
+                trend.feed_id,
+                "en",
+                trend.pub_date,
+                [],
+                ["city"],
+                [],
+                [],
+                "example.com",
+            )
+        ]
+    )
+    patch_connect(monkeypatch, cursor)
+    config = make_config()
+    config.trend_rollups = True
+    repo = postgres_module.Postgres(config)
+
+    executed_values = []
+    monkeypatch.setattr(
+        postgres_module,
+        "execute_values",
+        lambda cur, sql, args, **kwargs: executed_values.append((sql, args)),
+    )
+
+    repo.upsert_trends([trend, trend])
+
+    assert len(executed_values) == 1
+    assert len(executed_values[0][1]) == 1
+
+
+def test_stem_dictionary_interns_missing_stems_once():
+    cursor = CursorStub(fetchall_result=[(1, "en", "city"), (2, "en", "mayor")])
+    stems = postgres_module.StemDictionary()
+
+    ids = stems.intern(cursor, [("en", "city"), ("en", "mayor")])
+
+    assert ids == {("en", "city"): 1, ("en", "mayor"): 2}
+    assert "INSERT INTO stems" in cursor.execute_calls[0][0]
+    assert cursor.execute_calls[0][1] == (["en", "en"], ["city", "mayor"])
+
+    cursor.execute_calls.clear()
+    assert stems.intern(cursor, [("en", "city")]) == {("en", "city"): 1}
+    assert stems.resolve(cursor, [2]) == {2: "mayor"}
+    assert cursor.execute_calls == []
+
+
+def test_upsert_trends_writes_stem_ids_in_dictionary_mode(monkeypatch):
+    cursor = CursorStub(fetchall_result=[(7, "en", "city"), (8, "en", "run")])
+    patch_connect(monkeypatch, cursor)
+    config = make_config()
+    config.stem_storage = "dictionary"
+    repo = postgres_module.Postgres(config)
+
+    executed_values = []
+    monkeypatch.setattr(
+        postgres_module,
+        "execute_values",
+        lambda cur, sql, args, **kwargs: executed_values.append((sql, args)),
+    )
+
+    trend = postgres_module.Trend(
+        item_id=uuid4(),
+        feed_id=uuid4(),
+        language="en",
+        pub_date=datetime(2024, 1, 1, 12, 0, 0),
+        root_domain="example.com",
+        noun_stems=["city"],
+        verb_stems=["run"],
+    )
+
+    repo.upsert_trends([trend])
+
+    sql, args_list = executed_values[0]
+    assert "noun_stem_ids = EXCLUDED.noun_stem_ids" in sql
+    tup = args_list[0]
+    assert tup[4:8] == ([], [], [], [])
+    assert tup[9:] == ([], [7], [8], [])
+
+
+def test_begin_mine_update_priority_mode_orders_by_backlog(monkeypatch):
+    feed_id = uuid4()
+    cursor = CursorStub(
+        fetchone_queue=[(feed_id, [], "en", "https://feed.example", None)]
+    )
+    patch_connect(monkeypatch, cursor)
+    config = make_config()
+    config.scheduling_mode = "priority"
+    config.priority_starvation_seconds = 900
+    repo = postgres_module.Postgres(config)
+
+    feed = repo.begin_mine_update(lock_duration=30)
+
+    assert feed is not None and feed.id == feed_id
+    sql, params = cursor.execute_calls[0]
+    assert "LEFT JOIN feed_mining_stats" in sql
+    assert "st.pending_items" in sql
+    assert "FOR UPDATE OF fs SKIP LOCKED" in sql
+    assert params[0] == 900
+
+
+def test_fetch_backfill_items_matches_normalized_languages(monkeypatch):
+    cursor = CursorStub()
+    patch_connect(monkeypatch, cursor)
+    repo = postgres_module.Postgres(make_config())
+    since = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    repo.fetch_backfill_items(since, since, 10, languages=["EN-us", "de"])
+
+    sql, params = cursor.execute_calls[-1]
+    assert "regexp_replace(lower(btrim(i.language))" in sql
+    assert params[2] == ["en", "de"]
+
+
+def test_fetch_backfill_items_skips_expired_partitions(monkeypatch):
+    cursor = CursorStub()
+    patch_connect(monkeypatch, cursor)
+    config = make_config()
+    config.trends_partitioned = True
+    config.trend_retention_days = 30
+    repo = postgres_module.Postgres(config)
+    since = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    feed_id = uuid4()
+
+    repo.fetch_backfill_items(since, since, 10, feed_ids=[feed_id])
+
+    sql, params = cursor.execute_calls[-1]
+    assert "i.pub_date >= NOW() - (%s * INTERVAL '1 day')" in sql
+    assert params == [since, since, 30, [feed_id], 10]
+
+
+def test_end_mine_update_decrements_backlog(monkeypatch):
+    feed_id = uuid4()
+    cursor = CursorStub(fetchone_queue=[(True, True, "https://feed.example")])
+    patch_connect(monkeypatch, cursor)
+    config = make_config()
+    config.scheduling_mode = "priority"
+    repo = postgres_module.Postgres(config)
+
+    repo.end_mine_update(feed_id, 600, pending_items=10, mined_items=7)
+
+    backlog_sql, backlog_params = cursor.execute_calls[1]
+    assert "UPDATE feed_mining_stats" in backlog_sql
+    assert "SELECT MIN(i.pub_date)" in backlog_sql
+    # The claim saw the whole backlog, so the remaining count is exact.
+    assert backlog_params == (3, 3, feed_id)
+    assert "next_mining_at = NOW()" in cursor.execute_calls[2][0]
+    assert cursor.execute_calls[2][1] == (600, feed_id)
+
+
+def test_end_mine_update_skips_backlog_outside_priority_mode(monkeypatch):
+    cursor = CursorStub(fetchone_queue=[(True, True, "https://feed.example")])
+    patch_connect(monkeypatch, cursor)
+    repo = postgres_module.Postgres(make_config())
+
+    repo.end_mine_update(uuid4(), 600, pending_items=10, mined_items=7)
+
+    assert not any("feed_mining_stats" in sql for sql, _ in cursor.execute_calls)
+
+
+def test_end_mine_update_moves_next_run_onto_feed_slot(monkeypatch):
+    feed_id = uuid4()
+    now = 1_700_000_000.0
+    cursor = CursorStub(fetchone_queue=[(True, True, "https://feed.example"), (now,)])
+    patch_connect(monkeypatch, cursor)
+    config = make_config()
+    config.schedule_slotting = True
+    repo = postgres_module.Postgres(config)
+
+    repo.end_mine_update(feed_id, 600)
+
+    assert "EXTRACT(EPOCH FROM NOW())" in cursor.execute_calls[1][0]
+    delay, _ = cursor.execute_calls[2][1]
+    assert delay == slotted_delay(feed_id, 600, now, config.schedule_slots)
+
+
+def test_extend_mine_lock_reports_expired_lock(monkeypatch):
+    cursor = CursorStub(rowcount=1)
+    patch_connect(monkeypatch, cursor)
+    repo = postgres_module.Postgres(make_config())
+
+    assert repo.extend_mine_lock(uuid4(), 30) is True
+    sql, params = cursor.execute_calls[-1]
+    assert "mining_locked_until >= NOW()" in sql
+    assert params is not None and params[0] == 30
+
+    cursor.rowcount = 0
+    assert repo.extend_mine_lock(uuid4(), 30) is False
+
+
+def test_lock_owned_by_another_claim_is_not_touched(monkeypatch):
+    cursor = CursorStub()
+    patch_connect(monkeypatch, cursor)
+    repo = postgres_module.Postgres(make_config())
+    feed_id, token = uuid4(), uuid4()
+
+    assert repo.extend_mine_lock(feed_id, 30, lock_token=token) is False
+    sql, params = cursor.execute_calls[-1]
+    assert "AND mining_locked_by = %s" in sql
+    assert params == (30, feed_id, token)
+
+    repo.end_mine_update(feed_id, 600, lock_token=token)
+
+    sql, params = cursor.execute_calls[-1]
+    assert "mining_locked_by = %s" in sql and "FOR UPDATE" in sql
+    assert params == (feed_id, token)
+
+
+def test_fetch_pending_items_skips_quarantined_items(monkeypatch):
+    cursor = CursorStub()
+    patch_connect(monkeypatch, cursor)
+    config = make_config()
+    config.item_quarantine = True
+    repo = postgres_module.Postgres(config)
+
+    repo.fetch_pending_items(feed_id=uuid4())
+
+    sql, _ = cursor.execute_calls[-1]
+    assert "LEFT JOIN item_quarantine q" in sql
+    assert "q.next_retry_at <= NOW()" in sql
+
+
+def test_fetch_pending_items_skips_expired_partitions(monkeypatch):
+    cursor = CursorStub(fetchall_result=[("trends_p202401",), ("trends_p202403",)])
+    patch_connect(monkeypatch, cursor)
+    config = make_config()
+    config.trends_partitioned = True
+    config.trend_retention_days = 30
+    repo = postgres_module.Postgres(config)
+    feed_id = uuid4()
+
+    repo.expire_trend_partitions(30, "detach")
+    cursor.fetchall_result = []
+    repo.fetch_pending_items(feed_id=feed_id, limit=5)
+
+    # Items of the detached month have no trends anymore but are not pending.
+    sql, params = cursor.execute_calls[-1]
+    assert "i.pub_date >= NOW() - (%s * INTERVAL '1 day')" in sql
+    assert params == (feed_id, 30, 5)
+
+
+def test_quarantine_item_backs_off_exponentially(monkeypatch):
+    cursor = CursorStub(fetchone_queue=[(2, datetime(2024, 1, 1, tzinfo=timezone.utc))])
+    patch_connect(monkeypatch, cursor)
+    config = make_config()
+    config.item_quarantine = True
+    config.quarantine_retry_seconds = 600
+    config.quarantine_max_retry_seconds = 3600
+    repo = postgres_module.Postgres(config)
+    item_id = uuid4()
+    feed_id = uuid4()
+
+    repo.quarantine_item(item_id, feed_id, "RuntimeError('boom')")
+
+    sql, params = cursor.execute_calls[-1]
+    assert "INSERT INTO item_quarantine" in sql
+    assert "POWER(2, item_quarantine.attempts)" in sql
+    assert params == (item_id, feed_id, "RuntimeError('boom')", 600, 600, 3600)
+
+
+def test_quarantine_item_is_noop_when_disabled(monkeypatch):
+    cursor = CursorStub()
+    patch_connect(monkeypatch, cursor)
+    repo = postgres_module.Postgres(make_config())
+
+    repo.quarantine_item(uuid4(), uuid4(), "boom")
+
+    assert cursor.execute_calls == []
+
+
+def test_begin_mine_update_restricts_to_worker_languages(monkeypatch):
+    cursor = CursorStub()
+    patch_connect(monkeypatch, cursor)
+    config = make_config()
+    config.worker_languages = ["en", "de"]
+    config.language_spillover = False
+    repo = postgres_module.Postgres(config)
+
+    assert repo.begin_mine_update(lock_duration=30) is None
+
+    assert len(cursor.execute_calls) == 1
+    sql, params = cursor.execute_calls[0]
+    assert "= ANY(%s)" in sql
+    assert params == [["de", "en"]]
+
+
+def test_begin_mine_update_spills_over_to_other_languages(monkeypatch):
+    feed_id = uuid4()
+    cursor = CursorStub(
+        fetchone_queue=[None, (feed_id, [], "fr", "https://fr.example", None)]
+    )
+    patch_connect(monkeypatch, cursor)
+    config = make_config()
+    config.worker_languages = ["en"]
+    repo = postgres_module.Postgres(config)
+
+    feed = repo.begin_mine_update(lock_duration=30)
+
+    assert feed is not None and feed.id == feed_id
+    assert feed.language == "fr"
+    first_sql, _ = cursor.execute_calls[0]
+    second_sql, _ = cursor.execute_calls[1]
+    assert "= ANY(%s)" in first_sql
+    assert "= ANY(%s)" not in second_sql
+
+
+def test_upsert_trends_skips_unchanged_rows(monkeypatch):
+    cursor = CursorStub()
+    patch_connect(monkeypatch, cursor)
+    repo = postgres_module.Postgres(make_config())
+    executed = []
+
+    def fake_execute_values(cur, sql, args, fetch=False, **kwargs):
+        executed.append((sql, fetch))
+        return [(True,), (False,)]
+
+    monkeypatch.setattr(postgres_module, "execute_values", fake_execute_values)
+    trends = [
+        postgres_module.Trend(
+            item_id=uuid4(),
+            feed_id=uuid4(),
+            language="en",
+            pub_date=datetime(2024, 1, 1, 12, 0, 0),
+            root_domain="example.com",
+        )
+        for _ in range(3)
+    ]
+
+    stats = repo.upsert_trends(trends)
+
+    sql, fetch = executed[0]
+    assert "IS DISTINCT FROM (EXCLUDED.feed_id" in sql
+    assert "RETURNING (xmax = 0)" in sql
+    assert fetch is True
+    assert stats == postgres_module.UpsertStats(inserted=1, updated=1, unchanged=1)
+
+
+def test_upsert_trends_partitioned_removes_moved_rows(monkeypatch):
+    cursor = CursorStub()
+    patch_connect(monkeypatch, cursor)
+    config = make_config()
+    config.trends_partitioned = True
+    repo = postgres_module.Postgres(config)
+    executed = []
+
+    def fake_execute_values(cur, sql, args, fetch=False, **kwargs):
+        executed.append((sql, list(args)))
+        if "DELETE FROM trends" in sql:
+            return [(trend.item_id,)]
+        return [(True,)]
+
+    monkeypatch.setattr(postgres_module, "execute_values", fake_execute_values)
+    trend = postgres_module.Trend(
+        item_id=uuid4(),
+        feed_id=uuid4(),
+        language="en",
+        pub_date=datetime(2024, 3, 1, tzinfo=timezone.utc),
+        root_domain="example.com",
+    )
+
+    stats = repo.upsert_trends([trend])
+
+    delete_sql, delete_args = executed[0]
+    assert "DELETE FROM trends" in delete_sql
+    assert "t.pub_date <> n.pub_date" in delete_sql
+    assert delete_args == [(trend.item_id, trend.pub_date)]
+    assert "ON CONFLICT (item_id, pub_date)" in executed[1][0]
+    # The moved row is re-inserted into its new partition but counts as updated.
+    assert stats == postgres_module.UpsertStats(inserted=0, updated=1, unchanged=0)
+
+
+def test_ensure_trend_partitions_creates_months_ahead(monkeypatch):
+    cursor = CursorStub()
+    patch_connect(monkeypatch, cursor)
+    repo = postgres_module.Postgres(make_config())
+
+    names = repo.ensure_trend_partitions(
+        2,
+        since=datetime(2024, 10, 15, tzinfo=timezone.utc),
+        now=datetime(2024, 12, 5, tzinfo=timezone.utc),
+    )
+
+    assert names == [
+        "trends_p202410",
+        "trends_p202411",
+        "trends_p202412",
+        "trends_p202501",
+        "trends_p202502",
+    ]
+    sql, params = cursor.execute_calls[-1]
+    assert '"trends_p202502" PARTITION OF trends' in sql
+    assert params == (
+        datetime(2025, 2, 1, tzinfo=timezone.utc),
+        datetime(2025, 3, 1, tzinfo=timezone.utc),
+    )
+
+
+def test_ensure_trend_partitions_moves_rows_out_of_default(monkeypatch):
+    cursor = CursorStub(fetchone_queue=[(True,)])
+    patch_connect(monkeypatch, cursor)
+    repo = postgres_module.Postgres(make_config())
+
+    repo.ensure_trend_partitions(0, now=datetime(2024, 12, 5, tzinfo=timezone.utc))
+
+    statements = [" ".join(sql.split()) for sql, _ in cursor.execute_calls[2:]]
+    assert statements[0].startswith("WITH moved AS ( DELETE FROM trends_default")
+    assert '"trends_p202412" PARTITION OF trends' in statements[1]
+    assert statements[2:] == [
+        "INSERT INTO trends SELECT * FROM trends_moved",
+        "TRUNCATE trends_moved",
+    ]
+    assert cursor.execute_calls[2][1] == (
+        datetime(2024, 12, 1, tzinfo=timezone.utc),
+        datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def test_expire_trend_partitions_detaches_old_months(monkeypatch):
+    cursor = CursorStub(
+        fetchall_result=[
+            ("trends_default",),
+            ("trends_p202401",),
+            ("trends_p202402",),
+            ("trends_p202403",),
+        ]
+    )
+    patch_connect(monkeypatch, cursor)
+    repo = postgres_module.Postgres(make_config())
+
+    expired = repo.expire_trend_partitions(
+        30, "detach", now=datetime(2024, 4, 1, tzinfo=timezone.utc)
+    )
+
+    assert expired == ["trends_p202401", "trends_p202402"]
+    statements = [sql for sql, _ in cursor.execute_calls[1:]]
+    assert statements == [
+        'ALTER TABLE trends DETACH PARTITION "trends_p202401"',
+        'ALTER TABLE trends DETACH PARTITION "trends_p202402"',
+    ]
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from news_deframer.config import Config
+from news_deframer import nlp
+from news_deframer.doc_cache import DocCache, document_key
+from news_deframer.postgres import Trend, UpsertStats
+from news_deframer.rederive import RederiveOptions, rederive
+
+
+class TrendRepo:
+    def __init__(self, trends: list[Trend]) -> None:
+        self.trends = trends
+        self.upserts: list[list[Trend]] = []
+        self.content_stems: dict[str, list[str]] = {}
+        self.open_cursors = 0
+
+    def iter_trends(self, batch_size, after=None, until=None, languages=None):
+        rows = [
+            t
+            for t in sorted(self.trends, key=lambda t: (t.pub_date, t.item_id))
+            if after is None or (t.pub_date, t.item_id) > after
+        ]
+        self.open_cursors += 1
+        try:
+            for start in range(0, len(rows), batch_size):
+                yield rows[start : start + batch_size]
+        finally:
+            self.open_cursors -= 1
+
+    def upsert_trends(self, trends):
+        assert self.open_cursors == 0
+        self.upserts.append(list(trends))
+        return UpsertStats(updated=len(trends))
+
+    def store_content_stems(self, entries, replace=False):
+        assert self.open_cursors == 0 and replace
+        for entry in entries:
+            self.content_stems[entry.content_hash] = entry.noun_stems
+
+
+def test_rederive_recomputes_stems_of_cached_items(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("news_deframer.rederive.model_version", lambda _: "v2")
+    monkeypatch.setattr(
+        "news_deframer.rederive.stems_from_bytes",
+        lambda data, language: ([data.decode()], [], []),
+    )
+    config = Config(dsn="", log_level="INFO", log_database=False)
+    config.doc_cache_path = str(tmp_path / "docs.sqlite")
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    trends = [
+        Trend(
+            item_id=uuid4(),
+            feed_id=uuid4(),
+            language="en",
+            pub_date=start + timedelta(minutes=index),
+            root_domain="example.com",
+            category_stems=["cat"],
+            noun_stems=["old"],
+        )
+        for index in range(5)
+    ]
+    cache = DocCache(config.doc_cache_path, max_bytes=0)
+    cache.store([("current", "en", "v2", b"new"), ("stale", "en", "v1", b"stale")])
+    cache.link([(t.item_id, "current") for t in trends[1:4]])
+    cache.link([(trends[4].item_id, "stale")])
+    repo = TrendRepo(trends)
+
+    stats = rederive(
+        config,
+        RederiveOptions(since=trends[1].pub_date, batch_size=2),
+        repository=repo,  # type: ignore[arg-type]
+    )
+
+    assert (stats.rederived, stats.missing, stats.updated) == (3, 1, 3)
+    upserted = [t for batch in repo.upserts for t in batch]
+    assert [t.item_id for t in upserted] == [t.item_id for t in trends[1:4]]
+    assert all(t.noun_stems == ["new"] for t in upserted)
+    assert all(t.category_stems == ["cat"] for t in upserted)
+    assert repo.content_stems == {}
+
+
+def test_rederive_replaces_stems_stored_for_the_content(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("news_deframer.rederive.model_version", lambda _: "v2")
+    monkeypatch.setattr(nlp, "pipeline_version", lambda _: "v2/rules-2")
+    monkeypatch.setattr(
+        "news_deframer.rederive.stems_from_bytes",
+        lambda data, language: ([data.decode()], [], []),
+    )
+    config = Config(dsn="", log_level="INFO", log_database=False)
+    config.doc_cache_path = str(tmp_path / "docs.sqlite")
+    config.content_dedup = True
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    trends = [
+        Trend(
+            item_id=uuid4(),
+            feed_id=uuid4(),
+            language="en",
+            pub_date=start + timedelta(minutes=index),
+            root_domain="example.com",
+            noun_stems=["old"],
+        )
+        for index in range(2)
+    ]
+    key = document_key("Markets rally", "en")
+    cache = DocCache(config.doc_cache_path, max_bytes=0)
+    cache.store([(key, "en", "v2", b"new")])
+    # Both items are syndicated copies of the same text.
+    cache.link([(t.item_id, key) for t in trends])
+    repo = TrendRepo(trends)
+
+    rederive(config, RederiveOptions(), repository=repo)  # type: ignore[arg-type]
+
+    # Mining the text again looks up exactly the replaced entry.
+    assert repo.content_stems == {nlp.content_hash("markets  Rally", "en"): ["new"]}
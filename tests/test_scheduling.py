@@ -0,0 +1,52 @@
+from uuid import uuid4
+
+import pytest
+
+from news_deframer.scheduling import next_polling_interval, schedule_slot, slotted_delay
+
+
+def test_quiet_feed_backs_off_exponentially() -> None:
+    interval, rate = next_polling_interval(600, 0, 600, None, 60, 3600, 20)
+    assert interval == 1200
+    assert rate == 0
+
+    interval, _ = next_polling_interval(interval, 0, interval, rate, 60, 3600, 20)
+    assert interval == 2400
+
+    interval, _ = next_polling_interval(interval, 0, interval, rate, 60, 3600, 20)
+    assert interval == 3600
+
+
+def test_busy_feed_interval_shrinks_to_target_yield() -> None:
+    # 100 items in 600 seconds -> one item every 6 seconds.
+    interval, rate = next_polling_interval(600, 100, 600, None, 60, 3600, 20)
+    assert interval == 120
+    assert abs(rate - 100 / 600) < 1e-9
+
+
+def test_busy_feed_interval_respects_minimum() -> None:
+    interval, _ = next_polling_interval(600, 5000, 600, None, 60, 3600, 20)
+    assert interval == 60
+
+
+def test_arrival_rate_is_smoothed() -> None:
+    _, rate = next_polling_interval(600, 60, 600, 1.0, 60, 3600, 20)
+    assert 0.1 < rate < 1.0
+
+
+def test_slotted_delay_pins_feed_to_its_phase() -> None:
+    feed_id = uuid4()
+    phase = schedule_slot(feed_id, 60) * 10
+
+    for now in (1_700_000_000.0, 1_700_000_123.5, 1_700_000_599.0):
+        delay = slotted_delay(feed_id, 600, now, 60)
+        assert 300 <= delay < 900
+        assert (now + delay) % 600 == pytest.approx(phase)
+
+
+def test_slotted_delay_spreads_feeds_released_together() -> None:
+    now = 1_700_000_000.0
+    due = [(now + slotted_delay(uuid4(), 600, now, 60)) % 600 for _ in range(600)]
+
+    assert len({round(offset) for offset in due}) > 40
+    assert 0 <= slotted_delay(uuid4(), 600, now, 60, min_delay=0) < 600
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from functools import partial
+import hashlib
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+import pytest
+
+from news_deframer import spacy_models
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    requests: list[str] = []
+
+    def log_message(self, format, *args):  # noqa: A002
+        QuietHandler.requests.append(self.path)
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    root = tmp_path / "mirror"
+    root.mkdir()
+    QuietHandler.requests = []
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(QuietHandler, directory=str(root))
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield root, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def publish(root, model_name, content: bytes) -> str:
+    (root / spacy_models.wheel_filename(model_name)).write_bytes(content)
+    return hashlib.sha256(content).hexdigest()
+
+
+def trust(**digests: str) -> dict[str, str]:
+    return {
+        spacy_models.wheel_filename(name): digest for name, digest in digests.items()
+    }
+
+
+def test_fetch_wheels_downloads_and_verifies(mirror, tmp_path):
+    root, url = mirror
+    checksums = trust(
+        en_core_web_sm=publish(root, "en_core_web_sm", b"en"),
+        xx_core_news_sm=publish(root, "xx_core_news_sm", b"xx"),
+    )
+    cache = tmp_path / "cache"
+
+    wheels = spacy_models.fetch_wheels(
+        ["en", "xx", "zz"], cache, mirror=url, checksums=checksums
+    )
+
+    assert wheels["en"] is not None and wheels["en"].read_bytes() == b"en"
+    assert wheels["xx"] is not None and wheels["xx"].name.startswith("xx_core_news_sm")
+    assert wheels["zz"] is None
+
+
+def test_complete_cache_skips_network(mirror, tmp_path):
+    root, url = mirror
+    checksums = trust(de_core_news_sm=publish(root, "de_core_news_sm", b"de"))
+    cache = tmp_path / "cache"
+    spacy_models.fetch_wheels(["de"], cache, mirror=url, checksums=checksums)
+    QuietHandler.requests = []
+
+    wheels = spacy_models.fetch_wheels(["de"], cache, mirror=url, checksums=checksums)
+
+    assert wheels["de"] is not None
+    assert QuietHandler.requests == []
+
+
+def test_pre_seeded_cache_is_used_without_sidecars(mirror, tmp_path):
+    _, url = mirror
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    checksums = trust(pt_core_news_sm=publish(cache, "pt_core_news_sm", b"pt"))
+
+    wheels = spacy_models.fetch_wheels(["pt"], cache, mirror=url, checksums=checksums)
+
+    assert wheels["pt"] == cache / spacy_models.wheel_filename("pt_core_news_sm")
+    assert QuietHandler.requests == []
+
+
+def test_corrupted_cache_is_refetched(mirror, tmp_path):
+    root, url = mirror
+    checksums = trust(fr_core_news_sm=publish(root, "fr_core_news_sm", b"fr"))
+    cache = tmp_path / "cache"
+    path = spacy_models.fetch_wheels(["fr"], cache, mirror=url, checksums=checksums)[
+        "fr"
+    ]
+    assert path is not None
+    path.write_bytes(b"truncated")
+
+    wheels = spacy_models.fetch_wheels(["fr"], cache, mirror=url, checksums=checksums)
+
+    assert wheels["fr"] is not None and wheels["fr"].read_bytes() == b"fr"
+
+
+def test_checksum_mismatch_is_rejected(mirror, tmp_path):
+    root, url = mirror
+    publish(root, "it_core_news_sm", b"it")
+
+    with pytest.raises(RuntimeError, match="Checksum mismatch"):
+        spacy_models.fetch_wheels(
+            ["it"],
+            tmp_path / "cache",
+            mirror=url,
+            checksums=trust(it_core_news_sm="0" * 64),
+        )
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+def test_wheel_without_trusted_checksum_is_refused(mirror, tmp_path):
+    root, url = mirror
+    publish(root, "nl_core_news_sm", b"nl")
+    (root / (spacy_models.wheel_filename("nl_core_news_sm") + ".sha256")).write_text(
+        hashlib.sha256(b"nl").hexdigest()
+    )
+
+    with pytest.raises(RuntimeError, match="No trusted checksum"):
+        spacy_models.fetch_wheels(["nl"], tmp_path / "cache", mirror=url)
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+@pytest.mark.parametrize("as_url", [False, True])
+def test_local_mirror_directory_works_offline(tmp_path, as_url):
+    root = tmp_path / "mirror"
+    root.mkdir()
+    checksums = trust(pl_core_news_sm=publish(root, "pl_core_news_sm", b"pl"))
+    mirror = root.as_uri() if as_url else str(root)
+
+    wheels = spacy_models.fetch_wheels(
+        ["pl", "zz"], tmp_path / "cache", mirror=mirror, checksums=checksums
+    )
+
+    assert wheels["pl"] == root / spacy_models.wheel_filename("pl_core_news_sm")
+    assert wheels["zz"] is None
+
+
+def test_load_checksums_reads_sha256sum_output(tmp_path):
+    path = tmp_path / "spacy-models.sha256"
+    path.write_text(
+        f"{'A' * 64}  en_core_web_sm-3.8.0-py3-none-any.whl\n"
+        f"{'b' * 64} *de_core_news_sm-3.8.0-py3-none-any.whl\n"
+    )
+
+    assert spacy_models.load_checksums(path) == {
+        "en_core_web_sm-3.8.0-py3-none-any.whl": "a" * 64,
+        "de_core_news_sm-3.8.0-py3-none-any.whl": "b" * 64,
+    }
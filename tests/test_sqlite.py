@@ -0,0 +1,304 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from news_deframer.config import (
+    DEFAULT_LOCK_DURATION,
+    POLLING_INTERVAL,
+    SCHEDULING_MODE_PRIORITY,
+    Config,
+)
+from news_deframer.miner import Miner
+from news_deframer.poller import FeedPollResult, poll_next_feed
+from news_deframer.postgres import Item, Trend, UpsertStats
+from news_deframer.sqlite import SQLiteRepository
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_700_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_config() -> Config:
+    return Config(dsn="", log_level="INFO", log_database=False)
+
+
+def make_items(feed_id, count: int) -> list[Item]:
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        Item(
+            id=uuid4(),
+            feed_id=feed_id,
+            content=(
+                f"<deframer:title_original>Title {index}</deframer:title_original>"
+            ),
+            pub_date=start + timedelta(minutes=index),
+            language="en",
+        )
+        for index in range(count)
+    ]
+
+
+def test_claims_due_feed_once_until_released() -> None:
+    clock = FakeClock()
+    repo = SQLiteRepository(make_config(), clock=clock)
+    feed_id = repo.add_feed("https://feed.example", language="EN", categories=["a"])
+    repo.add_feed("https://later.example", next_mining_at=clock.now + 60)
+
+    feed = repo.begin_mine_update(DEFAULT_LOCK_DURATION)
+
+    assert feed is not None
+    assert feed.id == feed_id
+    assert feed.language == "en"
+    assert feed.categories == ["a"]
+    assert repo.begin_mine_update(DEFAULT_LOCK_DURATION) is None
+    assert repo.extend_mine_lock(feed_id, DEFAULT_LOCK_DURATION) is True
+
+    repo.end_mine_update(feed_id, POLLING_INTERVAL)
+    clock.now += POLLING_INTERVAL - 1
+    next_feed = repo.begin_mine_update(DEFAULT_LOCK_DURATION)
+    assert next_feed is not None and next_feed.url == "https://later.example"
+    clock.now += 1
+    due_again = repo.begin_mine_update(DEFAULT_LOCK_DURATION)
+    assert due_again is not None and due_again.id == feed_id
+
+
+def test_expired_lock_is_not_extended_and_feed_is_reclaimed() -> None:
+    clock = FakeClock()
+    repo = SQLiteRepository(make_config(), clock=clock)
+    feed_id = repo.add_feed("https://feed.example")
+    repo.begin_mine_update(lock_duration=30)
+
+    clock.now += 31
+
+    assert repo.extend_mine_lock(feed_id, 30) is False
+    feed = repo.begin_mine_update(lock_duration=30)
+    assert feed is not None and feed.id == feed_id
+
+
+def test_lock_taken_over_after_expiry_is_left_to_new_owner(monkeypatch) -> None:
+    clock = FakeClock()
+    config = make_config()
+    repo = SQLiteRepository(config, clock=clock)
+    feed_id = repo.add_feed("https://feed.example")
+    repo.add_items(make_items(feed_id, 1))
+    claims = []
+
+    def stalled_poll_feed(feed, miner, repository, heartbeat=None, **kwargs):
+        # Worker A stalls past its lock; worker B claims the feed meanwhile.
+        clock.now += DEFAULT_LOCK_DURATION + 1
+        claims.append(repo.begin_mine_update(DEFAULT_LOCK_DURATION))
+        assert heartbeat is not None
+        heartbeat.beat()
+        return FeedPollResult(pending=1)
+
+    monkeypatch.setattr("news_deframer.poller.poll_feed", stalled_poll_feed)
+
+    assert poll_next_feed(config, Miner(config, repository=repo), repo) is True
+
+    (owner,) = claims
+    assert owner is not None and owner.id == feed_id
+    # A neither renewed nor released B's lock, so nobody else can claim it.
+    assert repo.begin_mine_update(DEFAULT_LOCK_DURATION) is None
+    assert repo.extend_mine_lock(feed_id, 30, lock_token=owner.lock_token) is True
+    repo.end_mine_update(feed_id, POLLING_INTERVAL, lock_token=uuid4())
+    assert repo.begin_mine_update(DEFAULT_LOCK_DURATION) is None
+
+
+def test_priority_mode_prefers_larger_backlog() -> None:
+    config = make_config()
+    config.scheduling_mode = SCHEDULING_MODE_PRIORITY
+    clock = FakeClock()
+    repo = SQLiteRepository(config, clock=clock)
+    small = repo.add_feed("https://small.example", next_mining_at=clock.now - 10)
+    large = repo.add_feed("https://large.example")
+    repo.add_items(make_items(small, 1))
+    repo.add_items(make_items(large, 50))
+
+    feed = repo.begin_mine_update(DEFAULT_LOCK_DURATION)
+
+    assert feed is not None and feed.id == large
+
+
+def test_upsert_trends_reports_stats_and_drains_pending_items() -> None:
+    repo = SQLiteRepository(make_config())
+    feed_id = repo.add_feed("https://feed.example")
+    items = make_items(feed_id, 3)
+    repo.add_items(items)
+    trends = [
+        Trend(
+            item_id=item.id,
+            feed_id=feed_id,
+            language="en",
+            pub_date=item.pub_date,
+            root_domain="feed.example",
+            noun_stems=["titl"],
+        )
+        for item in items[:2]
+    ]
+
+    assert repo.upsert_trends(trends) == UpsertStats(inserted=2)
+    trends[0].noun_stems = ["other"]
+    assert repo.upsert_trends(trends) == UpsertStats(updated=1, unchanged=1)
+    assert [item.id for item in repo.fetch_pending_items(feed_id)] == [items[2].id]
+    assert repo.fetch_trends()[0].noun_stems == ["other"]
+
+
+def test_quarantined_item_is_skipped_until_retry() -> None:
+    config = make_config()
+    config.item_quarantine = True
+    config.quarantine_retry_seconds = 60
+    clock = FakeClock()
+    repo = SQLiteRepository(config, clock=clock)
+    feed_id = repo.add_feed("https://feed.example")
+    (item,) = make_items(feed_id, 1)
+    repo.add_items([item])
+
+    repo.quarantine_item(item.id, feed_id, "boom")
+    assert repo.fetch_pending_items(feed_id) == []
+    clock.now += 60
+    assert len(repo.fetch_pending_items(feed_id)) == 1
+
+    repo.quarantine_item(item.id, feed_id, "boom")
+    clock.now += 119
+    assert repo.fetch_pending_items(feed_id) == []
+
+
+def test_poll_next_feed_mines_against_sqlite(monkeypatch) -> None:
+    def fake_extract_trends(tasks, contents=None, max_chars=0):
+        return [
+            Trend(
+                item_id=task.item_id,
+                feed_id=task.feed_id,
+                language=task.language,
+                pub_date=task.pub_date,
+                root_domain=task.root_domain,
+            )
+            for task in tasks
+        ]
+
+    monkeypatch.setattr("news_deframer.miner.extract_trends", fake_extract_trends)
+    config = make_config()
+    config.content_dedup = False
+    repo = SQLiteRepository(config)
+    feed_id = repo.add_feed("https://feed.example", language="en")
+    repo.add_items(make_items(feed_id, 5))
+
+    assert poll_next_feed(config, Miner(config, repository=repo), repo) is True
+
+    assert len(repo.fetch_trends()) == 5
+    assert repo.fetch_pending_items(feed_id) == []
+    assert repo.begin_mine_update(DEFAULT_LOCK_DURATION) is None
+
+
+def test_schedule_slotting_spreads_feeds_released_together() -> None:
+    config = make_config()
+    config.schedule_slotting = True
+    clock = FakeClock()
+    repo = SQLiteRepository(config, clock=clock)
+    feed_ids = [repo.add_feed(f"https://{index}.example") for index in range(20)]
+
+    for feed_id in feed_ids:
+        assert repo.begin_mine_update(DEFAULT_LOCK_DURATION) is not None
+        repo.end_mine_update(feed_id, POLLING_INTERVAL)
+
+    rows = repo._conn.execute("SELECT next_mining_at FROM feed_schedules").fetchall()
+    due = {row[0] for row in rows}
+    assert len(due) > 10
+    assert all(
+        clock.now + POLLING_INTERVAL / 2 <= at < clock.now + POLLING_INTERVAL * 1.5
+        for at in due
+    )
+
+    clock.now += POLLING_INTERVAL * 2
+    assert repo.rebalance_schedules(POLLING_INTERVAL) == 20
+    rows = repo._conn.execute("SELECT next_mining_at FROM feed_schedules").fetchall()
+    assert all(clock.now <= row[0] < clock.now + POLLING_INTERVAL for row in rows)
+
+
+def test_priority_backlog_tracks_oldest_unmined_item(monkeypatch) -> None:
+    monkeypatch.setattr(
+        "news_deframer.miner.extract_trends",
+        lambda tasks, contents=None, max_chars=0: [
+            Trend(
+                item_id=task.item_id,
+                feed_id=task.feed_id,
+                language=task.language,
+                pub_date=task.pub_date,
+                root_domain=task.root_domain,
+            )
+            for task in tasks
+        ],
+    )
+    config = make_config()
+    config.scheduling_mode = SCHEDULING_MODE_PRIORITY
+    config.mining_budget_items = 2
+    repo = SQLiteRepository(config)
+    feed_id = repo.add_feed("https://feed.example", language="en")
+    items = make_items(feed_id, 5)
+    repo.add_items(items)
+
+    assert poll_next_feed(config, Miner(config, repository=repo), repo) is True
+
+    pending, oldest = repo._conn.execute(
+        "SELECT pending_items, oldest_pending_at FROM feed_mining_stats"
+    ).fetchone()
+    assert pending == 3
+    assert oldest == items[2].pub_date.timestamp()
+
+
+def test_priority_backlog_drops_items_mined_outside_claims(monkeypatch) -> None:
+    monkeypatch.setattr(
+        "news_deframer.miner.extract_trends",
+        lambda tasks, contents=None, max_chars=0: [
+            Trend(
+                item_id=task.item_id,
+                feed_id=task.feed_id,
+                language=task.language,
+                pub_date=task.pub_date,
+                root_domain=task.root_domain,
+            )
+            for task in tasks
+        ],
+    )
+    config = make_config()
+    config.scheduling_mode = SCHEDULING_MODE_PRIORITY
+    repo = SQLiteRepository(config)
+    feed_id = repo.add_feed("https://feed.example", language="en")
+    items = make_items(feed_id, 4)
+    repo.add_items(items)
+    # E.g. a backfill mines one item behind the counter's back.
+    repo.upsert_trends(
+        [
+            Trend(
+                item_id=items[0].id,
+                feed_id=feed_id,
+                language="en",
+                pub_date=items[0].pub_date,
+                root_domain="feed.example",
+            )
+        ]
+    )
+
+    assert poll_next_feed(config, Miner(config, repository=repo), repo) is True
+
+    assert repo.fetch_pending_items(feed_id) == []
+    assert repo._conn.execute(
+        "SELECT pending_items, oldest_pending_at FROM feed_mining_stats"
+    ).fetchone() == (0, None)
+
+
+def test_items_past_trend_retention_are_not_pending() -> None:
+    config = make_config()
+    config.trends_partitioned = True
+    config.trend_retention_days = 30
+    clock = FakeClock(datetime(2024, 3, 1, tzinfo=timezone.utc).timestamp())
+    repo = SQLiteRepository(config, clock=clock)
+    feed_id = repo.add_feed("https://feed.example")
+    expired, recent = make_items(feed_id, 2)
+    recent.pub_date = datetime(2024, 2, 15, tzinfo=timezone.utc)
+    repo.add_items([expired, recent])
+
+    assert [item.id for item in repo.fetch_pending_items(feed_id)] == [recent.id]
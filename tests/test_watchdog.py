@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from news_deframer import watchdog as watchdog_module
+from news_deframer.watchdog import MemoryWatchdog, current_rss_bytes
+
+
+def test_current_rss_bytes_reads_statm(tmp_path, monkeypatch):
+    statm = tmp_path / "statm"
+    statm.write_text("1000 250 10 1 0 100 0\n")
+    monkeypatch.setattr(watchdog_module, "_STATM_PATH", str(statm))
+    monkeypatch.setattr(watchdog_module.os, "sysconf", lambda name: 4096)
+
+    assert current_rss_bytes() == 250 * 4096
+
+
+def test_current_rss_bytes_without_proc(monkeypatch):
+    monkeypatch.setattr(watchdog_module, "_STATM_PATH", "/nonexistent/statm")
+
+    assert current_rss_bytes() is None
+
+
+def test_check_fires_on_item_limit(monkeypatch):
+    monkeypatch.setattr(watchdog_module, "current_rss_bytes", lambda: 1)
+    watchdog = MemoryWatchdog(max_items=100)
+
+    assert watchdog.check(99) is None
+    assert "100 items" in (watchdog.check(100) or "")
+
+
+def test_check_fires_on_rss_limit(monkeypatch):
+    rss = [100]
+    monkeypatch.setattr(watchdog_module, "current_rss_bytes", lambda: rss[0])
+    watchdog = MemoryWatchdog(max_rss_bytes=200)
+
+    assert watchdog.check(0) is None
+    rss[0] = 300
+    assert "RSS 300" in (watchdog.check(0) or "")
+
+
+def test_check_is_disabled_without_limits(monkeypatch):
+    monkeypatch.setattr(watchdog_module, "current_rss_bytes", lambda: 10**12)
+
+    assert MemoryWatchdog().check(10**9) is None